@@ -1,1327 +1,1206 @@
-bl_info = {
-    "name": "AutoMDL-Enhanced",
-    "author": "Vengefulcrop, NvC_DmN_CH",
-    "version": (1, 0),
-    "blender": (4, 0, 0),
-    "location": "View3D > Sidebar > AutoMDL2",
-    "description": "Compiles models for Source where the blend project file is, with some improvements.",
-    "warning": "",
-    "wiki_url": "https://github.com/vengefulcrop/AutoMDL-Enhanced/", 
-    "category": "3D View"
-}
-
-import bpy
-import os
-import subprocess
-import shutil
-from pathlib import Path
-import mathutils
-import winreg
-from bl_ui.generic_ui_list import draw_ui_list
-import threading
-from io import StringIO
-import re
-import glob # Import glob for file pattern matching
-from typing import List, Dict, Tuple, Any, Set # Added typing imports
-from collections import defaultdict
-
-game_select_method_is_dropdown = None
-temp_path = bpy.app.tempdir
-games_paths_list = []
-game_path = None
-steam_path = None
-studiomdl_path = None
-gameManualTextGameinfoPath = None
-gameManualTextInputIsInvalid = False
-massTextInputIsInvalid = False
-visMeshInputIsInvalid = False
-
-def defineGameSelectDropdown(self, context):
-    # game_select
-    game_select_items_enum = []
-    for i in range(len(games_paths_list)):
-        game_name = str(os.path.basename(os.path.dirname(games_paths_list[i])))
-        game_path = str(games_paths_list[i])
-        item = (game_path, game_name, "")
-        game_select_items_enum.append(item)
-    
-    
-    bpy.types.Scene.game_select = bpy.props.EnumProperty(
-        name = "Selected Option",
-        items = game_select_items_enum,
-        update = onGameDropdownChanged
-    )
-
-def onGameDropdownChanged(self, context):
-    pass
-
-def onMassTextInputChanged(self, context):
-    global massTextInputIsInvalid
-    massTextInputIsInvalid = not is_float(context.scene.mass_text_input)
-
-def onGameManualTextInputChanged(self, context):
-    global gameManualTextInputIsInvalid
-    gameManualTextInputIsInvalid = False
-    
-    in_folder = str(Path(os.path.join(context.scene.studiomdl_manual_input, ''))) # make sure to have a trailing slash, and its a string
-    subdir_studiomdl = os.path.join(in_folder, "studiomdl.exe")
-    has_studiomdl = os.path.exists( subdir_studiomdl )
-    if not has_studiomdl:
-        gameManualTextInputIsInvalid = True
-        print("ERROR: Couldn't find studiomdl.exe in specified folder")
-        return
-    
-    base_path = Path(os.path.dirname(in_folder))
-    gameinfo_path = None
-    # oh no, code copy pasted from getGamesList()
-    # anyway
-    # 
-    # although we need the path to the folder which contains the gameinfo
-    # so we need to iterate now again
-    _subdirectories = [x for x in base_path.iterdir() if x.is_dir()]
-    for k in range(len(_subdirectories)):
-        _subdir = _subdirectories[k]
-        has_gameinfo = os.path.exists( os.path.join(_subdir, "gameinfo.txt") )
-        
-        # currently we're returning the first folder which has a gameinfo.txt, in alot of games there are multiple folders which match this criteria. todo: is this an issue?
-        if( has_gameinfo ):
-            gameinfo_path = str(_subdir)
-            break
-    
-    if gameinfo_path == None:
-        gameManualTextInputIsInvalid = True
-        print("ERROR: Couldn't find gameinfo.txt in game")
-        return
-    
-    gameManualTextGameinfoPath = gameinfo_path
-
-
-def setGamePath(self, context, new_game_path_value):
-    global game_path
-    global studiomdl_path
-    game_path = new_game_path_value
-    studiomdl_path = os.path.join(os.path.dirname(game_path), "bin", "studiomdl.exe")
-
-# returns list of source games which have a studiomdl.exe in the bin folder
-def getGamesList():
-    global steam_path
-    common = Path(os.path.join(steam_path, r"steamapps/common"))
-    
-    # get all subdirectories in common
-    subdirectories = [x for x in common.iterdir() if x.is_dir()]
-    
-    # okay let's filter games
-    list = []
-    
-    for i in range(len(subdirectories)):
-        subdir = subdirectories[i]
-        subdir_bin = os.path.join(subdir, "bin")
-        has_bin_folder = os.path.exists( subdir_bin )
-        if( not has_bin_folder ):
-            continue
-        
-        subdir_studiomdl = os.path.join(subdir_bin, "studiomdl.exe")
-        has_studiomdl = os.path.exists( subdir_studiomdl )
-        
-        if( not has_studiomdl ):
-            continue
-        
-        # okay!
-        # although we need the path to the folder which contains the gameinfo
-        # so we need to iterate now again
-        _subdirectories = [x for x in subdir.iterdir() if x.is_dir()]
-        for k in range(len(_subdirectories)):
-            _subdir = _subdirectories[k]
-            has_gameinfo = os.path.exists( os.path.join(_subdir, "gameinfo.txt") )
-            
-            # currently we're returning the first folder which has a gameinfo.txt, in alot of games there are multiple folders which match this criteria. todo: is this an issue?
-            if( has_gameinfo ):
-                list.append(_subdir)
-                break
-    
-    return list
-
-# attempt to figure out where steam is installed
-def getSteamInstallationPath():
-    
-    # windows specific attempts
-    if(os.name == 'nt'):
-        # check in registry (x86)
-        try:
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam") as key:
-                return winreg.QueryValueEx(key, "SteamPath")[0]
-        except Exception as e:
-            print(e)
-        
-        # check in registry (x64)
-        try:
-            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam") as key:
-                return winreg.QueryValueEx(key, "InstallPath")[0]
-        except Exception as e:
-            print(e)
-    
-    # todo: linux specific attempts?
-    
-    return None
-
-
-def refreshGameSelectDropdown(self, context):
-    del bpy.types.Scene.game_select
-    defineGameSelectDropdown(None, context)
-
-# --- Helper Functions ---
-
-def parse_material_skins(material_slots: list) -> Tuple[List[str], Dict[int, Dict[str, str]]]:
-    """Parses material slots to identify base materials and their skin variants.
-
-    Args:
-        material_slots: A list of material slots from a Blender object.
-
-    Returns:
-        A tuple containing:
-        - base_materials_ordered: An ordered list of base material names that have skins.
-        - skin_groups: A dictionary mapping skin IDs (int) to dictionaries
-                       where keys are base material names and values are the
-                       corresponding skin variant names for that ID.
-                       Example: {1: {'metal': 'metal_skin1', 'wood': 'wood_skin1'},
-                                 2: {'metal': 'metal_skin2', 'wood': 'wood'}}
-    """
-    skin_pattern = re.compile(r"^(.*)_skin(\d+)$", re.IGNORECASE)
-    base_candidates: Dict[str, Set[int]] = defaultdict(set) # base_name_lower: {skin_id}
-    skin_variants: Dict[Tuple[str, int], str] = {} # (base_name_lower, skin_id): full_skin_name
-    all_material_names: Set[str] = set() # Keep track of all original names
-
-    for slot in material_slots:
-        if slot.material:
-            mat_name = slot.material.name
-            all_material_names.add(mat_name)
-            match = skin_pattern.match(mat_name)
-            if match:
-                base_name, skin_id_str = match.groups()
-                skin_id = int(skin_id_str)
-                base_name_lower = base_name.lower()
-                base_candidates[base_name_lower].add(skin_id)
-                skin_variants[(base_name_lower, skin_id)] = mat_name
-
-    # Filter base candidates: only keep those whose base name actually exists as a material
-    valid_base_materials_lower: Dict[str, Set[int]] = {}
-    base_name_map_lower_to_original: Dict[str, str] = {}
-    for base_lower, skin_ids in base_candidates.items():
-        # Find the original casing for the base name
-        original_base_name = next((name for name in all_material_names if name.lower() == base_lower), None)
-        if original_base_name:
-            valid_base_materials_lower[base_lower] = skin_ids
-            base_name_map_lower_to_original[base_lower] = original_base_name
-
-    if not valid_base_materials_lower:
-        return [], {}
-
-    # Determine the final ordered list of base materials (using original casing)
-    base_materials_ordered: List[str] = sorted([base_name_map_lower_to_original[b] for b in valid_base_materials_lower.keys()])
-
-    # Build the skin_groups dictionary
-    skin_groups: Dict[int, Dict[str, str]] = defaultdict(dict)
-    all_skin_ids = set(sid for ids in valid_base_materials_lower.values() for sid in ids)
-
-    if not all_skin_ids:
-        return [], {}
-
-    min_skin_id = min(all_skin_ids)
-    max_skin_id = max(all_skin_ids)
-
-    for skin_id in range(min_skin_id, max_skin_id + 1):
-        for base_name_original in base_materials_ordered:
-            base_name_lower = base_name_original.lower()
-            variant_key = (base_name_lower, skin_id)
-            if variant_key in skin_variants:
-                skin_groups[skin_id][base_name_original] = skin_variants[variant_key]
-            else:
-                # If no specific skin variant exists for this ID, use the base material name
-                skin_groups[skin_id][base_name_original] = base_name_original
-
-    # Filter out skin IDs that don't actually introduce any changes from the base
-    final_skin_groups: Dict[int, Dict[str, str]] = {}
-    base_row_dict = {base_name: base_name for base_name in base_materials_ordered}
-    for skin_id, skin_map in skin_groups.items():
-        if skin_map != base_row_dict:
-            final_skin_groups[skin_id] = skin_map
-
-    # Renumber skin IDs to be contiguous starting from 1 if necessary
-    renumbered_skin_groups: Dict[int, Dict[str, str]] = {}
-    if final_skin_groups:
-        sorted_skin_ids = sorted(final_skin_groups.keys())
-        for i, old_skin_id in enumerate(sorted_skin_ids):
-            renumbered_skin_groups[i + 1] = final_skin_groups[old_skin_id]
-
-    return base_materials_ordered, renumbered_skin_groups
-
-def generate_texturegroup_qc(base_materials_ordered: List[str], skin_groups: Dict[int, Dict[str, str]]) -> str:
-    """Generates the $texturegroup QC command string.
-
-    Args:
-        base_materials_ordered: An ordered list of base material names that have skins.
-        skin_groups: A dictionary mapping *contiguous* skin IDs (starting from 1)
-                     to dictionaries of {base_name: skin_variant_name}.
-
-    Returns:
-        The formatted $texturegroup QC string, or an empty string if no skins are defined.
-    """
-    if not base_materials_ordered or not skin_groups:
-        return ""
-
-    # Ensure skin_groups keys are contiguous and start from 1
-    if not all(i + 1 in skin_groups for i in range(len(skin_groups))):
-        print("Warning: Skin group IDs are not contiguous starting from 1. QC might be incorrect.")
-        # Or raise an error, depending on desired strictness
-
-    qc_string = "$texturegroup skinfamilies\n{\n"
-
-    # Base materials line (Skin 0)
-    base_line = "\t{ " + " ".join(f'"{mat}"' for mat in base_materials_ordered) + " }"
-    qc_string += base_line + "\n"
-
-    # Skin variant lines
-    sorted_skin_ids = sorted(skin_groups.keys())
-    for skin_id in sorted_skin_ids:
-        skin_map = skin_groups[skin_id]
-        skin_line = "\t{ "
-        material_parts = []
-        for base_name in base_materials_ordered:
-            # Use the variant if present, otherwise default to the base name (should be handled by parse_material_skins)
-            material_parts.append(f'"{skin_map.get(base_name, base_name)}"')
-        skin_line += " ".join(material_parts) + " }"
-        qc_string += skin_line + "\n"
-
-    qc_string += "}\n"
-    return qc_string
-
-
-class AutoMDLOperator(bpy.types.Operator):
-    bl_idname = "wm.automdl"
-    bl_label = "Update MDL"
-    bl_description = "Compile model"
-    
-    
-    def execute(self, context):
-        scn = context.scene
-
-        # --- Preemptive Temp File Cleanup ---
-        # self.report({'INFO'}, f"Cleaning temp directory: {temp_path}")
-        # qc_pattern = os.path.join(temp_path, "qc_*.qc")
-        # ref_smd_pattern = os.path.join(temp_path, "*_ref.smd")
-        # phy_smd_pattern = os.path.join(temp_path, "*_phy.smd")
-        # 
-        # files_to_delete = glob.glob(qc_pattern) + glob.glob(ref_smd_pattern) + glob.glob(phy_smd_pattern)
-        # 
-        # deleted_count = 0
-        # for f_path in files_to_delete:
-        #     try:
-        #         os.remove(f_path)
-        #         deleted_count += 1
-        #         # self.report({'INFO'}, f"Deleted old temp file: {os.path.basename(f_path)}") # Optional: Report each deleted file
-        #     except OSError as e:
-        #         self.report({'WARNING'}, f"Could not delete old temp file '{os.path.basename(f_path)}': {e}")
-        # if deleted_count > 0:
-        #      self.report({'INFO'}, f"Deleted {deleted_count} old temp files.")
-        
-        # --- Initial Setup & Validation ---
-        if game_select_method_is_dropdown:
-            if not scn.game_select:
-                self.report({'ERROR'}, "Please select a game/compiler.")
-                return {'CANCELLED'}
-            setGamePath(self, context, scn.game_select)
-        else:
-            if not gameManualTextGameinfoPath:
-                 self.report({'ERROR'}, "Manual game path is invalid or not set.")
-                 return {'CANCELLED'}
-            setGamePath(self, context, gameManualTextGameinfoPath)
-
-        blend_path = bpy.data.filepath
-        if not blend_path:
-            self.report({'ERROR'}, "Please save the project file first.")
-            return {'CANCELLED'}
-
-        models_root = get_models_path(blend_path)
-        if not models_root:
-             self.report({'ERROR'}, "Please save the project inside a 'models' folder structure.")
-             return {'CANCELLED'}
-             
-        selected_collection = scn.model_collection
-        if not selected_collection:
-            self.report({'ERROR'}, "Please select a Model Collection in the AutoMDL panel.")
-            return {'CANCELLED'}
-        
-        # Calculate base relative path from blend file location ONCE
-        try:
-            relative_dir_path = os.path.relpath(os.path.dirname(blend_path), models_root).replace("\\", "/")
-            if relative_dir_path == '.': # Handle case where blend is directly in models root
-                relative_dir_path = ""
-        except ValueError:
-            self.report({'ERROR'}, "Blend file is not saved within the expected 'models' directory structure.")
-            return {'CANCELLED'}
-
-        # --- Global Compile Settings (Retrieve once) ---
-        qc_staticprop = scn.staticprop
-        qc_mass_str = scn.mass_text_input
-        qc_surfaceprop = scn.surfaceprop
-        qc_mostlyopaque = scn.mostlyopaque
-        qc_scale_factor = scn.qc_scale_factor
-        cdmaterials_type = scn.cdmaterials_type
-        cdmaterials_list_manual = [item.name for item in scn.cdmaterials_list]
-        make_folders = bpy.context.preferences.addons[__package__].preferences.do_make_folders_for_cdmaterials
-        make_vmts = bpy.context.preferences.addons[__package__].preferences.do_make_vmts
-        
-        if not qc_staticprop and not is_float(qc_mass_str):
-            self.report({'ERROR'}, "Mass value is invalid.")
-            return {'CANCELLED'}
-        qc_mass = float(qc_mass_str) if not qc_staticprop else 1 # Convert mass now
-        
-        # --- Find Collision Sub-Collection --- 
-        collision_sub_collection = None
-        for child in selected_collection.children:
-            if child.name.lower() == "collision": # Case-insensitive check
-                collision_sub_collection = child
-                break
-
-        # --- Process Each Object in Selected Collection ---
-        mesh_ext = "smd" # SMD is currently the only supported format
-        compiled_count = 0
-        errors = []
-
-        for obj in selected_collection.objects:
-            # Filter for valid visual mesh objects AND check effective visibility
-            if (obj.type != 'MESH' or               # Skip non-mesh objects
-                obj.name.lower().startswith('col_') or # Skip collision meshes themselves
-                obj.hide_get()):                   # Skip if hidden (considers hierarchy, layers etc.)
-                continue # Skip this object and move to the next one
-
-            # If we reach here, the object is a visible mesh not named like a collision mesh
-            vis_mesh_obj = obj
-            self.report({'INFO'}, f"Processing: {vis_mesh_obj.name}")
-
-            # Sanitize name for filenames/paths
-            vis_mesh_name_raw = vis_mesh_obj.name
-            sanitized_vis_mesh_name = "".join(c if c.isalnum() or c in ('_', '-') else '_' for c in vis_mesh_name_raw)
-            if not sanitized_vis_mesh_name:
-                sanitized_vis_mesh_name = f"default_model_{compiled_count}" # Ensure unique fallback
-                self.report({'WARNING'}, f"Visual mesh name '{vis_mesh_name_raw}' resulted in empty sanitized name. Using '{sanitized_vis_mesh_name}'.")
-
-            # --- Determine Paths for this object ---
-            qc_modelpath = os.path.join(relative_dir_path, sanitized_vis_mesh_name).replace("\\", "/") if relative_dir_path else sanitized_vis_mesh_name
-            qc_vismesh_name = sanitized_vis_mesh_name + "_ref"
-            qc_phymesh_name = sanitized_vis_mesh_name + "_phy"
-            temp_qc_path = os.path.join(temp_path, f"qc_{sanitized_vis_mesh_name}.qc")
-            temp_vis_smd_path = os.path.join(temp_path, qc_vismesh_name)
-            temp_phy_smd_path = os.path.join(temp_path, qc_phymesh_name)
-            
-            # --- Find Corresponding Collision Mesh ---
-            phy_mesh_obj = None
-            has_collision = False
-            if collision_sub_collection:
-                expected_col_name = f"COL_{vis_mesh_obj.name}"
-                for col_obj in collision_sub_collection.objects:
-                    if col_obj.type == 'MESH' and col_obj.name.lower() == expected_col_name.lower():
-                        phy_mesh_obj = col_obj
-                        has_collision = True
-                        # Check for smooth shading and apply if necessary
-                        needs_smooth = any(not poly.use_smooth for poly in phy_mesh_obj.data.polygons)
-                        if needs_smooth:
-                            self.report({'INFO'}, f"Applying Shade Smooth to collision mesh '{phy_mesh_obj.name}' for '{vis_mesh_obj.name}'.")
-                            try:
-                                # Use foreach_set for potentially better performance
-                                phy_mesh_obj.data.polygons.foreach_set("use_smooth", [True] * len(phy_mesh_obj.data.polygons))
-                            except Exception as smooth_e:
-                                self.report({'WARNING'}, f"Could not automatically apply Shade Smooth to '{phy_mesh_obj.name}': {smooth_e}. Skipping collision.")
-                                phy_mesh_obj = None # Treat as no collision if smoothing fails
-                                has_collision = False
-                                
-                        break # Found the matching collision mesh
-
-            # --- Export SMDs ---
-            try:
-                self.exportObjectToSmd(vis_mesh_obj, temp_vis_smd_path, False)
-                if has_collision:
-                    self.exportObjectToSmd(phy_mesh_obj, temp_phy_smd_path, True)
-            except Exception as e:
-                error_msg = f"Failed to export SMD for '{vis_mesh_obj.name}': {e}"
-                self.report({'ERROR'}, error_msg)
-                errors.append(error_msg)
-                continue # Skip this object
-
-            # --- Parse Skin Materials ---
-            base_materials_ordered, skin_groups = parse_material_skins(vis_mesh_obj.material_slots)
-
-            # --- Prepare QC Data ---
-            convex_pieces = 0
-            if has_collision:
-                try:
-                    # Ensure collision mesh is up-to-date for island counting
-                    depsgraph = context.evaluated_depsgraph_get()
-                    phy_mesh_obj_eval = phy_mesh_obj.evaluated_get(depsgraph)
-                    convex_pieces = CountIslands(phy_mesh_obj_eval)
-                except Exception as e:
-                     self.report({'WARNING'}, f"Could not count collision islands for '{phy_mesh_obj.name}': {e}. Proceeding without concave.")
-                     convex_pieces = 1 # Assume single piece if count fails
-
-            qc_cdmaterials_list_current = []
-            has_materials = len(vis_mesh_obj.material_slots) > 0 and any(slot.material for slot in vis_mesh_obj.material_slots)
-
-            if has_materials:
-                if cdmaterials_type == '1': # Manual
-                    qc_cdmaterials_list_current.extend([os.path.join(p, '', '').replace("\\", "/") for p in cdmaterials_list_manual])
-                else: # Auto
-                    # Auto path is relative to models/ directory, using the model's path
-                    auto_cd_path = "models/" + os.path.dirname(qc_modelpath) if os.path.dirname(qc_modelpath) else "models"
-                    qc_cdmaterials_list_current.append(auto_cd_path.replace("\\", "/"))
-
-            qc_concave = convex_pieces > 1
-            qc_maxconvexpieces = convex_pieces
-            qc_inertia = 1
-            qc_damping = 0
-            qc_rotdamping = 0
-            
-            # --- Write QC File ---
-            try:
-                with open(temp_qc_path, "w") as file:
-                    file.write(f'$modelname "{qc_modelpath}.mdl"\n')
-                    if qc_scale_factor != 1.0:
-                        file.write(f"$scale {qc_scale_factor:.6f}\n")
-                    file.write("\n")
-                    file.write(f'$bodygroup "Body"\n{{\n\tstudio "{qc_vismesh_name}.{mesh_ext}"\n}}\n')
-
-                    # --- Write Texturegroup --- #
-                    texturegroup_qc_string = generate_texturegroup_qc(base_materials_ordered, skin_groups)
-                    if texturegroup_qc_string:
-                        file.write("\n")
-                        file.write(texturegroup_qc_string)
-
-                    if qc_staticprop:
-                        file.write("\n$staticprop\n")
-                    if qc_mostlyopaque:
-                        file.write("\n$mostlyopaque\n")
-                    
-                    file.write(f'\n$surfaceprop "{qc_surfaceprop}"\n')
-                    file.write("\n$contents \"solid\"\n")
-                    
-                    file.write("\n")
-                    if qc_cdmaterials_list_current:
-                        for cd_path in qc_cdmaterials_list_current:
-                            file.write(f'$cdmaterials "{cd_path}"\n')
-                    else:
-                         file.write('$cdmaterials ""\n') # Explicitly add if no materials/paths
-                    
-                    file.write("\n")
-                    file.write(f'$sequence "idle" {{\n\t"{qc_vismesh_name}.{mesh_ext}"\n\tfps 30\n\tfadein 0.2\n\tfadeout 0.2\n\tloop\n}}\n')
-                    
-                    if has_collision:
-                        file.write("\n")
-                        collision_str = f'$collisionmodel "{qc_phymesh_name}.{mesh_ext}" {{'
-                        if qc_concave:
-                            collision_str += f"\n\t$concave\n\t$maxconvexpieces {qc_maxconvexpieces}"
-                        collision_str += f"\n\t$mass {qc_mass}\n\t$inertia {qc_inertia}\n\t$damping {qc_damping}\n\t$rotdamping {qc_rotdamping}"
-                        collision_str += '\n\t$rootbone " "' # Ensure rootbone exists
-                        collision_str += "\n}}"
-                        file.write(collision_str)
-                        
-            except IOError as e:
-                error_msg = f"Failed to write QC file for '{vis_mesh_obj.name}': {e}"
-                self.report({'ERROR'}, error_msg)
-                errors.append(error_msg)
-                # Attempt cleanup even if QC writing fails
-                try:
-                    if os.path.exists(temp_vis_smd_path + ".smd"): os.remove(temp_vis_smd_path + ".smd")
-                    if os.path.exists(temp_phy_smd_path + ".smd"): os.remove(temp_phy_smd_path + ".smd")
-                except OSError as clean_e:
-                    self.report({'WARNING'}, f"Could not clean up temporary SMDs for '{vis_mesh_obj.name}' after QC error: {clean_e}")
-                continue # Skip this object
-
-            # --- Compile QC ---
-            studiomdl_quiet = True
-            studiomdl_fastbuild = False
-            studiomdl_nowarnings = True
-            studiomdl_nox360 = True
-            studiomdl_args = [studiomdl_path, "-game", game_path, "-nop4"]
-            if studiomdl_quiet: studiomdl_args.append("-quiet")
-            if studiomdl_fastbuild: studiomdl_args.append("-fastbuild")
-            if studiomdl_nowarnings: studiomdl_args.append("-nowarnings")
-            if studiomdl_nox360: studiomdl_args.append("-nox360")
-            studiomdl_args.append(temp_qc_path)
-            
-            try:
-                # Use subprocess.run with check=True to catch compile errors based on exit code
-                # Capture output to check for specific studiomdl errors if needed
-                compile_result = subprocess.run(studiomdl_args, check=True, capture_output=True, text=True)
-                # Optional: Log success or check output for warnings
-                # print(f"Studiomdl output for {vis_mesh_obj.name}:\n{compile_result.stdout}")
-            except subprocess.CalledProcessError as e:
-                error_msg = f"Studiomdl failed for '{vis_mesh_obj.name}' (QC: {os.path.basename(temp_qc_path)}). Error:\n{e.stderr}"
-                self.report({'ERROR'}, error_msg)
-                errors.append(error_msg)
-                # Attempt cleanup
-                try:
-                    if os.path.exists(temp_vis_smd_path + ".smd"): os.remove(temp_vis_smd_path + ".smd")
-                    if os.path.exists(temp_phy_smd_path + ".smd"): os.remove(temp_phy_smd_path + ".smd")
-                    if os.path.exists(temp_qc_path): os.remove(temp_qc_path)
-                except OSError as clean_e:
-                    self.report({'WARNING'}, f"Could not clean up temporary files for '{vis_mesh_obj.name}' after compile error: {clean_e}")
-                continue # Skip this object
-            except FileNotFoundError:
-                error_msg = f"Studiomdl.exe not found at '{studiomdl_path}'. Cannot compile."
-                self.report({'ERROR'}, error_msg)
-                errors.append(error_msg)
-                # No point continuing if studiomdl isn't found
-                # Attempt cleanup for the current object
-                try:
-                     if os.path.exists(temp_vis_smd_path + ".smd"): os.remove(temp_vis_smd_path + ".smd")
-                     if os.path.exists(temp_phy_smd_path + ".smd"): os.remove(temp_phy_smd_path + ".smd")
-                     if os.path.exists(temp_qc_path): os.remove(temp_qc_path)
-                except OSError as clean_e:
-                    self.report({'WARNING'}, f"Could not clean up temporary files for '{vis_mesh_obj.name}' after studiomdl not found error: {clean_e}")
-                break # Exit the loop
-            
-            # --- Create Material Folders/VMTs (for this object) ---
-            if has_materials and make_folders:
-                # Base path for materials, sibling to models folder
-                materials_root = os.path.dirname(models_root)
-                if materials_root: # Check if we could find the parent of 'models'
-                    for cd_entry_rel in qc_cdmaterials_list_current:
-                         # cd_entry_rel is like "models/props/myfolder" or a manual path
-                         # We need the path relative to the *materials* folder
-                         # If auto, it starts with models/, strip that. If manual, use as is?
-                         # Let's assume manual paths are relative to materials/ already, 
-                         # and auto paths need models/ stripped.
-                         mat_rel_path = cd_entry_rel
-                         if cd_entry_rel.startswith("models/"):
-                             mat_rel_path = cd_entry_rel[len("models/"):]
-                         elif cd_entry_rel.startswith("models\\"):
-                             mat_rel_path = cd_entry_rel[len("models\\"):]
-                             
-                         mat_fullpath = Path(os.path.join(materials_root, "materials", mat_rel_path))
-                         try:
-                             os.makedirs(mat_fullpath, exist_ok=True)
-                         except OSError as e:
-                             print(f"Error creating material directory '{mat_fullpath}': {e}")
-                             continue # Skip VMT creation if dir fails
-                         
-                         # Create placeholder VMTs if enabled AND using auto $cdmaterials
-                         if make_vmts and cdmaterials_type == '0':
-                             for slot in vis_mesh_obj.material_slots:
-                                 if slot.material:
-                                     mat_name = slot.material.name
-                                     # Sanitize material name for filename? Maybe not needed for VMT.
-                                     vmt_path = os.path.join(mat_fullpath, mat_name + '.vmt')
-                                     if not os.path.exists(vmt_path):
-                                         try:
-                                             with open(vmt_path, "w") as file:
-                                                 # Basetexture path assumes texture is in the same folder structure
-                                                 vmt_basetexture = os.path.join(cd_entry_rel, mat_name).replace("\\", "/")
-                                                 file.write(f'VertexLitGeneric\n{{\n\t$basetexture "{vmt_basetexture}"\n}}')
-                                         except IOError as e:
-                                             print(f"Error writing VMT file '{vmt_path}': {e}")
-                else:
-                    print("Could not determine parent directory of 'models' folder to create materials.")
-
-            # --- Cleanup Temp Files for this object ---
-            try:
-                if os.path.exists(temp_vis_smd_path + ".smd"): os.remove(temp_vis_smd_path + ".smd")
-                if os.path.exists(temp_phy_smd_path + ".smd"): os.remove(temp_phy_smd_path + ".smd")
-                if os.path.exists(temp_qc_path): os.remove(temp_qc_path)
-            except OSError as e:
-                # Non-critical, just report
-                self.report({'WARNING'}, f"Could not clean up temporary files for '{vis_mesh_obj.name}': {e}")
-
-            compiled_count += 1
-            self.report({'INFO'}, f"Finished processing: {vis_mesh_obj.name}")
-
-        # --- Final Report ---
-        if compiled_count > 0 and not errors:
-            self.report({'INFO'}, f"Successfully compiled {compiled_count} model(s) from collection '{selected_collection.name}'. Output is in the blend file's directory.")
-            return {'FINISHED'}
-        elif compiled_count > 0 and errors:
-            self.report({'WARNING'}, f"Compiled {compiled_count} model(s) from '{selected_collection.name}' with {len(errors)} error(s). Check console/report.")
-            # Optionally print all errors here
-            # for err in errors: print(err)
-            return {'FINISHED'} # Still finished, but with warnings
-        elif compiled_count == 0 and not errors:
-             self.report({'WARNING'}, f"No valid visual mesh objects found in collection '{selected_collection.name}'. Nothing compiled.")
-             return {'CANCELLED'}
-        else: # No models compiled and errors occurred
-             self.report({'ERROR'}, f"Failed to compile any models from '{selected_collection.name}'. {len(errors)} error(s) occurred. Check console/report.")
-             # Optionally print all errors here
-             # for err in errors: print(err)
-             return {'CANCELLED'}
-
-    
-    def exportObjectToSmd(self, obj, path, is_collision_smd):
-        
-        # switch to object mode
-        context_mode_snapshot = "OBJECT" # Default to object mode
-        active_obj = bpy.context.active_object
-        if active_obj and bpy.context.mode != 'OBJECT':
-            context_mode_snapshot = active_obj.mode
-            bpy.ops.object.mode_set(mode='OBJECT')
-            
-        # Check if object exists and is a mesh
-        if not obj or obj.name not in bpy.data.objects or obj.type != 'MESH':
-             print(f"Error: Object '{obj.name if obj else 'None'}' not found or not a mesh.")
-             # Switch mode back if changed
-             if active_obj and bpy.context.mode != context_mode_snapshot:
-                 bpy.ops.object.mode_set(mode=context_mode_snapshot)
-             return # Indicate failure or handle error appropriately
-
-        # Ensure UV layer exists
-        if not obj.data.uv_layers:
-             print(f"Warning: Object '{obj.name}' has no UV layers. Exporting with default UVs (0,0).")
-             # Optionally create a default UV layer if needed, or just proceed
-             # bpy.ops.mesh.uv_texture_add() # This would need object selection context
-
-        # get mesh, apply modifiers
-        depsgraph = bpy.context.evaluated_depsgraph_get()
-        object_eval = obj.evaluated_get(depsgraph)
-        try:
-            mesh = object_eval.to_mesh()
-        except RuntimeError as e:
-            print(f"Error converting object '{obj.name}' to mesh: {e}")
-            # Switch mode back if changed
-            if active_obj and bpy.context.mode != context_mode_snapshot:
-                bpy.ops.object.mode_set(mode=context_mode_snapshot)
-            return
-        # Ensure mesh is valid
-        if not mesh:
-             print(f"Error: Could not get mesh data for '{obj.name}' after evaluation.")
-             # Switch mode back if changed
-             if active_obj and bpy.context.mode != context_mode_snapshot:
-                 bpy.ops.object.mode_set(mode=context_mode_snapshot)
-             return
-
-        mesh.calc_loop_triangles()
-
-        # Apply object transform (rotation and scale only) to the mesh vertices
-        loc, rot, scale = obj.matrix_world.decompose()
-        mat_rot = rot.to_matrix().to_4x4()
-        mat_sca = mathutils.Matrix.Diagonal(scale).to_4x4() # Simpler way to create scale matrix
-        transform_matrix = mat_rot @ mat_sca # Apply scale then rotation
-        mesh.transform(transform_matrix)
-
-        # write!
-        try:
-            with open(path + ".smd", "w") as file:
-
-                # hardcoded but yea
-                file.write("version 1\nnodes\n0 \"root\" -1\nend\nskeleton\ntime 0\n0 0 0 0 0 0 0\nend\ntriangles\n")
-
-                sb = StringIO() # string builder
-                has_materials = len(obj.material_slots) > 0 and any(slot.material for slot in obj.material_slots)
-                has_uvs = len(mesh.uv_layers) > 0
-
-                # okay so now, i sacrifice everything that goes into making good code
-                # just to squeeze out some performance of out this
-                # because we REALLY do need the extra boost
-                # no need to check for every triangle whether or not its a collision smd or presence of materials
-                # so we check here and call the appropriate variant of the function
-                if is_collision_smd:
-                    self.exportMeshToSmd_Collision(sb, mesh, has_uvs) # Pass has_uvs flag
-                else:
-                    if has_materials:
-                        self.exportMeshToSmd_WithMaterials(sb, obj, mesh, has_uvs) # Pass has_uvs flag
-                    else:
-                        self.exportMeshToSmd_NoMaterials(sb, mesh, has_uvs) # Pass has_uvs flag
-
-                file.write(sb.getvalue())
-                file.write("end\n")
-        except IOError as e:
-             print(f"Error writing SMD file {path}.smd: {e}")
-        finally:
-            # Clean up temporary mesh data
-            if 'mesh' in locals() and mesh:
-                object_eval.to_mesh_clear()
-
-            # switch mode back
-            if active_obj and bpy.context.mode != context_mode_snapshot:
-                bpy.ops.object.mode_set(mode=context_mode_snapshot)
-        
-        
-    def exportMeshToSmd_Collision(self, sb, mesh, has_uvs):
-        active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
-        default_uv = mathutils.Vector((0.0, 0.0))
-
-        for tri in mesh.loop_triangles:
-            material_name = "Phy" # Collision meshes use a default material name
-
-            # tri vertices
-            vert_a = mesh.vertices[tri.vertices[0]]
-            vert_b = mesh.vertices[tri.vertices[1]]
-            vert_c = mesh.vertices[tri.vertices[2]]
-
-            # tri positions
-            pos_a = vert_a.co
-            pos_b = vert_b.co
-            pos_c = vert_c.co
-
-            # tri normals (use vertex normals for collision)
-            normal_a = vert_a.normal
-            normal_b = vert_b.normal
-            normal_c = vert_c.normal
-
-            # tri uv coords (use default if no UVs)
-            uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
-            uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
-            uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
-
-            # Use .format() for compatibility
-            sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
-                material_name,
-                pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
-                pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
-                pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
-            ))
-
-
-    def exportMeshToSmd_WithMaterials(self, sb, obj, mesh, has_uvs):
-        active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
-        default_uv = mathutils.Vector((0.0, 0.0))
-
-        for tri in mesh.loop_triangles:
-            material_name = "DefaultMaterial" # Default if slot is empty or index is wrong
-            if tri.material_index < len(obj.material_slots) and obj.material_slots[tri.material_index].material:
-                 material_name = obj.material_slots[tri.material_index].material.name
-            # Sanitize material name (replace spaces, etc.) if needed for SMD compatibility
-            # material_name = material_name.replace(" ", "_")
-
-            # tri vertices
-            vert_a = mesh.vertices[tri.vertices[0]]
-            vert_b = mesh.vertices[tri.vertices[1]]
-            vert_c = mesh.vertices[tri.vertices[2]]
-
-            # tri positions
-            pos_a = vert_a.co
-            pos_b = vert_b.co
-            pos_c = vert_c.co
-
-            # tri normals
-            normal_a = vert_a.normal
-            normal_b = vert_b.normal
-            normal_c = vert_c.normal
-
-            # Use face normal if flat shaded
-            if not tri.use_smooth:
-                normal = tri.normal # Use pre-calculated loop triangle normal
-                normal_a = normal
-                normal_b = normal
-                normal_c = normal
-
-            # tri uv coords
-            uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
-            uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
-            uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
-
-            # Use .format() for compatibility
-            sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
-                material_name,
-                pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
-                pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
-                pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
-            ))
-
-
-    def exportMeshToSmd_NoMaterials(self, sb, mesh, has_uvs):
-        active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
-        default_uv = mathutils.Vector((0.0, 0.0))
-
-        for tri in mesh.loop_triangles:
-            material_name = "DefaultMaterial" # Assign a default material name
-
-            # tri vertices
-            vert_a = mesh.vertices[tri.vertices[0]]
-            vert_b = mesh.vertices[tri.vertices[1]]
-            vert_c = mesh.vertices[tri.vertices[2]]
-
-            # tri positions
-            pos_a = vert_a.co
-            pos_b = vert_b.co
-            pos_c = vert_c.co
-
-            # tri normals
-            normal_a = vert_a.normal
-            normal_b = vert_b.normal
-            normal_c = vert_c.normal
-
-            # Use face normal if flat shaded
-            if not tri.use_smooth:
-                normal = tri.normal # Use pre-calculated loop triangle normal
-                normal_a = normal
-                normal_b = normal
-                normal_c = normal
-
-            # tri uv coords
-            uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
-            uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
-            uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
-
-            # Use .format() for compatibility
-            sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
-                material_name,
-                pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
-                pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
-                pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
-            ))
-
-
-
-class AutoMDLPanel(bpy.types.Panel):
-    bl_label = "AutoMDL2"
-    bl_idname = "PT_AutoMDLPanel"
-    bl_space_type = 'VIEW_3D'
-    bl_region_type = 'UI'
-    bl_category = 'AutoMDL2'
-    
-    def draw(self, context):
-        layout = self.layout
-        scn = context.scene
-        
-        # Get the selected collection
-        selected_collection = scn.model_collection
-        collection_valid = selected_collection is not None
-        
-        row = layout.row()
-        global steam_path
-        if steam_path is not None:
-            row.label(text= "Choose compiler:")
-            row = layout.row()
-            row.prop(scn, "game_select", text="")
-        else:
-            row.label(text= "Directory containing studiomdl.exe:")
-            row = layout.row()
-            row.alert = gameManualTextInputIsInvalid
-            row.prop(scn, "studiomdl_manual_input")
-            
-        row = layout.row()
-        
-        # Operator button - Enabled only if a collection is selected
-        row = layout.row()
-        row.enabled = collection_valid
-        row.operator("wm.automdl", text="Compile Collection") # Changed text for clarity
-        row = layout.row()
-        
-        # Collection Selector
-        row = layout.row()
-        row.label(text= "Model Collection:")
-        row.prop(scn, "model_collection", text="")
-        
-        row = layout.row()
-        
-        # Options dependent on having a valid collection selected
-        # We keep Surfaceprop and Mass global for now as per the plan
-        # These could eventually become per-object settings or derived
-        box = layout.box()
-        box.enabled = collection_valid # Enable/disable the whole box
-        
-        row = box.row()
-        row.label(text= "Global Compile Options:")
-        
-        row = box.row()
-        row.label(text= "Surface type:")
-        row.prop(scn, "surfaceprop", text="")
-                
-        row = box.row()
-        if not scn.staticprop:
-            row.label(text= "Mass (per object):") # Clarify this is per-object mass
-            row.alert = massTextInputIsInvalid
-            row.prop(scn, "mass_text_input")
-        else:
-            row.label(text= "No mass (Static Prop)")
-
-        # Removed concave UI - this will be determined automatically per collision mesh
-        
-        # $cdmaterials UI (remains global for now)
-        row = box.row()
-        row.label(text= "Path to VMT files will be:")
-        row = box.row()
-        row.prop(scn, 'cdmaterials_type', expand=True)
-        row = box.row()
-                
-        if scn.cdmaterials_type == '0':
-            row.label(text="Set automatically based on model path", icon='INFO')
-            # Removed complex material path preview - less relevant for collections
-        else:
-            draw_ui_list(
-                box, # Use the box layout
-                context,
-                list_path="scene.cdmaterials_list",
-                active_index_path="scene.cdmaterials_list_active_index",
-                unique_id="cdmaterials_list_id",
-            )
-                
-        row = box.row()
-        row.label(text="General options:")
-        row = box.row()
-        row.prop(scn, "mostlyopaque", text="Has Transparent Materials")
-        
-        row = box.row()
-        row.prop(scn, "staticprop", text="Static Prop")
-
-        # Scale UI
-        row = box.row()
-        row.prop(scn, "qc_scale_factor")
-
-
-# for cdmaterials list
-
-class CdMaterialsPropGroup(bpy.types.PropertyGroup):
-    name: bpy.props.StringProperty()
-
-class AddonPrefs(bpy.types.AddonPreferences):
-    bl_idname = __package__
-    
-    do_make_folders_for_cdmaterials: bpy.props.BoolProperty(
-        name="Make Folders",
-        description="On compile, make the appropriate folders in the materials folder (make folders for each $cdmaterials)",
-        default=True
-    )
-    
-    do_make_vmts: bpy.props.BoolProperty(
-        name="Make placeholder VMTs",
-        description="On compile, make placeholder VMT files named after the model's materials, placed inside appropriate folder inside the materials folder\nThis won't replace existing VMTs",
-        default=True
-    )
-    
-    def draw(self, context):
-        layout = self.layout
-        row = layout.row()
-        row.prop(self, "do_make_folders_for_cdmaterials", text="Automatically make folders for materials locations")
-        row = layout.row()
-        row.enabled = self.do_make_folders_for_cdmaterials
-        row.prop(self, "do_make_vmts", text="Also make placeholder VMTs (Only when compiling with the \"Same as MDL\" option)")
-
-classes = [
-    AutoMDLOperator,
-    AutoMDLPanel,
-    CdMaterialsPropGroup,
-    AddonPrefs
-]
-
-class_register, class_unregister = bpy.utils.register_classes_factory(classes)
-
-def register():
-    from bpy.utils import register_class
-    for cls in classes:
-        register_class(cls)
-    
-    # surfaceprop dropdown
-    bpy.types.Scene.surfaceprop_text_input = bpy.props.StringProperty(name="", default="")
-    
-    # mass text input
-    bpy.types.Scene.mass_text_input = bpy.props.StringProperty(name="", default="35", description="Mass in kilograms (KG)\nBy default, the Player can +USE pick up 35KG max.\nThe gravgun can pick up 250KG max.\nThe portal gun can pick up 85KG max", update=onMassTextInputChanged)
-    
-    # Model Collection Selector
-    bpy.types.Scene.model_collection = bpy.props.PointerProperty(
-        type=bpy.types.Collection,
-        name="Model Collection",
-        description="Select the collection containing models to compile"
-    )
-    
-    # surfaceprop
-    bpy.types.Scene.surfaceprop = bpy.props.EnumProperty(
-        name="Selected Option",
-        items = [
-            ("Concrete", "Concrete", ""),
-            ("Chainlink", "Chainlink", ""),
-            ("Canister", "Canister", ""),
-            ("Crowbar", "Crowbar", ""),
-            ("Metal", "Metal", ""),
-            ("Metalvent", "Metalvent", ""),
-            ("Popcan", "Popcan", ""),
-            ("Wood", "Wood", ""),
-            ("Plaster", "Plaster", ""),
-            ("Dirt", "Dirt", ""),
-            ("Grass", "Grass", ""),
-            ("Sand", "Sand", ""),
-            ("Snow", "Snow", ""),
-            ("Ice", "Ice", ""),
-            ("Flesh", "Flesh", ""),
-            ("Glass", "Glass", ""),
-            ("Tile", "Tile", ""),
-            ("Paper", "Paper", ""),
-            ("Cardboard", "Cardboard", ""),
-            ("Plastic_Box", "Plastic_Box", ""),
-            ("Plastic_barrel", "Plastic_barrel", ""),
-            ("Plastic", "Plastic", ""),
-            ("Rubber", "Rubber", ""),
-            ("Clay", "Clay", ""),
-            ("Porcelain", "Porcelain", ""),
-            ("Computer", "Computer", "")
-        ]
-    )
-    
-    # static prop
-    bpy.types.Scene.staticprop = bpy.props.BoolProperty(
-        name="Static Prop",
-        description="Enable if used as prop_static\n($staticprop in QC)",
-        default=False
-    )
-    
-    # has transparency
-    bpy.types.Scene.mostlyopaque = bpy.props.BoolProperty(
-        name="Has Transparency",
-        description="Enabling this may fix sorting issues that come with using transparent materials. \nRenders model in 2 passes, one for opaque materials, and one for materials with transparency\n($mostlyopaque in QC)",
-        default=False
-    )
-    
-    # *** RENAME and UPDATE SCALE PROPERTY ***
-    bpy.types.Scene.qc_scale_factor = bpy.props.FloatProperty(
-        name="QC Scale Factor",
-        description="Model scale factor ($scale value in QC, 1.0 = normal size)",
-        default=100.0,
-        min=0.0, # Scale can be zero or positive
-        precision=6 # Allow fine control over scale
-    )
-    
-    # radio buttons for choosing how to define cdmaterials
-    bpy.types.Scene.cdmaterials_type = bpy.props.EnumProperty(items =
-        (
-            ('0','Same as MDL',''),
-            ('1','Other','')
-        )
-    )
-    
-    # cdmaterials list
-    bpy.types.Scene.cdmaterials_list = bpy.props.CollectionProperty(type=CdMaterialsPropGroup)
-    bpy.types.Scene.cdmaterials_list_active_index = bpy.props.IntProperty()
-    
-    # steam path
-    global steam_path
-    global games_paths_list
-    global game_select_method_is_dropdown
-    steam_path = getSteamInstallationPath()
-    if(steam_path != None):
-        game_select_method_is_dropdown = True
-        steam_path = os.path.join(steam_path, "").replace("\\", "/")
-        games_paths_list = getGamesList()
-        defineGameSelectDropdown(None, bpy.context)
-    else:
-        game_select_method_is_dropdown = False
-        steam_path = None
-        bpy.types.Scene.studiomdl_manual_input = bpy.props.StringProperty(name="", default="", description="Path to the studiomdl.exe file", update=onGameManualTextInputChanged)
-        
-    
-    # call something after 1 second
-    bpy.app.timers.register(set_default_values, first_interval=1) # workaround for not being able to use context in register()
-
-def set_default_values():
-    # set default of cdmaterials list
-    bpy.context.scene.cdmaterials_list.clear()
-    bpy.ops.uilist.entry_add(list_path="scene.cdmaterials_list", active_index_path="scene.cdmaterials_list_active_index")
-    bpy.context.scene.cdmaterials_list[0].name = "models/"
-    
-    # we need to update the dropdown once to let the default value affect the rest of the program, as if we selected it manually
-    # before that let's select a default value for it
-    global game_select_method_is_dropdown
-    if game_select_method_is_dropdown:
-        
-        # if certain games exist, select one of them instead of defaulting to selecting the game in the first option
-        chosen_game_path = None
-        recognized_game_path_gmod = None
-        recognized_game_path_hl2 = None
-        recognized_game_path_sdk = None
-        
-        global games_paths_list
-        for i in range(len(games_paths_list)):
-            game_path = str(games_paths_list[i])
-            game_path_lowercase = game_path.lower()
-            
-            # we're not checking for specific strings because from what i saw the names of the games aren't consistent across users
-            # like idk, i remember seeing "Half Life 2" as "Half-Life 2" and "Half Life: 2" which is weird but idk
-            # i may be wrong but, we do this for now and im actually happy with it
-            # 
-            # checking smaller strings first for optimization (but not if its gonna be a very common string)
-            
-            if "mod" in game_path_lowercase:
-                if "s" in game_path_lowercase:
-                    if "garry" in game_path_lowercase:
-                        # we are gonna assume its "GarrysMod" or something like that
-                        recognized_game_path_gmod = game_path
-                        continue
-            
-            if "2" in game_path_lowercase:
-                if "half" in game_path_lowercase:
-                    if "life" in game_path_lowercase:
-                        # we are gonna assume its "Half-Life 2" or something like that (episodes, lost coast etc)
-                        recognized_game_path_hl2 = game_path
-                        continue
-            
-            if "sdk" in game_path_lowercase:
-                if "2013" in game_path_lowercase:
-                    # we are gonna assume its "Source SDK Base 2013 Singleplayer" or something like that
-                    recognized_game_path_sdk = game_path
-                    continue
-        
-        # lets now define some sort of order so that we prefer some recognized games over others
-        # sdk > hl2 > gmod
-        if recognized_game_path_sdk is not None:
-            chosen_game_path = recognized_game_path_sdk
-        elif recognized_game_path_hl2 is not None:
-            chosen_game_path = recognized_game_path_hl2
-        elif recognized_game_path_gmod is not None:
-            chosen_game_path = recognized_game_path_gmod   
-        
-        # set value
-        if chosen_game_path != None:
-            bpy.context.scene.game_select = chosen_game_path
-        
-        # update once to set up things ( i removed functionality there so not needed anymore )
-        onGameDropdownChanged(None, bpy.context)
-    else:
-        # update once to set up things
-        onGameManualTextInputChanged(None, bpy.context)
-
-
-def unregister():
-    from bpy.utils import unregister_class
-    for cls in reversed(classes):
-        unregister_class(cls)
-    
-    del bpy.types.Scene.surfaceprop_text_input
-    del bpy.types.Scene.model_collection
-    del bpy.types.Scene.surfaceprop
-    del bpy.types.Scene.staticprop
-    del bpy.types.Scene.mass_text_input
-    del bpy.types.Scene.qc_scale_factor # Update cleanup for scale property
-    
-    if game_select_method_is_dropdown:
-        del bpy.types.Scene.game_select
-    else:
-        del bpy.types.Scene.studiomdl_manual_input
-    
-    del bpy.types.Scene.cdmaterials_type
-    
-    del bpy.types.Scene.cdmaterials_list
-    del bpy.types.Scene.cdmaterials_list_active_index
-
-
-def checkVisMeshHasMesh(context):
-    vis_mesh_obj = context.scene.vis_mesh
-    return (vis_mesh_obj and vis_mesh_obj.type == 'MESH' and vis_mesh_obj.name in bpy.data.objects) == True
-
-
-def checkPhyMeshHasMesh(context):
-    phy_mesh_obj = context.scene.phy_mesh
-    return (phy_mesh_obj and phy_mesh_obj.type == 'MESH' and phy_mesh_obj.name in bpy.data.objects) == True
-
-
-def to_models_relative_path(file_path):
-    MODELS_FOLDER_NAME = "models"
-
-    
-    # See if we can find a models folder up the chain
-    index = file_path.rfind(MODELS_FOLDER_NAME)
-
-    if index != -1:
-        root = file_path[:index + len(MODELS_FOLDER_NAME)]
-    else:
-        return None
-
-    return os.path.splitext(os.path.relpath(file_path, root))[0].replace("\\", "/")
-
-def get_models_path(file_path):
-    MODELS_FOLDER_NAME = "models"
-
-    
-    # See if we can find a models folder up the chain
-    index = file_path.rfind(MODELS_FOLDER_NAME)
-
-    if index != -1:
-        root = file_path[:index + len(MODELS_FOLDER_NAME)]
-        return root
-    
-    return None
-
-
-
-
-# lemon's answer in https://blender.stackexchange.com/questions/75332/how-to-find-the-number-of-loose-parts-with-blenders-python-api
-
-# i would implement it myself but i haven't done much graph stuff, and speed is really needed right now, and first implementation would be slow. This here is an efficient alogrithm to count the number of loose parts inside a mesh
-
-from collections import defaultdict
-
-def MakeVertPaths( verts, edges ):
-    #Initialize the path with all vertices indexes
-    result = {v.index: set() for v in verts}
-    #Add the possible paths via edges
-    for e in edges:
-        result[e.vertices[0]].add(e.vertices[1])
-        result[e.vertices[1]].add(e.vertices[0])
-    return result
-
-def FollowEdges( startingIndex, paths ):
-    current = [startingIndex]
-
-    follow = True
-    while follow:
-        #Get indexes that are still in the paths
-        eligible = set( [ind for ind in current if ind in paths] )
-        if len( eligible ) == 0:
-            follow = False #Stops if no more
-        else:
-            #Get the corresponding links
-            next = [paths[i] for i in eligible]
-            #Remove the previous from the paths
-            for key in eligible: paths.pop( key )
-            #Get the new links as new inputs
-            current = set( [ind for sub in next for ind in sub] )
-
-def CountIslands( obj ):
-    #Prepare the paths/links from each vertex to others
-    paths = MakeVertPaths( obj.data.vertices, obj.data.edges )
-    found = True
-    n = 0
-    while found:
-        try:
-            #Get one input as long there is one
-            startingIndex = next( iter( paths.keys() ) )
-            n = n + 1
-            #Deplete the paths dictionary following this starting index
-            FollowEdges( startingIndex, paths )               
-        except:
-            found = False
-    return n
-
-
-def CountIslands2(obj):
-    mesh = obj.data
-    paths={v.index:set() for v in mesh.vertices}
-    for e in mesh.edges:
-        paths[e.vertices[0]].add(e.vertices[1])
-        paths[e.vertices[1]].add(e.vertices[0])
-    lparts=[]
-    while True:
-        try:
-            i=next(iter(paths.keys()))
-        except StopIteration:
-            break
-        lpart={i}
-        cur={i}
-        while True:
-            eligible={sc for sc in cur if sc in paths}
-            if not eligible:
-                break
-            cur={ve for sc in eligible for ve in paths[sc]}
-            lpart.update(cur)
-            for key in eligible: paths.pop(key)
-        lparts.append(lpart)
-    
-    return len(lparts)
-
-
-def is_float(value):
-  if value is None:
-      return False
-  try:
-      float(value)
-      return True
-  except:
-      return False
-
-
-if __name__ == "__main__":
-    register()
+bl_info = {
+    "name": "AutoMDL-Enhanced",
+    "author": "Vengefulcrop, NvC_DmN_CH",
+    "version": (1, 0),
+    "blender": (4, 0, 0),
+    "location": "View3D > Sidebar > AutoMDL2",
+    "description": "Compiles models for Source where the blend project file is, with some improvements.",
+    "warning": "",
+    "wiki_url": "https://github.com/vengefulcrop/AutoMDL-Enhanced/", 
+    "category": "3D View"
+}
+
+import time
+addon_import_start = time.perf_counter()
+
+# Only what registering needs is imported here, Blender imports every enabled add-on at startup.
+# Exporting, validating and compiling live in their own modules (build.py, smd_export.py, ...),
+# imported the first time they're used.
+import bpy
+import os
+import threading
+import zlib
+from pathlib import Path
+from bl_ui.generic_ui_list import draw_ui_list
+from .game_discovery import GameIndex, find_steam_path
+from . import dirty
+
+game_select_method_is_dropdown = None
+games_paths_list = []
+game_path = None
+steam_path = None
+studiomdl_path = None
+gameManualTextGameinfoPath = None
+gameManualTextInputIsInvalid = False
+massTextInputIsInvalid = False
+visMeshInputIsInvalid = False
+game_index = None # Cached list of installed games, see game_discovery.py
+game_index_thread = None # Background refresh of game_index, None when not running
+game_select_items = [] # Must outlive the dropdown's items callback, Blender doesn't copy the strings
+last_validation = None # Most recent validation, shown in the AutoMDL panel: (collection name, results)
+current_build = None # Most recent collection compile, its per-object status is shown in the AutoMDL panel
+save_build = None # Most recent compile started by Compile on Save, a newer save cancels it
+compile_on_save_pending = False # Saved, the compile starts once the saves settle
+last_save_time = 0.0 # time.monotonic() of the last save that queued a compile
+last_save_clock = "" # Wall clock of that save, shown in the AutoMDL panel
+addon_import_seconds = 0.0 # Measured, shown in the add-on preferences
+addon_register_seconds = 0.0
+
+def defineGameSelectDropdown(self, context):
+    # game_select, the items are read from game_select_items so they can change after a rescan
+    bpy.types.Scene.game_select = bpy.props.EnumProperty(
+        name = "Selected Option",
+        items = getGameSelectItems,
+        update = onGameDropdownChanged
+    )
+
+def getGameSelectItems(self, context):
+    return game_select_items
+
+def updateGameSelectItems():
+    global game_select_items
+    # Items are numbered by a hash of their path, so the saved selection survives games being added or removed
+    game_select_items = [(str(path), os.path.basename(os.path.dirname(path)), str(path), zlib.crc32(str(path).encode()) & 0x7fffffff)
+                         for path in games_paths_list]
+
+def onGameDropdownChanged(self, context):
+    pass
+
+def onMassTextInputChanged(self, context):
+    global massTextInputIsInvalid
+    massTextInputIsInvalid = not is_float(context.scene.mass_text_input)
+
+def onGameManualTextInputChanged(self, context):
+    global gameManualTextInputIsInvalid
+    global gameManualTextGameinfoPath
+    gameManualTextInputIsInvalid = False
+    
+    in_folder = str(Path(os.path.join(context.scene.studiomdl_manual_input, ''))) # make sure to have a trailing slash, and its a string
+    subdir_studiomdl = os.path.join(in_folder, "studiomdl.exe")
+    has_studiomdl = os.path.exists( subdir_studiomdl )
+    if not has_studiomdl:
+        gameManualTextInputIsInvalid = True
+        print("ERROR: Couldn't find studiomdl.exe in specified folder")
+        return
+    
+    # The game folder is only scanned for gameinfo.txt if it changed since it was indexed
+    base_path = os.path.dirname(in_folder)
+    gameinfo_path = game_index.get_game(base_path)["gameinfo_dir"]
+    saveGameIndex()
+    
+    if gameinfo_path == None:
+        gameManualTextInputIsInvalid = True
+        print("ERROR: Couldn't find gameinfo.txt in game")
+        return
+    
+    gameManualTextGameinfoPath = gameinfo_path
+
+
+def setGamePath(self, context, new_game_path_value):
+    global game_path
+    global studiomdl_path
+    game_path = new_game_path_value
+    studiomdl_path = os.path.join(os.path.dirname(game_path), "bin", "studiomdl.exe")
+
+def getGameIndexPath():
+    return os.path.join(bpy.utils.user_resource('CONFIG', path="automdl"), "game_index.json")
+
+def saveGameIndex():
+    try:
+        game_index.save()
+    except OSError as e:
+        print(f"AutoMDL: Could not save the game index '{game_index.cache_path}': {e}")
+
+def startGameIndexRefresh(force=False):
+    """Refreshes the game index on a background thread. Returns False if a refresh is already running."""
+    global game_index_thread
+    if game_index_thread is not None:
+        return False
+
+    def refresh():
+        try:
+            game_index.refresh(steam_path, force)
+        except Exception as e:
+            print(f"AutoMDL: Could not scan the Steam libraries: {e}")
+        saveGameIndex()
+
+    game_index_thread = threading.Thread(target=refresh, name="AutoMDL game scan", daemon=True)
+    game_index_thread.start()
+    bpy.app.timers.register(pollGameIndexRefresh, first_interval=0.5)
+    return True
+
+def pollGameIndexRefresh():
+    # Timer on the main thread, bpy can't be touched from the scan thread
+    global game_index_thread
+    global games_paths_list
+    if game_index_thread is None:
+        return None
+    if game_index_thread.is_alive():
+        return 0.5
+    game_index_thread = None
+
+    games_paths_list = game_index.get_gameinfo_dirs()
+    updateGameSelectItems()
+    for scene in bpy.data.scenes:
+        if scene.game_select not in games_paths_list:
+            selectDefaultGame(scene)
+    redraw_automdl_panels(bpy.context)
+    return None
+
+def initGameDiscovery():
+    # Timer run right after register(), so enabling the add-on doesn't wait on the registry or the cached index
+    global games_paths_list
+    global game_index
+    global steam_path
+    global game_select_method_is_dropdown
+    steam_path = find_steam_path()
+    if(steam_path != None):
+        game_select_method_is_dropdown = True
+        steam_path = os.path.join(steam_path, "").replace("\\", "/")
+        defineGameSelectDropdown(None, bpy.context) # Empty until the game index is read below
+    else:
+        game_select_method_is_dropdown = False
+        steam_path = None
+        bpy.types.Scene.studiomdl_manual_input = bpy.props.StringProperty(name="", default="", description="Path to the studiomdl.exe file", update=onGameManualTextInputChanged)
+    redraw_automdl_panels(bpy.context)
+
+    game_index = GameIndex(getGameIndexPath())
+    game_index.load() # Only reads the cached JSON, the disk is scanned in the background
+    if game_select_method_is_dropdown:
+        games_paths_list = game_index.get_gameinfo_dirs()
+        updateGameSelectItems()
+        for scene in bpy.data.scenes:
+            if scene.game_select not in games_paths_list:
+                selectDefaultGame(scene)
+        startGameIndexRefresh()
+    return None
+
+
+def refreshGameSelectDropdown(self, context):
+    startGameIndexRefresh(force=True)
+
+def get_panel_build_settings(context, report, force_rebuild: bool = False, changed_only: bool = False):
+    """Builds the compile settings from the AutoMDL panel. Reports the problem and returns None if they're incomplete."""
+    scn = context.scene
+
+    # --- Initial Setup & Validation ---
+    if game_select_method_is_dropdown:
+        if not scn.game_select:
+            report({'ERROR'}, "Please select a game/compiler.")
+            return None
+        setGamePath(None, context, scn.game_select)
+    else:
+        if not gameManualTextGameinfoPath:
+             report({'ERROR'}, "Manual game path is invalid or not set.")
+             return None
+        setGamePath(None, context, gameManualTextGameinfoPath)
+
+    if not bpy.data.filepath:
+        report({'ERROR'}, "Please save the project file first.")
+        return None
+
+    if not scn.model_collection:
+        report({'ERROR'}, "Please select a Model Collection in the AutoMDL panel.")
+        return None
+
+    from .build import get_build_settings, get_addon_prefs
+    settings = get_build_settings(scn, get_addon_prefs(context), bpy.data.filepath, scn.model_collection.name, game_path, studiomdl_path)
+    settings.force_rebuild = force_rebuild
+    if changed_only:
+        settings.changed_objects = sorted(dirty.get_dirty_objects())
+    return settings
+
+def updateLastValidation(build):
+    # The panel shows the validation of the last compile, like the Validate Collection button's
+    global last_validation
+    if build.validation_results is not None:
+        last_validation = (build.selected_collection.name, build.validation_results)
+
+def clearCompiledChanges(build, dirty_generation):
+    # Models that are current again aren't changed anymore, unless they were edited during the compile
+    dirty.clear_dirty(build.get_compiled_object_names(), dirty_generation)
+
+# --- Compile on Save ---
+
+COMPILE_ON_SAVE_DELAY = 1.5 # Seconds without another save before the compile starts
+
+@bpy.app.handlers.persistent
+def onSavePostCompile(*args):
+    # Only queues the compile, saving never waits for it
+    global compile_on_save_pending, last_save_time, last_save_clock
+    scn = bpy.context.scene
+    if bpy.app.background or scn is None or not scn.compile_on_save or not scn.model_collection:
+        return
+    compile_on_save_pending = True
+    last_save_time = time.monotonic()
+    last_save_clock = time.strftime("%H:%M:%S")
+    if save_build is not None and not save_build.is_finished:
+        save_build.request_cancel() # Outdated by this save, the compile queued for it covers the same models
+    if not bpy.app.timers.is_registered(runCompileOnSave):
+        bpy.app.timers.register(runCompileOnSave, first_interval=COMPILE_ON_SAVE_DELAY)
+    redraw_automdl_panels(bpy.context)
+
+def runCompileOnSave():
+    # Timer queued by a save, starts a non-blocking Compile Changed once no save came for COMPILE_ON_SAVE_DELAY
+    global compile_on_save_pending, save_build
+    if not compile_on_save_pending:
+        return None
+    wait_seconds = COMPILE_ON_SAVE_DELAY - (time.monotonic() - last_save_time)
+    if wait_seconds > 0:
+        return wait_seconds # Saved again meanwhile, both saves get one compile
+    if current_build is not None and not current_build.is_finished:
+        return 0.5 # Wait for the cancelled compile (or one started from the panel) to stop
+    window = next(iter(bpy.context.window_manager.windows), None)
+    if window is None:
+        return 0.5
+    compile_on_save_pending = False
+    with bpy.context.temp_override(window=window):
+        bpy.ops.wm.automdl('INVOKE_DEFAULT', changed_only=True)
+    if current_build is not None and not current_build.is_finished:
+        save_build = current_build
+    redraw_automdl_panels(bpy.context)
+    return None
+
+def get_compile_on_save_status():
+    """Returns the panel text and icon of Compile on Save: waiting, compiling or how its last compile went."""
+    if compile_on_save_pending:
+        return f"Saved at {last_save_clock}, compile queued", 'TIME'
+    if save_build is None:
+        return "Compiles the changed models after every save", 'INFO'
+    if not save_build.is_finished:
+        return f"Compiling the changes saved at {last_save_clock}", 'TIME'
+    if save_build.was_cancelled:
+        return f"Compile of the save at {last_save_clock} cancelled", 'CANCEL'
+    errors_text = f", {len(save_build.errors)} error(s)" if save_build.errors else ""
+    return (f"Save at {last_save_clock}: {save_build.compiled_count} compiled, {save_build.skipped_count} up to date{errors_text}",
+            'ERROR' if save_build.errors else 'CHECKMARK')
+
+def redraw_automdl_panels(context):
+    for window in context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+class AutoMDLOperator(bpy.types.Operator):
+    bl_idname = "wm.automdl"
+    bl_label = "Update MDL"
+    bl_description = "Compile model"
+    
+    force_rebuild: bpy.props.BoolProperty(
+        name="Force Rebuild",
+        description="Compile every model, even the ones that haven't changed since the last compile",
+        default=False
+    )
+    
+    changed_only: bpy.props.BoolProperty(
+        name="Compile Changed",
+        description="Only compile the models whose objects (or COL_ meshes) were edited since their last compile, the others are skipped without evaluating them",
+        default=False
+    )
+    
+    def execute(self, context):
+        # Blocking compile, used when the operator is run from scripts
+        global current_build
+        from .build import CollectionBuild
+        settings = get_panel_build_settings(context, self.report, self.force_rebuild, self.changed_only)
+        if settings is None:
+            return {'CANCELLED'}
+        dirty_generation = dirty.get_generation()
+        build = CollectionBuild(context, settings, self.report)
+        started = build.start()
+        updateLastValidation(build)
+        if not started:
+            return {'CANCELLED'}
+        current_build = build
+
+        while build.export_next(): # Blocks while the compile queue is full
+            build.collect_results()
+        result = build.finish()
+        clearCompiledChanges(build, dirty_generation)
+        return result
+
+    def invoke(self, context, event):
+        # Non-blocking compile, used from the UI: exports in small slices on a timer
+        global current_build
+        if current_build is not None and not current_build.is_finished:
+            self.report({'WARNING'}, "A compile is already running. Press Esc to cancel it.")
+            return {'CANCELLED'}
+
+        from .build import CollectionBuild
+        settings = get_panel_build_settings(context, self.report, self.force_rebuild, self.changed_only)
+        if settings is None:
+            return {'CANCELLED'}
+        self.dirty_generation = dirty.get_generation()
+        build = CollectionBuild(context, settings, self.report)
+        started = build.start()
+        updateLastValidation(build)
+        if not started:
+            return {'CANCELLED'}
+        current_build = build
+
+        wm = context.window_manager
+        wm.progress_begin(0, max(1, build.total_count))
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        build = current_build
+
+        if build.cancel_requested or (event.type == 'ESC' and event.value == 'PRESS'):
+            build.cancel()
+            clearCompiledChanges(build, self.dirty_generation)
+            self.end_modal(context)
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        try:
+            # Export for at most ~50ms per tick, and only while the compile queue has room
+            slice_start = time.perf_counter()
+            while build.can_export() and time.perf_counter() - slice_start < 0.05:
+                build.export_next()
+            build.collect_results()
+        except Exception:
+            build.cancel()
+            self.end_modal(context)
+            raise
+
+        context.window_manager.progress_update(build.done_count)
+        redraw_automdl_panels(context)
+
+        if build.is_done():
+            result = build.finish()
+            clearCompiledChanges(build, self.dirty_generation)
+            self.end_modal(context)
+            return result
+        return {'PASS_THROUGH'}
+
+    def end_modal(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        redraw_automdl_panels(context)
+
+
+class AutoMDLValidateOperator(bpy.types.Operator):
+    bl_idname = "wm.automdl_validate"
+    bl_label = "Validate Collection"
+    bl_description = "Check the models of the collection for problems that would make the compile fail, without compiling"
+
+    def execute(self, context):
+        global last_validation
+        from .validation import validate_collection, count_validation_issues
+        collection = context.scene.model_collection
+        if not collection:
+            self.report({'ERROR'}, "Please select a Model Collection in the AutoMDL panel.")
+            return {'CANCELLED'}
+
+        validation_start = time.perf_counter()
+        results = validate_collection(collection, context.evaluated_depsgraph_get(), generates_collision=context.scene.generate_collision)
+        last_validation = (collection.name, results)
+        for object_name, issues in results.items():
+            for issue in issues:
+                self.report({'ERROR'} if issue.is_fatal else {'WARNING'}, f"'{object_name}': {issue.message}")
+
+        fatal_count, warning_count = count_validation_issues(results)
+        summary = f"Validated '{collection.name}' in {time.perf_counter() - validation_start:.2f}s: {fatal_count} error(s), {warning_count} warning(s)."
+        self.report({'WARNING'} if fatal_count else {'INFO'}, summary)
+        redraw_automdl_panels(context)
+        return {'FINISHED'}
+
+
+class AutoMDLRescanGamesOperator(bpy.types.Operator):
+    bl_idname = "wm.automdl_rescan_games"
+    bl_label = "Rescan Games"
+    bl_description = "Look for installed games with studiomdl again, in every Steam library"
+
+    def execute(self, context):
+        if steam_path is None:
+            self.report({'ERROR'}, "Steam installation not found, enter the studiomdl folder manually.")
+            return {'CANCELLED'}
+        if not startGameIndexRefresh(force=True):
+            self.report({'INFO'}, "The Steam libraries are already being scanned.")
+            return {'CANCELLED'}
+        self.report({'INFO'}, "Scanning the Steam libraries for games...")
+        redraw_automdl_panels(context)
+        return {'FINISHED'}
+
+
+MAX_PANEL_DIAGNOSTICS = 3 # Per model, the rest is in the report
+
+class AutoMDLPanel(bpy.types.Panel):
+    bl_label = "AutoMDL2"
+    bl_idname = "PT_AutoMDLPanel"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'AutoMDL2'
+    
+    def draw(self, context):
+        layout = self.layout
+        scn = context.scene
+        
+        # Get the selected collection
+        selected_collection = scn.model_collection
+        collection_valid = selected_collection is not None
+        
+        row = layout.row()
+        global steam_path
+        if game_select_method_is_dropdown is None:
+            row.label(text="Looking for Steam...", icon='TIME')
+        elif steam_path is not None:
+            row.label(text= "Choose compiler:")
+            row = layout.row()
+            row.prop(scn, "game_select", text="")
+            row.operator("wm.automdl_rescan_games", text="", icon='FILE_REFRESH')
+            if game_index_thread is not None:
+                row = layout.row()
+                row.label(text="Scanning Steam libraries...", icon='TIME')
+        else:
+            row.label(text= "Directory containing studiomdl.exe:")
+            row = layout.row()
+            row.alert = gameManualTextInputIsInvalid
+            row.prop(scn, "studiomdl_manual_input")
+            
+        row = layout.row()
+        
+        # Operator button - Enabled only if a collection is selected
+        build_running = current_build is not None and not current_build.is_finished
+        row = layout.row()
+        row.enabled = collection_valid and not build_running
+        row.operator("wm.automdl", text="Compile Collection") # Changed text for clarity
+        changed_op = row.operator("wm.automdl", text="Compile Changed")
+        changed_op.changed_only = True
+        rebuild_op = row.operator("wm.automdl", text="Force Rebuild")
+        rebuild_op.force_rebuild = True
+        row = layout.row()
+        row.enabled = collection_valid and not build_running
+        row.operator("wm.automdl_validate", text="Validate Collection", icon='CHECKMARK')
+        row = layout.row()
+        row.enabled = collection_valid
+        row.prop(scn, "compile_on_save")
+        if scn.compile_on_save:
+            status_text, status_icon = get_compile_on_save_status()
+            row = layout.row()
+            row.alert = status_icon == 'ERROR'
+            row.label(text=status_text, icon=status_icon)
+        row = layout.row()
+        
+        # Progress and per-object status of the running (or last) compile
+        if current_build is not None and current_build.statuses:
+            self.draw_build_status(layout, current_build, build_running)
+
+        # Issues found by the last validation of this collection
+        if last_validation is not None and collection_valid and last_validation[0] == selected_collection.name:
+            self.draw_validation(layout, last_validation[1])
+        
+        # Collection Selector
+        row = layout.row()
+        row.label(text= "Model Collection:")
+        row.prop(scn, "model_collection", text="")
+        
+        row = layout.row()
+        
+        # Options dependent on having a valid collection selected
+        # We keep Surfaceprop and Mass global for now as per the plan
+        # These could eventually become per-object settings or derived
+        box = layout.box()
+        box.enabled = collection_valid # Enable/disable the whole box
+        
+        row = box.row()
+        row.label(text= "Global Compile Options:")
+        
+        row = box.row()
+        row.label(text= "Surface type:")
+        row.prop(scn, "surfaceprop", text="")
+                
+        row = box.row()
+        if not scn.staticprop:
+            row.label(text= "Mass (per object):") # Clarify this is per-object mass
+            row.alert = massTextInputIsInvalid
+            row.prop(scn, "mass_text_input")
+        else:
+            row.label(text= "No mass (Static Prop)")
+
+        # Removed concave UI - this will be determined automatically per collision mesh
+        
+        # $cdmaterials UI (remains global for now)
+        row = box.row()
+        row.label(text= "Path to VMT files will be:")
+        row = box.row()
+        row.prop(scn, 'cdmaterials_type', expand=True)
+        row = box.row()
+                
+        if scn.cdmaterials_type == '0':
+            row.label(text="Set automatically based on model path", icon='INFO')
+            # Removed complex material path preview - less relevant for collections
+        else:
+            draw_ui_list(
+                box, # Use the box layout
+                context,
+                list_path="scene.cdmaterials_list",
+                active_index_path="scene.cdmaterials_list_active_index",
+                unique_id="cdmaterials_list_id",
+            )
+                
+        row = box.row()
+        row.label(text="General options:")
+        row = box.row()
+        row.prop(scn, "mostlyopaque", text="Has Transparent Materials")
+        
+        row = box.row()
+        row.prop(scn, "staticprop", text="Static Prop")
+
+        # Scale UI
+        row = box.row()
+        row.prop(scn, "qc_scale_factor")
+        
+        row = box.row()
+        row.prop(scn, "mesh_format", expand=True)
+
+        row = box.row()
+        row.prop(scn, "compile_duplicates_as_aliases")
+
+        # $lod UI
+        row = box.row()
+        row.prop(scn, "generate_lods")
+        if scn.generate_lods:
+            draw_ui_list(
+                box,
+                context,
+                class_name="AUTOMDL_UL_lods",
+                list_path="scene.lod_list",
+                active_index_path="scene.lod_list_active_index",
+                unique_id="lod_list_id",
+            )
+
+        # Collision hulls UI
+        row = box.row()
+        row.prop(scn, "generate_collision")
+        row.prop(scn, "simplify_collision")
+        if scn.generate_collision or scn.simplify_collision:
+            row = box.row()
+            row.prop(scn, "collision_hull_vertices")
+            row.prop(scn, "collision_max_pieces")
+
+    def draw_build_status(self, layout, build, build_running):
+        box = layout.box()
+        row = box.row()
+        if build_running:
+            eta = build.get_eta_seconds()
+            eta_text = f", about {format_duration(eta)} left" if eta is not None else ""
+            row.label(text=f"Compiling {build.done_count}/{build.total_count}{eta_text}", icon='TIME')
+            row = box.row()
+            row.label(text="Press Esc to cancel")
+        elif build.was_cancelled:
+            row.label(text=f"Cancelled, {build.compiled_count}/{build.total_count} compiled", icon='CANCEL')
+        else:
+            row.label(text=f"Last compile: {build.compiled_count} compiled, {build.skipped_count} up to date, {len(build.errors)} error(s)", icon='INFO')
+
+        status_icons = {"Done": 'CHECKMARK', "Up to date": 'CHECKMARK', "Alias": 'LINKED', "Failed": 'ERROR', "Invalid": 'ERROR', "Cancelled": 'CANCEL'}
+        col = box.column(align=True)
+        for object_name, status in build.statuses.items():
+            row = col.row()
+            row.alert = status in ("Failed", "Invalid")
+            row.label(text=object_name, icon=status_icons.get(status, 'DOT'))
+            row.label(text=status)
+            # What studiomdl said about it, errors first
+            model_report = build.model_reports.get(object_name)
+            diagnostics = sorted(model_report.diagnostics, key=lambda diagnostic: diagnostic.severity != "error") if model_report else []
+            for diagnostic in diagnostics[:MAX_PANEL_DIAGNOSTICS]:
+                row = col.row()
+                row.alert = diagnostic.severity == "error"
+                row.label(text=f"    {diagnostic.format()}", icon='ERROR' if diagnostic.severity == "error" else 'INFO')
+            if len(diagnostics) > MAX_PANEL_DIAGNOSTICS:
+                col.label(text=f"    ...and {len(diagnostics) - MAX_PANEL_DIAGNOSTICS} more in the Info editor")
+
+    def draw_validation(self, layout, results):
+        from .validation import count_validation_issues
+        box = layout.box()
+        fatal_count, warning_count = count_validation_issues(results)
+        row = box.row()
+        if not results:
+            row.label(text="Validation: no issues found", icon='CHECKMARK')
+            return
+        row.label(text=f"Validation: {fatal_count} error(s), {warning_count} warning(s)", icon='ERROR' if fatal_count else 'INFO')
+        col = box.column(align=True)
+        for object_name, issues in results.items():
+            for issue in issues:
+                row = col.row()
+                row.alert = issue.is_fatal
+                row.label(text=f"{object_name}: {issue.message}", icon='ERROR' if issue.is_fatal else 'INFO')
+
+
+# for cdmaterials list
+
+class CdMaterialsPropGroup(bpy.types.PropertyGroup):
+    name: bpy.props.StringProperty()
+
+# for LOD list
+
+class LodPropGroup(bpy.types.PropertyGroup):
+    ratio: bpy.props.FloatProperty(
+        name="Triangles",
+        description="Share of the model's triangles this LOD keeps",
+        default=50.0,
+        min=1.0,
+        max=99.0,
+        subtype='PERCENTAGE'
+    )
+    distance: bpy.props.FloatProperty(
+        name="Distance",
+        description="Distance the model switches to this LOD at ($lod in QC)",
+        default=30.0,
+        min=1.0
+    )
+
+class AUTOMDL_UL_lods(bpy.types.UIList):
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.label(text=f"LOD {index + 1}")
+        row.prop(item, "ratio", text="")
+        row.prop(item, "distance", text="")
+
+class AddonPrefs(bpy.types.AddonPreferences):
+    bl_idname = __package__
+    
+    do_make_folders_for_cdmaterials: bpy.props.BoolProperty(
+        name="Make Folders",
+        description="On compile, make the appropriate folders in the materials folder (make folders for each $cdmaterials)",
+        default=True
+    )
+    
+    do_make_vmts: bpy.props.BoolProperty(
+        name="Make placeholder VMTs",
+        description="On compile, make placeholder VMT files named after the model's materials, placed inside appropriate folder inside the materials folder\nThis won't replace existing VMTs",
+        default=True
+    )
+    
+    use_legacy_smd_export: bpy.props.BoolProperty(
+        name="Legacy SMD Export",
+        description="Export SMDs with the original per-triangle Python loop instead of the vectorized NumPy path\nMuch slower on dense meshes, kept for A/B comparison",
+        default=False
+    )
+    
+    smd_precision: bpy.props.IntProperty(
+        name="Precision",
+        description="Decimal places written for positions and normals of visual meshes",
+        default=6,
+        min=1,
+        max=6
+    )
+    
+    smd_uv_precision: bpy.props.IntProperty(
+        name="UV Precision",
+        description="Decimal places written for UV coordinates of visual meshes",
+        default=6,
+        min=1,
+        max=6
+    )
+    
+    smd_collision_precision: bpy.props.IntProperty(
+        name="Collision Precision",
+        description="Decimal places written for collision meshes\nFewer digits make smaller SMDs that studiomdl parses faster",
+        default=6,
+        min=1,
+        max=6
+    )
+    
+    smd_threaded_writer: bpy.props.BoolProperty(
+        name="Background SMD Writer",
+        description="Write SMD files from a background thread so formatting and disk writes overlap",
+        default=True
+    )
+    
+    compile_jobs: bpy.props.IntProperty(
+        name="Parallel Compiles",
+        description="Number of studiomdl processes to run at the same time\n0 uses one per CPU core",
+        default=0,
+        min=0
+    )
+    
+    compile_timeout: bpy.props.FloatProperty(
+        name="Compile Timeout",
+        description="Seconds a studiomdl run may take before it's stopped, plus the time per 1000 triangles below.\n0 never stops it",
+        default=120.0,
+        min=0.0,
+        subtype='TIME_ABSOLUTE'
+    )
+    
+    compile_timeout_per_k_triangles: bpy.props.FloatProperty(
+        name="Per 1000 Triangles",
+        description="Seconds added to the compile timeout for every 1000 triangles of the model, large concave collision meshes take long",
+        default=10.0,
+        min=0.0,
+        subtype='TIME_ABSOLUTE'
+    )
+    
+    hang_timeout: bpy.props.FloatProperty(
+        name="Hang Timeout",
+        description="Stop studiomdl (and the processes it started) when it printed nothing and used no CPU for this long.\n0 never checks. Not checked on macOS",
+        default=300.0,
+        min=0.0,
+        subtype='TIME_ABSOLUTE'
+    )
+    
+    compile_retries: bpy.props.IntProperty(
+        name="Retries",
+        description="How often to run studiomdl again when it failed without an error message, hung or found its files locked",
+        default=1,
+        min=0,
+        max=5
+    )
+    
+    scratch_dir: bpy.props.StringProperty(
+        name="Temp Folder",
+        description="Folder the QC and mesh files are written to until studiomdl has compiled them, every compile gets its own subfolder.\nEmpty uses the system temp folder",
+        default="",
+        subtype='DIR_PATH'
+    )
+    
+    scratch_in_ram: bpy.props.BoolProperty(
+        name="Temp Files in RAM",
+        description="Write the temp files to a RAM disk (/dev/shm on Linux) when there is one with enough free space, so large meshes never touch the disk.\nFalls back to the temp folder otherwise",
+        default=False
+    )
+    
+    keep_failed_scratch: bpy.props.BoolProperty(
+        name="Keep Temp Files of Failed Models",
+        description="Leave the QC and mesh files of models studiomdl failed on, to inspect them. They are removed after a few days",
+        default=True
+    )
+    
+    artifact_cache_dir: bpy.props.StringProperty(
+        name="Compiled Model Cache",
+        description="Folder to keep compiled models in, keyed by the exact QC, meshes and studiomdl they were compiled from. Compiling the same model again restores it instead of running studiomdl.\nCan be shared between machines, e.g. on a network drive. Empty turns the cache off",
+        default="",
+        subtype='DIR_PATH'
+    )
+    
+    artifact_cache_gb: bpy.props.FloatProperty(
+        name="Cache Size (GB)",
+        description="The least recently used models are removed from the cache once it grows past this size",
+        default=10.0,
+        min=0.1
+    )
+    
+    validate_before_compile: bpy.props.BoolProperty(
+        name="Validate Before Compiling",
+        description="Check every model for problems before exporting, models with errors are skipped without running studiomdl",
+        default=True
+    )
+    
+    trace_compile: bpy.props.BoolProperty(
+        name="Trace Compile Stages",
+        description="Record how long every model spends in each export and compile stage, written as a Chrome trace next to the .blend file (open it in chrome://tracing or ui.perfetto.dev)\nA table of the slowest stages is printed to the system console",
+        default=False
+    )
+    
+    trace_memory: bpy.props.BoolProperty(
+        name="Trace Memory Peaks",
+        description="Also record the peak Python memory of each export stage with tracemalloc\nSlows exporting down noticeably",
+        default=False
+    )
+    
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row()
+        row.prop(self, "do_make_folders_for_cdmaterials", text="Automatically make folders for materials locations")
+        row = layout.row()
+        row.enabled = self.do_make_folders_for_cdmaterials
+        row.prop(self, "do_make_vmts", text="Also make placeholder VMTs (Only when compiling with the \"Same as MDL\" option)")
+        row = layout.row()
+        row.prop(self, "use_legacy_smd_export", text="Use legacy SMD export (slower, for comparison)")
+        row = layout.row()
+        row.prop(self, "compile_jobs", text="Parallel studiomdl jobs (0 = CPU count)")
+        row = layout.row()
+        row.prop(self, "compile_timeout")
+        row.prop(self, "compile_timeout_per_k_triangles")
+        row = layout.row()
+        row.prop(self, "hang_timeout")
+        row.prop(self, "compile_retries")
+        row = layout.row()
+        row.prop(self, "scratch_dir")
+        row = layout.row()
+        row.prop(self, "scratch_in_ram")
+        row.prop(self, "keep_failed_scratch")
+        row = layout.row()
+        row.prop(self, "artifact_cache_dir")
+        sub = row.row()
+        sub.enabled = bool(self.artifact_cache_dir)
+        sub.prop(self, "artifact_cache_gb")
+        row = layout.row()
+        row.prop(self, "validate_before_compile")
+        row = layout.row()
+        row.prop(self, "trace_compile")
+        sub = row.row()
+        sub.enabled = self.trace_compile
+        sub.prop(self, "trace_memory")
+        
+        box = layout.box()
+        box.enabled = not self.use_legacy_smd_export # The legacy exporter always writes 6 decimals
+        row = box.row()
+        row.label(text="SMD decimal places:")
+        row = box.row()
+        row.prop(self, "smd_precision")
+        row.prop(self, "smd_uv_precision")
+        row.prop(self, "smd_collision_precision")
+        row = box.row()
+        row.prop(self, "smd_threaded_writer")
+        
+        # Startup cost of the add-on, exporting and compiling code is only loaded on first use
+        startup_ms = (addon_import_seconds + addon_register_seconds) * 1000
+        row = layout.row()
+        row.label(text=f"Startup: import {addon_import_seconds * 1000:.1f} ms, register {addon_register_seconds * 1000:.1f} ms (target < 50 ms)",
+                  icon='INFO' if startup_ms < 50 else 'ERROR')
+
+classes = [
+    AutoMDLOperator,
+    AutoMDLValidateOperator,
+    AutoMDLRescanGamesOperator,
+    AutoMDLPanel,
+    CdMaterialsPropGroup,
+    LodPropGroup,
+    AUTOMDL_UL_lods,
+    AddonPrefs
+]
+
+class_register, class_unregister = bpy.utils.register_classes_factory(classes)
+
+def register():
+    register_start = time.perf_counter()
+    from bpy.utils import register_class
+    for cls in classes:
+        register_class(cls)
+    
+    # surfaceprop dropdown
+    bpy.types.Scene.surfaceprop_text_input = bpy.props.StringProperty(name="", default="")
+    
+    # mass text input
+    bpy.types.Scene.mass_text_input = bpy.props.StringProperty(name="", default="35", description="Mass in kilograms (KG)\nBy default, the Player can +USE pick up 35KG max.\nThe gravgun can pick up 250KG max.\nThe portal gun can pick up 85KG max", update=onMassTextInputChanged)
+    
+    # Model Collection Selector
+    bpy.types.Scene.model_collection = bpy.props.PointerProperty(
+        type=bpy.types.Collection,
+        name="Model Collection",
+        description="Select the collection containing models to compile"
+    )
+    
+    # surfaceprop
+    bpy.types.Scene.surfaceprop = bpy.props.EnumProperty(
+        name="Selected Option",
+        items = [
+            ("Concrete", "Concrete", ""),
+            ("Chainlink", "Chainlink", ""),
+            ("Canister", "Canister", ""),
+            ("Crowbar", "Crowbar", ""),
+            ("Metal", "Metal", ""),
+            ("Metalvent", "Metalvent", ""),
+            ("Popcan", "Popcan", ""),
+            ("Wood", "Wood", ""),
+            ("Plaster", "Plaster", ""),
+            ("Dirt", "Dirt", ""),
+            ("Grass", "Grass", ""),
+            ("Sand", "Sand", ""),
+            ("Snow", "Snow", ""),
+            ("Ice", "Ice", ""),
+            ("Flesh", "Flesh", ""),
+            ("Glass", "Glass", ""),
+            ("Tile", "Tile", ""),
+            ("Paper", "Paper", ""),
+            ("Cardboard", "Cardboard", ""),
+            ("Plastic_Box", "Plastic_Box", ""),
+            ("Plastic_barrel", "Plastic_barrel", ""),
+            ("Plastic", "Plastic", ""),
+            ("Rubber", "Rubber", ""),
+            ("Clay", "Clay", ""),
+            ("Porcelain", "Porcelain", ""),
+            ("Computer", "Computer", "")
+        ]
+    )
+    
+    # static prop
+    bpy.types.Scene.staticprop = bpy.props.BoolProperty(
+        name="Static Prop",
+        description="Enable if used as prop_static\n($staticprop in QC)",
+        default=False
+    )
+    
+    # has transparency
+    bpy.types.Scene.mostlyopaque = bpy.props.BoolProperty(
+        name="Has Transparency",
+        description="Enabling this may fix sorting issues that come with using transparent materials. \nRenders model in 2 passes, one for opaque materials, and one for materials with transparency\n($mostlyopaque in QC)",
+        default=False
+    )
+    
+    # *** RENAME and UPDATE SCALE PROPERTY ***
+    bpy.types.Scene.qc_scale_factor = bpy.props.FloatProperty(
+        name="QC Scale Factor",
+        description="Model scale factor ($scale value in QC, 1.0 = normal size)",
+        default=100.0,
+        min=0.0, # Scale can be zero or positive
+        precision=6 # Allow fine control over scale
+    )
+    
+    # mesh file format studiomdl compiles from
+    bpy.types.Scene.mesh_format = bpy.props.EnumProperty(
+        name="Mesh Format",
+        description="File format of the meshes exported for studiomdl",
+        items=[
+            ('SMD', "SMD", "Text SMD files, every triangle corner written out in full"),
+            ('DMX', "DMX", "Binary DMX files with shared vertices, much smaller and faster to write on dense meshes"),
+        ],
+        default='SMD'
+    )
+    
+    # radio buttons for choosing how to define cdmaterials
+    bpy.types.Scene.cdmaterials_type = bpy.props.EnumProperty(items =
+        (
+            ('0','Same as MDL',''),
+            ('1','Other','')
+        )
+    )
+    
+    # cdmaterials list
+    bpy.types.Scene.cdmaterials_list = bpy.props.CollectionProperty(type=CdMaterialsPropGroup)
+    bpy.types.Scene.cdmaterials_list_active_index = bpy.props.IntProperty()
+    
+    # deduplication
+    bpy.types.Scene.compile_duplicates_as_aliases = bpy.props.BoolProperty(
+        name="Compile Duplicates Once",
+        description="Models with exactly the same meshes (linked duplicates or copies) are compiled once, the others are listed as aliases of it in <blend name>.automdl-aliases.json instead of getting their own MDL.\nShared meshes are always exported once",
+        default=False
+    )
+    
+    # LODs
+    bpy.types.Scene.generate_lods = bpy.props.BoolProperty(
+        name="Generate LODs",
+        description="Export decimated copies of every model and switch to them with distance ($lod in QC).\nDecimated from the exported mesh, no modifiers are added to the objects",
+        default=False
+    )
+    bpy.types.Scene.lod_list = bpy.props.CollectionProperty(type=LodPropGroup)
+    bpy.types.Scene.lod_list_active_index = bpy.props.IntProperty()
+    
+    # collision hulls
+    bpy.types.Scene.generate_collision = bpy.props.BoolProperty(
+        name="Generate Collision",
+        description="Models without a COL_ mesh get convex hulls of their visual mesh as collision, one per island, concave islands are cut into several.\nBuilt from the exported mesh, no objects are added",
+        default=False
+    )
+    bpy.types.Scene.simplify_collision = bpy.props.BoolProperty(
+        name="Simplify COL_ Meshes",
+        description="Export COL_ meshes as convex hulls with at most Hull Vertices each, one per island, instead of as they are",
+        default=False
+    )
+    bpy.types.Scene.collision_hull_vertices = bpy.props.IntProperty(
+        name="Hull Vertices",
+        description="Most vertices a convex hull may have, fewer make cheaper physics but a rougher fit",
+        default=32,
+        min=4,
+        max=255
+    )
+    bpy.types.Scene.collision_max_pieces = bpy.props.IntProperty(
+        name="Max Pieces",
+        description="Most convex hulls generated collision may have ($maxconvexpieces), islands beyond it are merged into their neighbours",
+        default=16,
+        min=1,
+        max=64
+    )
+    
+    # objects edited since their last compile, saved for Compile Changed (see dirty.py)
+    bpy.types.Scene.automdl_dirty_objects = bpy.props.StringProperty(default="[]", options={'HIDDEN'})
+    dirty.register_handlers()
+    
+    # watch mode
+    bpy.types.Scene.compile_on_save = bpy.props.BoolProperty(
+        name="Compile on Save",
+        description="After every save of the .blend file, compile the models that changed since their last compile (like Compile Changed), without blocking the save.\nSaves in quick succession are compiled once, a save during such a compile restarts it",
+        default=False
+    )
+    if onSavePostCompile not in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.append(onSavePostCompile)
+    
+    # steam path, looked up with the game index in initGameDiscovery()
+    global steam_path
+    global game_select_method_is_dropdown
+    global addon_register_seconds
+    steam_path = None
+    game_select_method_is_dropdown = None # Not known until initGameDiscovery() ran
+    bpy.app.timers.register(initGameDiscovery, first_interval=0)
+    
+    # call something after 1 second
+    bpy.app.timers.register(set_default_values, first_interval=1) # workaround for not being able to use context in register()
+    bpy.app.timers.register(removeOrphanedScratch, first_interval=5)
+    addon_register_seconds = time.perf_counter() - register_start
+
+def set_default_values():
+    # set default of cdmaterials list
+    bpy.context.scene.cdmaterials_list.clear()
+    bpy.ops.uilist.entry_add(list_path="scene.cdmaterials_list", active_index_path="scene.cdmaterials_list_active_index")
+    bpy.context.scene.cdmaterials_list[0].name = "models/"
+    
+    # default LODs, kept if the .blend file already has its own
+    if not bpy.context.scene.lod_list:
+        for ratio, distance in ((50.0, 30.0), (25.0, 80.0)):
+            lod_item = bpy.context.scene.lod_list.add()
+            lod_item.ratio = ratio
+            lod_item.distance = distance
+    
+    # we need to update the dropdown once to let the default value affect the rest of the program, as if we selected it manually
+    # before that let's select a default value for it
+    global game_select_method_is_dropdown
+    if game_select_method_is_dropdown:
+        selectDefaultGame(bpy.context.scene)
+        
+        # update once to set up things ( i removed functionality there so not needed anymore )
+        onGameDropdownChanged(None, bpy.context)
+    else:
+        # update once to set up things
+        onGameManualTextInputChanged(None, bpy.context)
+
+
+def removeOrphanedScratch():
+    # Timer run a few seconds after startup, removes the temp files of compiles that crashed or were killed
+    from .workspace import get_default_scratch_root, get_ram_scratch_root, remove_orphaned_workspaces
+    addon = bpy.context.preferences.addons.get(__package__)
+    scratch_dir = bpy.path.abspath(addon.preferences.scratch_dir) if addon and addon.preferences.scratch_dir else ""
+    for scratch_root in {scratch_dir or get_default_scratch_root(bpy.app.tempdir), get_ram_scratch_root()}:
+        if scratch_root:
+            remove_orphaned_workspaces(scratch_root)
+    return None
+
+
+def selectDefaultGame(scene):
+    # if certain games exist, select one of them instead of defaulting to selecting the game in the first option
+    chosen_game_path = None
+    recognized_game_path_gmod = None
+    recognized_game_path_hl2 = None
+    recognized_game_path_sdk = None
+    
+    for i in range(len(games_paths_list)):
+        game_path = str(games_paths_list[i])
+        game_path_lowercase = game_path.lower()
+        
+        # we're not checking for specific strings because from what i saw the names of the games aren't consistent across users
+        # like idk, i remember seeing "Half Life 2" as "Half-Life 2" and "Half Life: 2" which is weird but idk
+        # i may be wrong but, we do this for now and im actually happy with it
+        # 
+        # checking smaller strings first for optimization (but not if its gonna be a very common string)
+        
+        if "mod" in game_path_lowercase:
+            if "s" in game_path_lowercase:
+                if "garry" in game_path_lowercase:
+                    # we are gonna assume its "GarrysMod" or something like that
+                    recognized_game_path_gmod = game_path
+                    continue
+        
+        if "2" in game_path_lowercase:
+            if "half" in game_path_lowercase:
+                if "life" in game_path_lowercase:
+                    # we are gonna assume its "Half-Life 2" or something like that (episodes, lost coast etc)
+                    recognized_game_path_hl2 = game_path
+                    continue
+        
+        if "sdk" in game_path_lowercase:
+            if "2013" in game_path_lowercase:
+                # we are gonna assume its "Source SDK Base 2013 Singleplayer" or something like that
+                recognized_game_path_sdk = game_path
+                continue
+    
+    # lets now define some sort of order so that we prefer some recognized games over others
+    # sdk > hl2 > gmod
+    if recognized_game_path_sdk is not None:
+        chosen_game_path = recognized_game_path_sdk
+    elif recognized_game_path_hl2 is not None:
+        chosen_game_path = recognized_game_path_hl2
+    elif recognized_game_path_gmod is not None:
+        chosen_game_path = recognized_game_path_gmod   
+    
+    # set value
+    if chosen_game_path == None and games_paths_list:
+        chosen_game_path = str(games_paths_list[0])
+    if chosen_game_path != None:
+        scene.game_select = chosen_game_path
+
+
+def unregister():
+    from bpy.utils import unregister_class
+    for cls in reversed(classes):
+        unregister_class(cls)
+    
+    for timer in (initGameDiscovery, pollGameIndexRefresh, set_default_values, removeOrphanedScratch, runCompileOnSave):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    
+    del bpy.types.Scene.surfaceprop_text_input
+    del bpy.types.Scene.model_collection
+    del bpy.types.Scene.surfaceprop
+    del bpy.types.Scene.staticprop
+    del bpy.types.Scene.mass_text_input
+    del bpy.types.Scene.qc_scale_factor # Update cleanup for scale property
+    del bpy.types.Scene.mesh_format
+    
+    if game_select_method_is_dropdown:
+        del bpy.types.Scene.game_select
+    elif game_select_method_is_dropdown is not None: # None if initGameDiscovery() never ran
+        del bpy.types.Scene.studiomdl_manual_input
+    
+    del bpy.types.Scene.cdmaterials_type
+    
+    del bpy.types.Scene.cdmaterials_list
+    del bpy.types.Scene.cdmaterials_list_active_index
+    
+    del bpy.types.Scene.compile_duplicates_as_aliases
+    del bpy.types.Scene.generate_lods
+    del bpy.types.Scene.lod_list
+    del bpy.types.Scene.lod_list_active_index
+    del bpy.types.Scene.generate_collision
+    del bpy.types.Scene.simplify_collision
+    del bpy.types.Scene.collision_hull_vertices
+    del bpy.types.Scene.collision_max_pieces
+    del bpy.types.Scene.automdl_dirty_objects
+    dirty.unregister_handlers()
+    if onSavePostCompile in bpy.app.handlers.save_post:
+        bpy.app.handlers.save_post.remove(onSavePostCompile)
+    del bpy.types.Scene.compile_on_save
+
+
+def checkVisMeshHasMesh(context):
+    vis_mesh_obj = context.scene.vis_mesh
+    return (vis_mesh_obj and vis_mesh_obj.type == 'MESH' and vis_mesh_obj.name in bpy.data.objects) == True
+
+
+def checkPhyMeshHasMesh(context):
+    phy_mesh_obj = context.scene.phy_mesh
+    return (phy_mesh_obj and phy_mesh_obj.type == 'MESH' and phy_mesh_obj.name in bpy.data.objects) == True
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    return f"{seconds // 60}m {seconds % 60:02d}s"
+
+
+def is_float(value):
+  if value is None:
+      return False
+  try:
+      float(value)
+      return True
+  except:
+      return False
+
+
+def cli_main():
+    """Entry point of the command line compile, see cli.py."""
+    from .cli import cli_main
+    cli_main()
+
+
+addon_import_seconds = time.perf_counter() - addon_import_start
+
+if __name__ == "__main__":
+    register()
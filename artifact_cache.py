@@ -0,0 +1,207 @@
+"""Compiled model cache: studiomdl outputs stored under a hash of everything studiomdl read.
+
+The key of a compile is a hash of the studiomdl binary, the QC text and the bytes of every
+mesh file next to it, so two compiles with the same key produce the same MDL, wherever and
+by whoever they ran. A cache folder on a shared mount lets artists and build machines reuse
+each other's compiles of the same modular sets.
+
+Entries are written to a private folder and renamed into place, so concurrent writers never
+see or leave half-written entries; the first rename wins. Restoring an entry marks it as
+used, and evict() removes the least recently used entries once the cache outgrows its size.
+Private folders left behind by crashed writers are swept when the cache is opened.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import List, Tuple, Optional
+
+from .manifest import get_model_outputs
+
+
+CACHE_VERSION = 1
+CACHE_ENTRY_FILE = "entry.json"
+HASH_CHUNK_SIZE = 1 << 20
+OUTPUT_MTIME_SLACK_NS = 2_000_000_000 # Coarse file system timestamps (FAT, network shares)
+INCOMING_STALE_SECONDS = 24 * 3600 # Private folders older than this were left by crashed writers
+
+def get_file_digest(path: str) -> str:
+    """Returns the SHA-256 of a file's contents, e.g. to identify a studiomdl binary on any machine."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def get_compile_cache_key(studiomdl_digest: str, qc_path: str) -> str:
+    """Returns the cache key of a compile job: its QC and every file in the QC's folder.
+
+    A job's folder holds only the meshes its QC references, so hashing all of them covers
+    the references without parsing the QC.
+    """
+    hasher = hashlib.sha256(f"automdl-cache-{CACHE_VERSION}\0{studiomdl_digest}\0".encode())
+    with open(qc_path, "rb") as file:
+        hasher.update(file.read())
+    work_dir = os.path.dirname(qc_path)
+    for file_name in sorted(os.listdir(work_dir)):
+        file_path = os.path.join(work_dir, file_name)
+        if file_path == qc_path or not os.path.isfile(file_path):
+            continue
+        hasher.update(f"\0{file_name}\0{os.path.getsize(file_path)}\0".encode())
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ArtifactCache:
+    """A folder of compiled models keyed by get_compile_cache_key().
+
+    Safe to use from the compile threads and from several processes or machines at once.
+    """
+
+    def __init__(self, root: str, max_bytes: int, studiomdl_digest: str):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.studiomdl_digest = studiomdl_digest
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.restored_bytes = 0
+        self.evicted = 0
+
+    def create(self):
+        """Creates the cache folder. Raises OSError if it can't be."""
+        os.makedirs(os.path.join(self.root, "entries"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "incoming"), exist_ok=True)
+        self.remove_stale_incoming()
+
+    def remove_stale_incoming(self) -> int:
+        """Removes the private folders left in incoming/ by writers or evictions that crashed. Returns the number removed."""
+        incoming = os.path.join(self.root, "incoming")
+        stale_before = time.time() - INCOMING_STALE_SECONDS
+        removed = 0
+        try:
+            with os.scandir(incoming) as it:
+                for entry in it:
+                    try:
+                        if entry.stat(follow_symlinks=False).st_mtime >= stale_before:
+                            continue
+                    except OSError:
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                    else:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            continue
+                    removed += 1
+        except OSError:
+            pass
+        return removed
+
+    def get_key(self, qc_path: str) -> str:
+        return get_compile_cache_key(self.studiomdl_digest, qc_path)
+
+    def get_entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, "entries", key[:2], key)
+
+    def restore(self, key: str, output_base: str) -> bool:
+        """Copies the cached outputs of a compile next to output_base. Returns False on a miss."""
+        entry_dir = self.get_entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, CACHE_ENTRY_FILE), "r", encoding="utf-8") as file:
+                suffixes = json.load(file)["suffixes"]
+            os.makedirs(os.path.dirname(output_base), exist_ok=True)
+            restored_bytes = 0
+            for suffix in suffixes:
+                # Copied under a temp name first, so a game never loads a half-written file
+                temp_path = f"{output_base}{suffix}.automdl-tmp"
+                shutil.copyfile(os.path.join(entry_dir, "output" + suffix), temp_path)
+                os.replace(temp_path, output_base + suffix)
+                restored_bytes += os.path.getsize(output_base + suffix)
+            os.utime(os.path.join(entry_dir, CACHE_ENTRY_FILE)) # Recently used, evicted last
+        except (OSError, ValueError, KeyError):
+            # Missing, or evicted by another process while restoring
+            with self.lock:
+                self.misses += 1
+            return False
+        with self.lock:
+            self.hits += 1
+            self.restored_bytes += restored_bytes
+        return True
+
+    def store(self, key: str, output_base: str, compiled_after_ns: int) -> bool:
+        """Adds the outputs studiomdl wrote next to output_base since compiled_after_ns. Returns False if nothing was stored."""
+        entry_dir = self.get_entry_dir(key)
+        if os.path.isdir(entry_dir):
+            return False # Stored by another compile meanwhile
+        base_name = os.path.basename(output_base)
+        outputs = [file_name for file_name, (size, mtime_ns) in get_model_outputs(os.path.dirname(output_base), base_name).items()
+                   if mtime_ns >= compiled_after_ns - OUTPUT_MTIME_SLACK_NS] # Not files left by older compiles
+        if not outputs:
+            return False
+        try:
+            incoming_dir = tempfile.mkdtemp(prefix=f"{key[:8]}_", dir=os.path.join(self.root, "incoming"))
+        except OSError:
+            return False
+        try:
+            suffixes = [file_name[len(base_name):] for file_name in sorted(outputs)]
+            for suffix in suffixes:
+                shutil.copyfile(output_base + suffix, os.path.join(incoming_dir, "output" + suffix))
+            with open(os.path.join(incoming_dir, CACHE_ENTRY_FILE), "w", encoding="utf-8") as file:
+                json.dump({"version": CACHE_VERSION, "suffixes": suffixes, "stored": time.time()}, file)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.rename(incoming_dir, entry_dir) # Fails if another writer got there first
+        except OSError:
+            shutil.rmtree(incoming_dir, ignore_errors=True)
+            return False
+        with self.lock:
+            self.stores += 1
+        return True
+
+    def get_entries(self) -> List[Tuple[float, int, str]]:
+        """Returns (last used, size in bytes, folder) of every entry."""
+        entries = []
+        entries_root = os.path.join(self.root, "entries")
+        for prefix_entry in os.scandir(entries_root):
+            if not prefix_entry.is_dir():
+                continue
+            for entry in os.scandir(prefix_entry.path):
+                try:
+                    last_used = os.path.getmtime(os.path.join(entry.path, CACHE_ENTRY_FILE))
+                    size = sum(file_entry.stat().st_size for file_entry in os.scandir(entry.path))
+                except OSError:
+                    continue # Being evicted by another process
+                entries.append((last_used, size, entry.path))
+        return entries
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """Removes the least recently used entries until the cache fits in max_bytes. Returns the number removed."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        try:
+            entries = self.get_entries()
+        except OSError:
+            return 0
+        total_bytes = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry_dir in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            # Renamed out of the entries first, so nobody restores a half-deleted entry
+            trash_dir = os.path.join(self.root, "incoming", f"evicted_{os.path.basename(entry_dir)}_{os.getpid()}")
+            try:
+                os.rename(entry_dir, trash_dir)
+            except OSError:
+                continue
+            shutil.rmtree(trash_dir, ignore_errors=True)
+            total_bytes -= size
+            evicted += 1
+        self.evicted += evicted
+        return evicted
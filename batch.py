@@ -0,0 +1,445 @@
+"""Compiles every .blend file under a folder with a pool of background Blender processes.
+
+    python batch.py <root> --blender <path to blender> --game <gameinfo dir>
+
+Runs outside Blender. Each worker process opens several .blend files in a row and runs the
+same pipeline as the command line compile (run_cli) on each of them, the per-file JSON
+summaries are merged into one report.
+
+The collection to compile is read from a sidecar "<blend name>.automdl-batch.json" next to
+the .blend file ({"collection": "Props"}, optionally with "args": [...] extra command line
+arguments or "skip": true). Without one, the collection picked in the file's AutoMDL panel
+is used.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Any, Optional
+
+try:
+    from .model_paths import get_models_path, get_relative_dir_path
+except ImportError: # Run as a script
+    from model_paths import get_models_path, get_relative_dir_path
+
+
+SIDECAR_SUFFIX = ".automdl-batch.json"
+DEFAULT_FILES_PER_WORKER = 8
+DEFAULT_MEMORY_PER_WORKER_GB = 2.0
+WORKER_OUTPUT_TAIL_CHARS = 4000 # Blender output kept in the report when a worker crashes
+
+# Exit codes of the batch driver
+BATCH_EXIT_OK = 0
+BATCH_EXIT_FILE_FAILED = 1 # At least one file failed, or one of its models did
+BATCH_EXIT_SETUP_FAILED = 2
+
+
+@dataclass
+class BlendJob:
+    """One .blend file to compile."""
+    blend_path: str
+    collection: str = "" # Empty: use the collection picked in the file's AutoMDL panel
+    extra_args: List[str] = field(default_factory=list)
+    relative_dir: str = ""
+
+@dataclass
+class BlendResult:
+    job: BlendJob
+    exit_code: int
+    seconds: float = 0.0
+    error: str = ""
+    summary: Optional[Dict[str, Any]] = None
+
+
+def find_blend_files(root: str) -> List[str]:
+    """Returns every .blend file under root, sorted. Backups (.blend1, .blend2...) are ignored."""
+    blend_paths = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = [name for name in dir_names if not name.startswith('.')]
+        for file_name in file_names:
+            if file_name.lower().endswith(".blend"):
+                blend_paths.append(os.path.join(dir_path, file_name))
+    return sorted(blend_paths)
+
+def read_blend_job(blend_path: str) -> Optional[BlendJob]:
+    """Builds the job of a .blend file from its sidecar config. Returns None if the file is marked to be skipped.
+
+    Raises:
+        ValueError: If the sidecar config can't be read or the file isn't inside a models folder.
+    """
+    job = BlendJob(os.path.abspath(blend_path))
+    models_root = get_models_path(job.blend_path)
+    if not models_root:
+        raise ValueError("Not inside a 'models' folder structure.")
+    job.relative_dir = get_relative_dir_path(job.blend_path, models_root)
+
+    sidecar_path = os.path.splitext(job.blend_path)[0] + SIDECAR_SUFFIX
+    if os.path.isfile(sidecar_path):
+        try:
+            with open(sidecar_path, "r") as file:
+                config = json.load(file)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Could not read '{sidecar_path}': {e}")
+        if config.get("skip", False):
+            return None
+        job.collection = str(config.get("collection", ""))
+        job.extra_args = [str(arg) for arg in config.get("args", [])]
+    return job
+
+def get_available_memory() -> Optional[int]:
+    """Returns the free physical memory in bytes, None if it can't be determined."""
+    if os.name == "nt":
+        import ctypes
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def get_worker_count(requested: int, file_count: int, memory_per_worker_gb: float) -> int:
+    """Number of Blender workers to run: one per CPU core, limited by free memory and the amount of files.
+
+    Args:
+        requested: Worker count asked for, 0 to size the pool automatically.
+    """
+    if requested > 0:
+        worker_count = requested
+    else:
+        worker_count = os.cpu_count() or 1
+        available_memory = get_available_memory()
+        if available_memory is not None and memory_per_worker_gb > 0:
+            worker_count = min(worker_count, int(available_memory // (memory_per_worker_gb * 1024 ** 3)))
+    return max(1, min(worker_count, file_count))
+
+
+# --- Worker (runs inside Blender) ---
+
+def run_worker(task_path: str) -> int:
+    """Compiles the .blend files listed in a task file, one after another in this Blender process.
+
+    A JSON line is appended to the task's results file after each file, so the driver knows
+    which files were handled if Blender crashes halfway.
+    """
+    import addon_utils
+    import bpy
+
+    with open(task_path, "r") as file:
+        task = json.load(file)
+    results_path = task["results"]
+
+    def write_result(blend_path, exit_code, error="", summary_path=""):
+        with open(results_path, "a") as results_file:
+            results_file.write(json.dumps({"blend": blend_path, "exit_code": exit_code, "error": error, "summary": summary_path}) + "\n")
+
+    # (Re)registers the add-on, importing this module doesn't
+    if addon_utils.enable(__package__) is None:
+        for file_task in task["files"]:
+            write_result(file_task["blend"], BATCH_EXIT_SETUP_FAILED, f"Could not enable the '{__package__}' add-on.")
+        return BATCH_EXIT_SETUP_FAILED
+    from .cli import run_cli, get_cli_summary_path
+
+    worst_exit_code = BATCH_EXIT_OK
+    for file_task in task["files"]:
+        blend_path = file_task["blend"]
+        summary_path = get_cli_summary_path(blend_path)
+        try:
+            bpy.ops.wm.open_mainfile(filepath=blend_path, load_ui=False)
+            collection_name = file_task["collection"]
+            if not collection_name:
+                scene_collection = bpy.context.scene.model_collection
+                if scene_collection is None:
+                    write_result(blend_path, BATCH_EXIT_SETUP_FAILED, "No collection in the sidecar config and none picked in the AutoMDL panel.")
+                    worst_exit_code = max(worst_exit_code, BATCH_EXIT_SETUP_FAILED)
+                    continue
+                collection_name = scene_collection.name
+            argv = ["--collection", collection_name, "--summary", summary_path] + file_task["args"]
+            exit_code = run_cli(argv)
+            write_result(blend_path, exit_code, summary_path=summary_path)
+        except SystemExit as e: # argparse rejected the arguments
+            exit_code = e.code if isinstance(e.code, int) else BATCH_EXIT_SETUP_FAILED
+            write_result(blend_path, exit_code, "Invalid command line arguments, see the worker output.")
+        except Exception as e:
+            exit_code = BATCH_EXIT_SETUP_FAILED
+            write_result(blend_path, exit_code, f"Unexpected error: {e}")
+        worst_exit_code = max(worst_exit_code, exit_code)
+    return worst_exit_code
+
+def worker_main():
+    """Worker entry point, see get_worker_command()."""
+    sys.exit(run_worker(sys.argv[sys.argv.index("--") + 1]))
+
+
+# --- Driver ---
+
+def get_worker_command(blender_exe: str, task_path: str) -> List[str]:
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    package_name = os.path.basename(package_dir)
+    expr = (f"import sys, importlib; sys.path.insert(0, {os.path.dirname(package_dir)!r}); "
+            f"importlib.import_module({package_name + '.batch'!r}).worker_main()")
+    return [blender_exe, "--background", "--python-exit-code", "1", "--python-expr", expr, "--", task_path]
+
+class BatchRunner:
+    """Hands out chunks of .blend files to background Blender workers and collects their results.
+
+    Files a crashed worker didn't get to are queued again, only the file it crashed on fails.
+    """
+
+    def __init__(self, blender_exe: str, common_args: List[str], work_dir: str, files_per_worker: int, report=print):
+        self.blender_exe = blender_exe
+        self.common_args = common_args
+        self.work_dir = work_dir
+        self.files_per_worker = max(1, files_per_worker)
+        self.report = report
+        self.lock = threading.Lock()
+        self.pending_jobs: List[BlendJob] = []
+        self.results: Dict[str, BlendResult] = {}
+        self.task_count = 0
+        self.total_count = 0
+
+    def take_chunk(self) -> Tuple[int, List[BlendJob]]:
+        """Returns a task number and the next files for a worker, no files once everything was handed out."""
+        with self.lock:
+            chunk = self.pending_jobs[:self.files_per_worker]
+            del self.pending_jobs[:self.files_per_worker]
+            self.task_count += 1
+            return self.task_count, chunk
+
+    def add_result(self, result: BlendResult):
+        with self.lock:
+            self.results[result.job.blend_path] = result
+            done_count = len(self.results)
+        status = "OK" if result.exit_code == BATCH_EXIT_OK else f"FAILED ({result.exit_code})"
+        error_line = result.error.splitlines()[0] if result.error else ""
+        self.report(f"[{done_count}/{self.total_count}] {status} {result.job.blend_path} ({result.seconds:.1f}s){': ' + error_line if error_line else ''}")
+
+    def run_worker_loop(self):
+        while True:
+            task_index, chunk = self.take_chunk()
+            if not chunk:
+                return
+            self.run_chunk(task_index, chunk)
+
+    def run_chunk(self, task_index: int, chunk: List[BlendJob]):
+        task_path = os.path.join(self.work_dir, f"task_{task_index}.json")
+        results_path = os.path.join(self.work_dir, f"results_{task_index}.jsonl")
+        with open(task_path, "w") as file:
+            json.dump({
+                "results": results_path,
+                "files": [{"blend": job.blend_path, "collection": job.collection, "args": self.common_args + job.extra_args} for job in chunk],
+            }, file)
+
+        start_time = time.perf_counter()
+        try:
+            process = subprocess.run(get_worker_command(self.blender_exe, task_path), stdout=subprocess.PIPE,
+                                     stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, text=True, errors="replace")
+            output = process.stdout or ""
+            worker_error = f"Blender exited with code {process.returncode}"
+        except OSError as e:
+            output = ""
+            worker_error = f"Could not start Blender: {e}"
+
+        # Results of the files the worker finished, in order
+        finished = {}
+        if os.path.isfile(results_path):
+            with open(results_path, "r") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # Line cut off by a crash
+                    finished[entry["blend"]] = entry
+        seconds_per_file = (time.perf_counter() - start_time) / max(1, len(finished))
+
+        for index, job in enumerate(chunk):
+            entry = finished.get(job.blend_path)
+            if entry is None:
+                # The worker died on this file, the ones after it get another worker
+                crash_output = output[-WORKER_OUTPUT_TAIL_CHARS:]
+                self.add_result(BlendResult(job, BATCH_EXIT_SETUP_FAILED, error=f"{worker_error} while compiling this file.\n{crash_output}"))
+                with self.lock:
+                    self.pending_jobs.extend(job for job in chunk[index + 1:] if job.blend_path not in finished)
+                break
+            summary = None
+            if entry["summary"]:
+                try:
+                    with open(entry["summary"], "r") as file:
+                        summary = json.load(file)
+                except (OSError, ValueError):
+                    pass
+            seconds = summary["seconds"] if summary else seconds_per_file
+            self.add_result(BlendResult(job, entry["exit_code"], seconds, entry["error"], summary))
+
+    def run(self, jobs: List[BlendJob], worker_count: int) -> List[BlendResult]:
+        self.pending_jobs = list(jobs)
+        self.total_count = len(jobs)
+        # Without crashes every worker gets files_per_worker files, a busy pool picks up the rest
+        with ThreadPoolExecutor(max_workers=worker_count) as pool:
+            for future in [pool.submit(self.run_worker_loop) for _ in range(worker_count)]:
+                future.result()
+        return [self.results[job.blend_path] for job in jobs]
+
+def get_batch_report(root: str, results: List[BlendResult], skipped: List[str], seconds: float) -> Dict[str, Any]:
+    """Merges the per-file results into one JSON-serializable report."""
+    files = []
+    model_owners: Dict[str, List[str]] = {}
+    totals = {"files": len(results), "failed_files": 0, "compiled": 0, "up_to_date": 0, "failed_models": 0, "cache_hits": 0, "cache_misses": 0}
+    for result in results:
+        summary = result.summary or {}
+        if result.exit_code != BATCH_EXIT_OK:
+            totals["failed_files"] += 1
+        totals["compiled"] += summary.get("compiled", 0)
+        totals["up_to_date"] += summary.get("up_to_date", 0)
+        totals["failed_models"] += summary.get("failed", 0)
+        totals["cache_hits"] += summary.get("cache_hits", 0)
+        totals["cache_misses"] += summary.get("cache_misses", 0)
+        for model in summary.get("models", []):
+            if model["model_path"]:
+                model_owners.setdefault(model["model_path"].lower(), []).append(f"{result.job.blend_path}: {model['object']}")
+        files.append({
+            "blend_file": result.job.blend_path,
+            "relative_dir": result.job.relative_dir,
+            "collection": summary.get("collection", result.job.collection),
+            "exit_code": result.exit_code,
+            "seconds": round(result.seconds, 3),
+            "error": result.error,
+            "models": summary.get("models", []),
+        })
+    return {
+        "root": root,
+        "seconds": round(seconds, 3),
+        "totals": totals,
+        # The same .mdl compiled from different files, the last one to finish wins
+        "model_path_conflicts": {model_path: owners for model_path, owners in model_owners.items() if len(owners) > 1},
+        "skipped_files": skipped,
+        "files": files,
+    }
+
+def parse_batch_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python batch.py", description="Compiles every .blend file under a folder with background Blender workers.")
+    parser.add_argument("root", help="Folder to search for .blend files")
+    parser.add_argument("--blender", default=shutil.which("blender"), help="Path to the Blender executable (default: blender on PATH)")
+    parser.add_argument("--game", required=True, help="Game folder containing gameinfo.txt")
+    parser.add_argument("--studiomdl", help="Path to studiomdl (default: <game>/../bin/studiomdl.exe)")
+    parser.add_argument("--workers", type=int, default=0, help="Blender processes to run at once, 0 = sized to CPU cores and free memory")
+    parser.add_argument("--memory-per-worker", type=float, default=DEFAULT_MEMORY_PER_WORKER_GB, help="GB of memory to reserve for each worker when sizing the pool")
+    parser.add_argument("--files-per-worker", type=int, default=DEFAULT_FILES_PER_WORKER, help="Files each Blender process opens before exiting")
+    parser.add_argument("--jobs", type=int, help="Parallel studiomdl processes per worker (default: CPU cores divided by workers)")
+    parser.add_argument("--force", action="store_true", help="Compile every model, even the ones that haven't changed")
+    parser.add_argument("--format", choices=["smd", "dmx"], help="Mesh file format exported for studiomdl (default: the one set in each .blend file)")
+    parser.add_argument("--aliases", action=argparse.BooleanOptionalAction, default=None, help="Compile models with identical meshes once and list the others as aliases (default: as set in each .blend file)")
+    parser.add_argument("--lods", help='LODs as ratio@distance, e.g. "0.5@30,0.25@80", "" for none (default: the ones set in each .blend file)')
+    parser.add_argument("--generate-collision", action=argparse.BooleanOptionalAction, default=None, help="Give models without a COL_ mesh convex hulls of their visual mesh as collision (default: as set in each .blend file)")
+    parser.add_argument("--hull-vertices", type=int, help="Most vertices per collision hull")
+    parser.add_argument("--timeout", type=float, help="Seconds a studiomdl run may take, plus --timeout-per-k-tris per 1000 triangles, 0 = none")
+    parser.add_argument("--timeout-per-k-tris", type=float, help="Seconds added to --timeout per 1000 triangles of the model")
+    parser.add_argument("--hang-timeout", type=float, help="Stop studiomdl after this many seconds without output or CPU use, 0 = never")
+    parser.add_argument("--retries", type=int, help="Runs of studiomdl after one that failed without an error message, hung or found its files locked")
+    parser.add_argument("--scratch-dir", help="Folder for the temp QC and mesh files of every worker (default: as set in the add-on preferences)")
+    parser.add_argument("--scratch-ram", action=argparse.BooleanOptionalAction, default=None, help="Write the temp files to a RAM disk (/dev/shm) when there is one")
+    parser.add_argument("--cache-dir", help='Compiled model cache folder shared by every worker, "" for none (default: as set in the add-on preferences)')
+    parser.add_argument("--cache-size", type=float, help="Compiled model cache size in GB")
+    parser.add_argument("--report", help="Where to write the merged JSON report (default: <root>/automdl-batch-report.json)")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_batch_args(sys.argv[1:] if argv is None else argv)
+    root = os.path.abspath(args.root)
+    if not args.blender:
+        print("Blender not found on PATH, pass --blender.")
+        return BATCH_EXIT_SETUP_FAILED
+
+    start_time = time.perf_counter()
+    jobs = []
+    skipped = []
+    setup_failures = []
+    for blend_path in find_blend_files(root):
+        try:
+            job = read_blend_job(blend_path)
+        except ValueError as e:
+            setup_failures.append(BlendResult(BlendJob(os.path.abspath(blend_path)), BATCH_EXIT_SETUP_FAILED, error=str(e)))
+            continue
+        if job is None:
+            skipped.append(os.path.abspath(blend_path))
+        else:
+            jobs.append(job)
+    if not jobs and not setup_failures:
+        print(f"No .blend files to compile under '{root}'.")
+        return BATCH_EXIT_OK
+
+    worker_count = get_worker_count(args.workers, len(jobs), args.memory_per_worker)
+    common_args = ["--game", args.game]
+    if args.studiomdl:
+        common_args += ["--studiomdl", args.studiomdl]
+    common_args += ["--jobs", str(args.jobs if args.jobs is not None else max(1, (os.cpu_count() or 1) // worker_count))]
+    if args.force:
+        common_args.append("--force")
+    if args.format:
+        common_args += ["--format", args.format]
+    if args.lods is not None:
+        common_args += ["--lods", args.lods]
+    if args.aliases is not None:
+        common_args.append("--aliases" if args.aliases else "--no-aliases")
+    if args.generate_collision is not None:
+        common_args.append("--generate-collision" if args.generate_collision else "--no-generate-collision")
+    if args.hull_vertices is not None:
+        common_args += ["--hull-vertices", str(args.hull_vertices)]
+    if args.timeout is not None:
+        common_args += ["--timeout", str(args.timeout)]
+    if args.timeout_per_k_tris is not None:
+        common_args += ["--timeout-per-k-tris", str(args.timeout_per_k_tris)]
+    if args.hang_timeout is not None:
+        common_args += ["--hang-timeout", str(args.hang_timeout)]
+    if args.retries is not None:
+        common_args += ["--retries", str(args.retries)]
+    if args.scratch_dir:
+        common_args += ["--scratch-dir", os.path.abspath(args.scratch_dir)]
+    if args.scratch_ram is not None:
+        common_args.append("--scratch-ram" if args.scratch_ram else "--no-scratch-ram")
+    if args.cache_dir is not None:
+        common_args += ["--cache-dir", os.path.abspath(args.cache_dir) if args.cache_dir else ""]
+    if args.cache_size is not None:
+        common_args += ["--cache-size", str(args.cache_size)]
+
+    print(f"Compiling {len(jobs)} .blend file(s) with {worker_count} Blender worker(s), {len(skipped)} skipped.")
+    for result in setup_failures:
+        print(f"FAILED {result.job.blend_path}: {result.error}")
+    with tempfile.TemporaryDirectory(prefix="automdl_batch_") as work_dir:
+        runner = BatchRunner(args.blender, common_args, work_dir, args.files_per_worker)
+        results = runner.run(jobs, worker_count) if jobs else []
+    results = setup_failures + results
+
+    report = get_batch_report(root, results, skipped, time.perf_counter() - start_time)
+    report_path = args.report or os.path.join(root, "automdl-batch-report.json")
+    with open(report_path, "w") as file:
+        json.dump(report, file, indent=2)
+
+    totals = report["totals"]
+    print(f"{totals['files'] - totals['failed_files']} of {totals['files']} file(s) OK, {totals['compiled']} model(s) compiled, "
+          f"{totals['up_to_date']} up to date, {totals['failed_models']} failed. Report: {report_path}")
+    if totals["cache_hits"] or totals["cache_misses"]:
+        print(f"Compiled model cache: {totals['cache_hits']} hit(s), {totals['cache_misses']} miss(es).")
+    for model_path, owners in report["model_path_conflicts"].items():
+        print(f"WARNING: '{model_path}' is compiled by several objects: {', '.join(owners)}")
+    return BATCH_EXIT_OK if totals["failed_files"] == 0 else BATCH_EXIT_FILE_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Stand-in for studiomdl: waits, then writes empty model files where studiomdl would.
+
+Called with the same arguments the add-on passes to studiomdl (-game <dir> ... <qc>).
+The model is written to <game dir>/models/<$modelname>, with a .phy when the QC has a
+$collisionmodel, and the progress line studiomdl prints for it.
+
+Environment:
+    FAKE_STUDIOMDL_LATENCY: Seconds to wait before writing, 0.05 by default.
+    FAKE_STUDIOMDL_FAIL: Exit with an error when the QC's $modelname contains this text.
+"""
+
+import os
+import re
+import sys
+import time
+
+
+def main(argv):
+    qc_path = argv[-1]
+    game_dir = argv[argv.index("-game") + 1] if "-game" in argv else os.getcwd()
+    time.sleep(float(os.environ.get("FAKE_STUDIOMDL_LATENCY", "0.05")))
+
+    with open(qc_path, "r") as file:
+        qc = file.read()
+    match = re.search(r'\$modelname\s+"([^"]+)"', qc)
+    if not match:
+        print(f"ERROR: {qc_path}: no $modelname")
+        return 1
+    model_name = match.group(1)
+    fail_text = os.environ.get("FAKE_STUDIOMDL_FAIL")
+    if fail_text and fail_text in model_name:
+        print(f"ERROR: {model_name}: failing on purpose")
+        return 1
+
+    base_path = os.path.join(game_dir, "models", os.path.splitext(model_name)[0])
+    os.makedirs(os.path.dirname(base_path), exist_ok=True)
+    extensions = [".mdl", ".vvd", ".dx90.vtx"]
+    if "$collisionmodel" in qc:
+        extensions.append(".phy")
+    for extension in extensions:
+        with open(base_path + extension, "wb") as file:
+            file.write(b"IDST")
+    if "$collisionmodel" in qc:
+        print("Collision model completed.") # Printed by studiomdl without a prefix, not an error
+    print(f"Completed \"{qc_path}\"")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""Export and compile benchmarks, run outside Blender.
+
+The add-on is imported against the bpy/mathutils stand-in in benchmarks/standin and
+compiles with benchmarks/fake_studiomdl.py, so the numbers track this code, not Blender
+or studiomdl. Absolute timings aren't comparable to a real Blender session; compare runs
+made on the same machine.
+
+    python benchmarks/run_benchmarks.py run --output before.json
+    python benchmarks/run_benchmarks.py run --output after.json --compare before.json
+    python benchmarks/run_benchmarks.py compare before.json after.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import importlib.util
+from typing import List, Dict, Any, Callable
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "standin"))
+
+import numpy as np
+import bpy # The stand-in
+import mathutils
+
+ADDON_PACKAGE = "automdl"
+RESULTS_VERSION = 1
+
+DEFAULT_TRIANGLE_COUNTS = [1_000, 10_000, 100_000, 1_000_000, 5_000_000]
+QUICK_TRIANGLE_COUNTS = [1_000, 10_000, 100_000]
+DEFAULT_OBJECT_COUNTS = [10, 100, 500]
+QUICK_OBJECT_COUNTS = [10, 100]
+QUICK_LEGACY_MAX_TRIANGLES = 10_000
+DEFAULT_MATERIAL_COUNTS = [100, 500]
+DEFAULT_LEGACY_MAX_TRIANGLES = 100_000 # The per-triangle loop takes minutes past this
+DEFAULT_STUDIOMDL_LATENCY = 0.05
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_MIN_SECONDS = 0.002 # Faster metrics are mostly timer noise, compare skips them
+
+ISLAND_TRIANGLES = 64 # Size of the pieces of the island benchmark mesh
+E2E_OBJECT_TRIANGLES = 2_000
+E2E_MATERIALS = 4
+E2E_SHARED_MESHES = 10 # Meshes the linked duplicates of the dedup variant are spread over
+MATERIAL_CALLS_PER_RUN = 100 # One call takes well under a millisecond, time batches of them
+INDEX_OBJECTS = 500
+INDEX_MATERIALS_PER_OBJECT = 40
+INDEX_MATERIAL_SETS = 25 # Modular pieces share a handful of palettes
+LOD_RATIOS = [0.5, 0.25]
+
+
+# --- Setup ---
+
+def load_addon():
+    """Imports the add-on package from the repository against the stand-in and registers it."""
+    spec = importlib.util.spec_from_file_location(ADDON_PACKAGE, os.path.join(ADDON_DIR, "__init__.py"),
+                                                  submodule_search_locations=[ADDON_DIR])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules[ADDON_PACKAGE] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    bpy.context.preferences.addons[ADDON_PACKAGE] = bpy._AddonEntry(addon.AddonPrefs())
+    return addon
+
+def import_addon_module(name: str):
+    return importlib.import_module(f"{ADDON_PACKAGE}.{name}")
+
+def reset_blend_data():
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.collections):
+        collection.clear()
+
+def make_mesh(name: str, triangle_count: int, material_count: int = 1, island_triangles: int = 0) -> bpy.Mesh:
+    """Builds a wavy grid of triangle_count triangles, or many separate grids of island_triangles each.
+
+    Half the faces are flat shaded, materials are assigned in stripes so the exporter sees
+    material changes, UVs are random per corner.
+    """
+    piece_triangles = island_triangles or triangle_count
+    quads_x = max(1, math.ceil(math.sqrt(piece_triangles / 2)))
+    quads_y = max(1, math.ceil(piece_triangles / 2 / quads_x))
+    grid_x, grid_y = np.meshgrid(np.arange(quads_x + 1), np.arange(quads_y + 1))
+    co = np.stack([grid_x.ravel(), grid_y.ravel(), np.sin(grid_x.ravel() * 0.3) * np.cos(grid_y.ravel() * 0.2)], axis=1)
+    corner = (np.arange(quads_y)[:, None] * (quads_x + 1) + np.arange(quads_x)[None, :]).ravel()
+    quads = np.stack([corner, corner + 1, corner + quads_x + 2, corner + quads_x + 1], axis=1)
+    triangles = np.concatenate([quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]])[:piece_triangles]
+
+    piece_count = math.ceil(triangle_count / len(triangles))
+    if piece_count > 1:
+        # Copies of the piece, moved apart so they don't share vertices
+        offsets = np.arange(piece_count)
+        co = (co[None, :, :] + np.stack([offsets * (quads_x + 2), np.zeros(piece_count), np.zeros(piece_count)], axis=1)[:, None, :]).reshape(-1, 3)
+        triangles = (triangles[None, :, :] + (offsets * (quads_x + 1) * (quads_y + 1))[:, None, None]).reshape(-1, 3)
+    triangles = triangles[:triangle_count]
+
+    rng = np.random.default_rng(len(name) + triangle_count)
+    face_indices = np.arange(len(triangles))
+    return bpy.Mesh(name, co, triangles, uvs=rng.random((len(triangles) * 3, 2)),
+                    use_smooth=(face_indices // 1024) % 2 == 0, material_index=(face_indices // 256) % material_count)
+
+def make_object(name: str, mesh: bpy.Mesh, material_count: int = 0) -> bpy.Object:
+    obj = bpy.Object(name, mesh, [bpy.Material(f"{name}_material{i}") for i in range(material_count)],
+                     matrix_world=mathutils.Matrix.Rotation(0.3, 4, 'Z') @ mathutils.Matrix.Diagonal((1.5, 1.5, 1.5, 1.0)))
+    bpy.data.objects[name] = obj
+    return obj
+
+def install_fake_studiomdl(game_root: str) -> str:
+    """Puts fake_studiomdl.py where setGamePath() looks for studiomdl, returns the game folder."""
+    bin_dir = os.path.join(game_root, "bin")
+    game_dir = os.path.join(game_root, "mod")
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(game_dir, exist_ok=True)
+    with open(os.path.join(game_dir, "gameinfo.txt"), "w") as file:
+        file.write('"GameInfo" { game "AutoMDL benchmark" }\n')
+    studiomdl_exe = os.path.join(bin_dir, "studiomdl.exe")
+    with open(os.path.join(BENCHMARKS_DIR, "fake_studiomdl.py"), "r") as source, open(studiomdl_exe, "w") as file:
+        file.write(f"#!{sys.executable}\n" + source.read().split("\n", 1)[1])
+    os.chmod(studiomdl_exe, 0o755)
+    return game_dir
+
+
+# --- Timing ---
+
+def get_repeat_count(triangle_count: int) -> int:
+    if triangle_count <= 10_000:
+        return 5
+    if triangle_count <= 100_000:
+        return 3
+    return 1
+
+def measure(function: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    """Runs function repeat times, returns the median and fastest run in seconds."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return {"seconds": statistics.median(runs), "min": min(runs), "runs": repeat}
+
+def format_count(count: int) -> str:
+    for divisor, suffix in ((1_000_000, "M"), (1_000, "k")):
+        if count >= divisor and count % divisor == 0:
+            return f"{count // divisor}{suffix}"
+    return str(count)
+
+
+# --- Benchmarks ---
+
+def benchmark_export(addon, results: Dict[str, Dict[str, Any]], triangle_counts: List[int], legacy_max_triangles: int, work_dir: str):
+    smd_export = import_addon_module("smd_export")
+    for triangle_count in triangle_counts:
+        reset_blend_data()
+        mesh = make_mesh(f"export_{triangle_count}", triangle_count, material_count=8)
+        with_materials = make_object("with_materials", mesh, material_count=8)
+        no_materials = make_object("no_materials", mesh)
+        variants = [
+            ("vectorized", with_materials, False, False, "smd"),
+            ("vectorized_collision", no_materials, True, False, "smd"),
+            ("dmx", with_materials, False, False, "dmx"),
+            ("dmx_collision", no_materials, True, False, "dmx"),
+        ]
+        if triangle_count <= legacy_max_triangles:
+            variants += [
+                ("legacy_materials", with_materials, False, True, "smd"),
+                ("legacy_no_materials", no_materials, False, True, "smd"),
+                ("legacy_collision", no_materials, True, True, "smd"),
+            ]
+        for variant, obj, is_collision, use_legacy, mesh_format in variants:
+            path = os.path.join(work_dir, variant)
+            written = []
+            result = measure(lambda: written.append(smd_export.exportObjectToSmd(obj, path, is_collision, use_legacy=use_legacy, mesh_format=mesh_format)),
+                             get_repeat_count(triangle_count))
+            if written[-1] != triangle_count:
+                raise RuntimeError(f"export {variant}: wrote {written[-1]} of {triangle_count} triangles")
+            result["triangles"] = triangle_count
+            result["triangles_per_second"] = round(triangle_count / result["seconds"])
+            result["bytes"] = os.path.getsize(f"{path}.{mesh_format}")
+            os.remove(f"{path}.{mesh_format}")
+            report_result(results, f"export/{variant}/{format_count(triangle_count)}", result)
+
+def benchmark_islands(addon, results: Dict[str, Dict[str, Any]], triangle_counts: List[int]):
+    mesh_islands = import_addon_module("mesh_islands")
+    for triangle_count in triangle_counts:
+        mesh = make_mesh(f"islands_{triangle_count}", triangle_count, island_triangles=ISLAND_TRIANGLES)
+        mesh.edges.get_array("vertices") # Built lazily by the stand-in, keep it out of the timing
+        islands = []
+        result = measure(lambda: islands.append(mesh_islands.find_mesh_islands(mesh)), get_repeat_count(triangle_count))
+        result["triangles"] = triangle_count
+        result["islands"] = islands[-1].count
+        report_result(results, f"islands/find_mesh_islands/{format_count(triangle_count)}", result)
+
+def benchmark_lods(addon, results: Dict[str, Dict[str, Any]], triangle_counts: List[int]):
+    smd_export = import_addon_module("smd_export")
+    lod = import_addon_module("lod")
+    for triangle_count in triangle_counts:
+        arrays = smd_export.read_mesh_arrays(make_mesh(f"lod_{triangle_count}", triangle_count), mathutils.Matrix.Identity(4), True, False)
+        for ratio in LOD_RATIOS:
+            lod_arrays = []
+            result = measure(lambda: lod_arrays.append(lod.decimate_mesh_arrays(arrays, ratio)), get_repeat_count(triangle_count))
+            result["triangles"] = triangle_count
+            result["lod_triangles"] = len(lod_arrays[-1].material_indices)
+            report_result(results, f"lod/decimate_{int(ratio * 100)}/{format_count(triangle_count)}", result)
+
+def benchmark_collision(addon, results: Dict[str, Dict[str, Any]], triangle_counts: List[int]):
+    smd_export = import_addon_module("smd_export")
+    collision_hulls = import_addon_module("collision_hulls")
+    hull_settings = collision_hulls.CollisionHullSettings()
+    for triangle_count in triangle_counts:
+        arrays = smd_export.read_mesh_arrays(make_mesh(f"collision_{triangle_count}", triangle_count), mathutils.Matrix.Identity(4), False, False)
+        hulls = []
+        result = measure(lambda: hulls.append(collision_hulls.build_collision_arrays(arrays, hull_settings)), get_repeat_count(triangle_count))
+        result["triangles"] = triangle_count
+        result["hulls"] = hulls[-1][1]
+        report_result(results, f"collision/generate_hulls/{format_count(triangle_count)}", result)
+
+def benchmark_materials(addon, results: Dict[str, Dict[str, Any]], material_counts: List[int], work_dir: str):
+    materials = import_addon_module("materials")
+    for material_count in material_counts:
+        # A quarter of the base materials have three skins, like a prop set with color variants
+        names = []
+        for i in range(material_count):
+            names.append(f"Material{i:04d}")
+            if i % 4 == 0:
+                names += [f"Material{i:04d}_skin{skin}" for skin in (1, 2, 3)]
+            if len(names) >= material_count:
+                break
+        slots = [bpy.MaterialSlot(bpy.Material(name)) for name in names[:material_count]]
+        base_materials, skin_groups = materials.parse_material_skins(slots)
+        calls = range(MATERIAL_CALLS_PER_RUN)
+        result = measure(lambda: [materials.parse_material_skins(slots) for _ in calls], 5)
+        result["materials"] = material_count
+        result["calls_per_run"] = MATERIAL_CALLS_PER_RUN
+        report_result(results, f"materials/parse_material_skins/{material_count}", result)
+        result = measure(lambda: [materials.generate_texturegroup_qc(base_materials, skin_groups) for _ in calls], 5)
+        result["materials"] = material_count
+        result["calls_per_run"] = MATERIAL_CALLS_PER_RUN
+        report_result(results, f"materials/generate_texturegroup_qc/{material_count}", result)
+
+    # A collection compile's material work: index, $texturegroup and placeholder VMTs for every model
+    pool = [bpy.Material(f"Kit{i:03d}" + (f"_skin{i % 3 + 1}" if i % 5 == 4 else "")) for i in range(200)]
+    slot_lists = []
+    for i in range(INDEX_OBJECTS):
+        palette = i % INDEX_MATERIAL_SETS
+        slot_lists.append((f"piece{i:03d}", [bpy.MaterialSlot(pool[(palette * 7 + j) % len(pool)]) for j in range(INDEX_MATERIALS_PER_OBJECT)]))
+    cdmaterials = ["models/benchmark/kit/"]
+    runs = iter(range(1_000_000))
+
+    def compile_materials():
+        models_root = os.path.join(work_dir, f"materials_index_{next(runs)}", "models")
+        index = materials.MaterialIndex()
+        for object_name, slots in slot_lists:
+            index.add_object(object_name, slots)
+        for object_name, slots in slot_lists:
+            material_names = index.get_materials(object_name, slots)
+            index.get_texturegroup_qc(material_names)
+            index.create_material_files(models_root, cdmaterials, list(material_names), True)
+
+    result = measure(compile_materials, 5)
+    result["objects"] = INDEX_OBJECTS
+    result["materials_per_object"] = INDEX_MATERIALS_PER_OBJECT
+    report_result(results, f"materials/index/{INDEX_OBJECTS}x{INDEX_MATERIALS_PER_OBJECT}", result)
+
+def benchmark_execute(addon, results: Dict[str, Dict[str, Any]], object_counts: List[int], studiomdl_latency: float, work_dir: str):
+    if os.name == "nt":
+        # The fake studiomdl is a script with a shebang, Windows can't start it as studiomdl.exe
+        print("Skipping the end-to-end benchmarks, they need a POSIX system.")
+        return
+    os.environ["FAKE_STUDIOMDL_LATENCY"] = str(studiomdl_latency)
+    game_dir = install_fake_studiomdl(os.path.join(work_dir, "game"))
+    for object_count, linked_duplicates in [(object_count, False) for object_count in object_counts] + [(object_counts[0], True)]:
+        reset_blend_data()
+        models = []
+        collision_meshes = []
+        shared_meshes = [make_mesh(f"shared{i:03d}", E2E_OBJECT_TRIANGLES, E2E_MATERIALS) for i in range(E2E_SHARED_MESHES)]
+        for i in range(object_count):
+            if linked_duplicates:
+                # A modular set: every piece is a linked duplicate of a few meshes with one palette
+                models.append(make_object(f"prop{i:03d}", shared_meshes[i % E2E_SHARED_MESHES]))
+                models[-1].material_slots = [bpy.MaterialSlot(bpy.Material(f"palette_material{m}")) for m in range(E2E_MATERIALS)]
+            else:
+                models.append(make_object(f"prop{i:03d}", make_mesh(f"prop{i:03d}", E2E_OBJECT_TRIANGLES, E2E_MATERIALS), E2E_MATERIALS))
+            if i % 2 == 0:
+                # Collision meshes are a few boxes, every other model has one
+                collision_meshes.append(make_object(f"COL_prop{i:03d}", make_mesh(f"COL_prop{i:03d}", 48, island_triangles=12)))
+        collection = bpy.BlendCollection("Props", models, [bpy.BlendCollection("COLLISION", collision_meshes)])
+        bpy.data.collections[collection.name] = collection
+
+        scene = bpy.types.Scene()
+        scene.model_collection = collection
+        scene.game_select = game_dir
+        scene.qc_scale_factor = 1.0
+        bpy.context.scene = scene
+        bpy.data.filepath = os.path.join(game_dir, "models", "benchmark", f"props{object_count}.blend")
+        addon.game_select_method_is_dropdown = True
+
+        operator = addon.AutoMDLOperator()
+        operator.force_rebuild = True
+        outcome = []
+        result = measure(lambda: outcome.append(operator.execute(bpy.context)), 1)
+        build = addon.current_build
+        if outcome[-1] != {'FINISHED'} or build.errors:
+            raise RuntimeError(f"execute with {object_count} objects: {outcome[-1]}, {build.errors[:3]}")
+        result["objects"] = object_count
+        result["compiled"] = build.compiled_count
+        result["export_seconds"] = round(build.export_seconds, 4)
+        result["studiomdl_latency"] = studiomdl_latency
+        result["exports_saved"] = build.duplicates.exports_saved
+        report_result(results, f"execute/{object_count}_{'linked_duplicates' if linked_duplicates else 'objects'}", result)
+
+        if not linked_duplicates and object_count == object_counts[-1]:
+            # Compile Changed after editing one model, the others are skipped without evaluating their meshes
+            addon.dirty.mark_dirty(models[0].name)
+            operator.force_rebuild = False
+            operator.changed_only = True
+            result = measure(lambda: outcome.append(operator.execute(bpy.context)), 1)
+            build = addon.current_build
+            if outcome[-1] != {'FINISHED'} or build.errors:
+                raise RuntimeError(f"execute changed with {object_count} objects: {outcome[-1]}, {build.errors[:3]}")
+            result["objects"] = object_count
+            result["compiled"] = build.compiled_count
+            result["up_to_date"] = build.skipped_count
+            report_result(results, f"execute/{object_count}_changed_one", result)
+
+    # A command line compile that can't start still exits with its code and writes a summary
+    cli = import_addon_module("cli")
+    summary_path = os.path.join(work_dir, "setup_failed.automdl-summary.json")
+    exit_codes = []
+    result = measure(lambda: exit_codes.append(cli.run_cli(["--collection", "Missing", "--game", game_dir, "--summary", summary_path], bpy.context)), 1)
+    if exit_codes[-1] != cli.CLI_EXIT_SETUP_FAILED or not os.path.isfile(summary_path):
+        raise RuntimeError(f"command line setup failure: exit code {exit_codes[-1]}, summary written: {os.path.isfile(summary_path)}")
+    with open(summary_path, "r", encoding="utf-8") as file:
+        if json.load(file).get("exit_code") != cli.CLI_EXIT_SETUP_FAILED:
+            raise RuntimeError("command line setup failure: the summary has the wrong exit code")
+    report_result(results, "execute/cli_setup_failed", result)
+
+def report_result(results: Dict[str, Dict[str, Any]], name: str, result: Dict[str, Any]):
+    result["seconds"] = round(result["seconds"], 6)
+    result["min"] = round(result["min"], 6)
+    results[name] = result
+    print(f"{name:<48} {result['seconds'] * 1000:>12.2f} ms")
+
+
+# --- Results ---
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, min_seconds: float) -> List[str]:
+    """Prints how every metric changed, returns the names of the ones that regressed past threshold."""
+    regressions = []
+    print(f"{'metric':<48} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name, base in baseline["results"].items():
+        result = current["results"].get(name)
+        if result is None:
+            print(f"{name:<48} {base['seconds'] * 1000:>10.2f}ms {'missing':>12}")
+            continue
+        change = result["seconds"] / base["seconds"] - 1 if base["seconds"] > 0 else 0.0
+        is_noise = max(base["seconds"], result["seconds"]) < min_seconds
+        regressed = change > threshold and not is_noise
+        if regressed:
+            regressions.append(name)
+        flag = "  REGRESSED" if regressed else ("  (noise)" if is_noise else "")
+        print(f"{name:<48} {base['seconds'] * 1000:>10.2f}ms {result['seconds'] * 1000:>10.2f}ms {change:>+8.1%}{flag}")
+    for name in current["results"].keys() - baseline["results"].keys():
+        print(f"{name:<48} {'new':>12} {current['results'][name]['seconds'] * 1000:>10.2f}ms")
+    return regressions
+
+def read_results(path: str) -> Dict[str, Any]:
+    with open(path, "r") as file:
+        results = json.load(file)
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path}: unsupported benchmark results version {results.get('version')}")
+    return results
+
+def write_results(path: str, results: Dict[str, Any]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+def report_comparison(baseline_path: str, current: Dict[str, Any], threshold: float, min_seconds: float) -> int:
+    regressions = compare_results(read_results(baseline_path), current, threshold, min_seconds)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"No metric regressed by more than {threshold:.0%}.")
+    return 0
+
+
+# --- Command Line ---
+
+def parse_counts(text: str) -> List[int]:
+    return [int(float(value)) for value in text.split(",") if value.strip()]
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks the AutoMDL exporter and compile pipeline outside Blender.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument("--output", default="benchmark-results.json", help="Where to write the results")
+    run_parser.add_argument("--quick", action="store_true", help="Skip the 1M+ triangle meshes, the 500 object collection and the slow legacy exports")
+    run_parser.add_argument("--triangles", type=parse_counts, help="Comma separated mesh sizes in triangles (default: 1k to 5M)")
+    run_parser.add_argument("--objects", type=parse_counts, help="Comma separated collection sizes of the end-to-end benchmark (default: 10,100,500)")
+    run_parser.add_argument("--materials", type=parse_counts, default=DEFAULT_MATERIAL_COUNTS, help="Comma separated material counts (default: 100,500)")
+    run_parser.add_argument("--legacy-max-triangles", type=int, default=DEFAULT_LEGACY_MAX_TRIANGLES, help="Largest mesh the legacy exporters are timed on")
+    run_parser.add_argument("--studiomdl-latency", type=float, default=DEFAULT_STUDIOMDL_LATENCY, help="Seconds each fake studiomdl run takes")
+    run_parser.add_argument("--only", action="append", help="Only run the benchmark groups starting with this (export, islands, lod, collision, materials, execute), repeatable")
+    run_parser.add_argument("--compare", metavar="BASELINE", help="Compare with earlier results, exits with 1 on a regression")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before a metric counts as regressed (default: 0.2 = 20%%)")
+    run_parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS, help="Metrics faster than this are never counted as regressed")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files, exits with 1 on a regression")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before a metric counts as regressed (default: 0.2 = 20%%)")
+    compare_parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS, help="Metrics faster than this are never counted as regressed")
+    return parser.parse_args(argv)
+
+def run(args: argparse.Namespace) -> int:
+    triangle_counts = args.triangles or (QUICK_TRIANGLE_COUNTS if args.quick else DEFAULT_TRIANGLE_COUNTS)
+    object_counts = args.objects or (QUICK_OBJECT_COUNTS if args.quick else DEFAULT_OBJECT_COUNTS)
+    legacy_max_triangles = min(args.legacy_max_triangles, QUICK_LEGACY_MAX_TRIANGLES) if args.quick else args.legacy_max_triangles
+    groups = args.only or ["export", "islands", "lod", "collision", "materials", "execute"]
+    addon = load_addon()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    work_dir = tempfile.mkdtemp(prefix="automdl_benchmark_")
+    bpy.app.tempdir = os.path.join(work_dir, "blender_temp", "")
+    os.makedirs(bpy.app.tempdir)
+    try:
+        if any(group.startswith("export") for group in groups):
+            benchmark_export(addon, results, triangle_counts, legacy_max_triangles, work_dir)
+        if any(group.startswith("islands") for group in groups):
+            benchmark_islands(addon, results, triangle_counts)
+        if any(group.startswith("lod") for group in groups):
+            benchmark_lods(addon, results, triangle_counts)
+        if any(group.startswith("collision") for group in groups):
+            benchmark_collision(addon, results, triangle_counts)
+        if any(group.startswith("materials") for group in groups):
+            benchmark_materials(addon, results, args.materials, work_dir)
+        if any(group.startswith("execute") for group in groups):
+            benchmark_execute(addon, results, object_counts, args.studiomdl_latency, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if args.only:
+        results = {name: result for name, result in results.items() if any(name.startswith(prefix) for prefix in args.only)}
+
+    output = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "addon_version": list(addon.bl_info["version"]),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    write_results(args.output, output)
+    print(f"Results written to '{args.output}'.")
+    if args.compare:
+        return report_comparison(args.compare, output, args.threshold, args.min_seconds)
+    return 0
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    if args.command == "compare":
+        return report_comparison(args.baseline, read_results(args.current), args.threshold, args.min_seconds)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
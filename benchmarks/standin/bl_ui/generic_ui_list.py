@@ -0,0 +1,2 @@
+def draw_ui_list(*args, **kwargs):
+    pass
@@ -0,0 +1,392 @@
+"""Minimal bpy stand-in for the benchmarks, only what the add-on touches.
+
+Meshes are triangle-only and backed by NumPy arrays, so foreach_get is a plain copy like
+in Blender and the per-element access the legacy exporter uses goes through small proxy
+objects. Operators, panels and properties are just enough for the add-on to import,
+register and run AutoMDLOperator.execute().
+"""
+
+import os
+import sys
+import tempfile
+import types as _types
+import numpy as np
+import mathutils
+
+
+# --- Properties ---
+
+class _Property:
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        self.kwargs = kwargs
+        self.default = kwargs.get("default")
+
+
+def _property_factory(kind):
+    def make(**kwargs):
+        return _Property(kind, **kwargs)
+    return make
+
+
+props = _types.SimpleNamespace(**{kind: _property_factory(kind) for kind in (
+    "BoolProperty", "StringProperty", "IntProperty", "FloatProperty", "EnumProperty",
+    "PointerProperty", "CollectionProperty")})
+
+
+class _PropertyCollection(list):
+    def add(self):
+        item = _types.SimpleNamespace(name="")
+        self.append(item)
+        return item
+
+    def clear(self):
+        del self[:]
+
+
+class _PropertyHost:
+    """Reading a property that was never set returns its default, like an RNA struct."""
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if isinstance(value, _Property): # Assigned to the class in register(), e.g. bpy.types.Scene.surfaceprop
+            value = _PropertyCollection() if value.kind == "CollectionProperty" else value.default
+            object.__setattr__(self, name, value)
+        return value
+
+    def __getattr__(self, name):
+        for cls in type(self).__mro__:
+            prop = cls.__dict__.get(name) or cls.__dict__.get("__annotations__", {}).get(name)
+            if isinstance(prop, _Property):
+                value = _PropertyCollection() if prop.kind == "CollectionProperty" else prop.default
+                object.__setattr__(self, name, value)
+                return value
+        raise AttributeError(name)
+
+
+class Operator(_PropertyHost):
+    bl_idname = ""
+
+    def __init__(self):
+        self.reports = []
+
+    def report(self, level, message):
+        self.reports.append((set(level), message))
+
+
+class Panel:
+    pass
+
+
+class PropertyGroup:
+    pass
+
+
+class UIList:
+    pass
+
+
+class AddonPreferences(_PropertyHost):
+    pass
+
+
+class Scene(_PropertyHost):
+    pass
+
+
+class Collection:
+    pass
+
+
+types = _types.SimpleNamespace(Operator=Operator, Panel=Panel, PropertyGroup=PropertyGroup, UIList=UIList,
+                               AddonPreferences=AddonPreferences, Scene=Scene, Collection=Collection,
+                               Object=object, Mesh=object, Depsgraph=object)
+
+
+# --- Mesh Data ---
+
+class _Element:
+    __slots__ = ("_sequence", "index")
+
+    def __init__(self, sequence, index):
+        self._sequence = sequence
+        self.index = index
+
+    def __getattr__(self, name):
+        values = self._sequence.get_array(name)
+        value = values[self.index]
+        if values.ndim == 2:
+            return mathutils.Vector(value) if values.dtype.kind == "f" else tuple(int(v) for v in value)
+        return value.item()
+
+
+class _Sequence:
+    """bpy_prop_collection of mesh elements.
+
+    Attributes are arrays, or callables building them on first use. A count of None is
+    taken from the first attribute.
+    """
+
+    def __init__(self, count, **attributes):
+        self._count = count
+        self._attributes = attributes
+
+    def get_array(self, name):
+        values = self._attributes[name]
+        if callable(values):
+            values = values()
+            self._attributes[name] = values
+        return values
+
+    def __len__(self):
+        if self._count is None:
+            self._count = len(self.get_array(next(iter(self._attributes))))
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0 or index >= len(self):
+            raise IndexError(index)
+        return _Element(self, index)
+
+    def __iter__(self):
+        return (_Element(self, i) for i in range(len(self)))
+
+    def foreach_get(self, name, out):
+        values = self.get_array(name).reshape(-1)
+        if len(out) != len(values):
+            raise RuntimeError(f"foreach_get('{name}'): array of {len(out)} for {len(values)} values")
+        out[:] = values
+
+
+def _get_triangle_normals(co, triangles):
+    a, b, c = co[triangles[:, 0]], co[triangles[:, 1]], co[triangles[:, 2]]
+    normals = np.cross(b - a, c - a)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def _get_vertex_normals(co, triangles, triangle_normals):
+    vertex_indices = triangles.reshape(-1)
+    normals = np.empty((len(co), 3))
+    for axis in range(3):
+        normals[:, axis] = np.bincount(vertex_indices, weights=np.repeat(triangle_normals[:, axis], 3), minlength=len(co))
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+
+def _get_edges(triangles, vertex_count):
+    pairs = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    pairs.sort(axis=1)
+    keys = np.unique(pairs[:, 0].astype(np.int64) * vertex_count + pairs[:, 1])
+    return np.stack([keys // vertex_count, keys % vertex_count], axis=1).astype(np.int32)
+
+
+class _UVLayer:
+    def __init__(self, uvs, name="UVMap"):
+        self.name = name
+        self.uvs = uvs
+        self.data = _Sequence(len(uvs), uv=uvs)
+
+
+class _UVLayers(list):
+    @property
+    def active(self):
+        return self[0] if self else None
+
+
+class Mesh:
+    """Triangle-only mesh, every polygon is one loop triangle."""
+
+    def __init__(self, name, co, triangles, uvs=None, use_smooth=None, material_index=None):
+        self.name = name
+        self.users = 1
+        triangles = np.asarray(triangles, np.int32).reshape(-1, 3)
+        count = len(triangles)
+        self._set_arrays(
+            np.asarray(co, np.float32).reshape(-1, 3), triangles,
+            None if uvs is None else np.asarray(uvs, np.float32).reshape(-1, 2),
+            np.ones(count, bool) if use_smooth is None else np.asarray(use_smooth, bool),
+            np.zeros(count, np.int32) if material_index is None else np.asarray(material_index, np.int32))
+
+    def _set_arrays(self, co, triangles, uvs, use_smooth, material_index):
+        self._co = co
+        self._triangles = triangles
+        self._uvs = uvs
+        self._use_smooth = use_smooth
+        self._material_index = material_index
+        count = len(triangles)
+        co64 = co.astype(np.float64)
+        triangle_normals = _get_triangle_normals(co64, triangles)
+        loops = np.arange(count * 3, dtype=np.int32).reshape(-1, 3)
+        self.vertices = _Sequence(len(co), co=co, normal=_get_vertex_normals(co64, triangles, triangle_normals).astype(np.float32))
+        self.edges = _Sequence(None, vertices=lambda: _get_edges(triangles, len(co))) # Only islands need them
+        self.loops = _Sequence(count * 3, vertex_index=triangles.reshape(-1))
+        self.polygons = _Sequence(count, use_smooth=use_smooth, material_index=material_index, vertices=triangles,
+                                  loop_total=np.full(count, 3, np.int32), loop_start=loops[:, 0].copy(),
+                                  normal=triangle_normals.astype(np.float32))
+        self.loop_triangles = _Sequence(count, vertices=triangles, loops=loops, material_index=material_index,
+                                        use_smooth=use_smooth, normal=triangle_normals.astype(np.float32),
+                                        polygon_index=np.arange(count, dtype=np.int32))
+        self.uv_layers = _UVLayers()
+        if uvs is not None:
+            self.uv_layers.append(_UVLayer(uvs))
+
+    def calc_loop_triangles(self):
+        pass
+
+    def transform(self, matrix):
+        rotation = np.asarray(matrix)[:3, :3]
+        co = (self._co.astype(np.float64) @ rotation.T).astype(np.float32)
+        self._set_arrays(co, self._triangles, self._uvs, self._use_smooth, self._material_index)
+
+    def copy(self):
+        # Shares the arrays, transform() replaces them instead of writing into them
+        mesh = Mesh.__new__(Mesh)
+        mesh.__dict__.update(self.__dict__)
+        return mesh
+
+
+class Material:
+    def __init__(self, name):
+        self.name = name
+
+
+class MaterialSlot:
+    def __init__(self, material):
+        self.material = material
+
+    @property
+    def name(self):
+        return self.material.name if self.material else ""
+
+
+class Object:
+    def __init__(self, name, mesh=None, materials=(), matrix_world=None, type='MESH'):
+        self.name = name
+        self.type = type
+        self.data = mesh
+        self.material_slots = [MaterialSlot(material) for material in materials]
+        self.modifiers = []
+        self.matrix_world = matrix_world or mathutils.Matrix.Identity(4)
+        self.hidden = False
+        self.mode = 'OBJECT'
+        self.users_collection = []
+
+    def hide_get(self):
+        return self.hidden
+
+    def evaluated_get(self, depsgraph):
+        return self
+
+    def to_mesh(self):
+        return self.data.copy()
+
+    def to_mesh_clear(self):
+        pass
+
+
+class BlendCollection:
+    def __init__(self, name, objects=(), children=()):
+        self.name = name
+        self.objects = list(objects)
+        self.children = list(children)
+        self.all_objects = self.objects
+        for obj in self.objects:
+            obj.users_collection.append(self)
+
+
+class _IDCollection(dict):
+    """bpy.data.objects and friends: keyed by name, iterates over the values."""
+
+    def __contains__(self, key):
+        if isinstance(key, str):
+            return dict.__contains__(self, key)
+        return any(value is key for value in self.values())
+
+    def __iter__(self):
+        return iter(self.values())
+
+
+data = _types.SimpleNamespace(filepath="", objects=_IDCollection(), meshes=_IDCollection(),
+                              materials=_IDCollection(), collections=_IDCollection(), scenes=[], is_dirty=False)
+
+
+# --- Context and App ---
+
+class _AddonEntry:
+    def __init__(self, preferences):
+        self.preferences = preferences
+
+
+class _Context:
+    def __init__(self):
+        self.scene = None
+        self.mode = 'OBJECT'
+        self.active_object = None
+        self.window = None
+        self.area = None
+        self.preferences = _types.SimpleNamespace(addons={})
+        self.window_manager = _types.SimpleNamespace(
+            windows=[], progress_begin=lambda low, high: None, progress_update=lambda value: None,
+            progress_end=lambda: None, event_timer_add=lambda *args, **kwargs: object(),
+            event_timer_remove=lambda timer: None, modal_handler_add=lambda operator: None)
+
+    def evaluated_depsgraph_get(self):
+        return _types.SimpleNamespace(updates=[])
+
+
+context = _Context()
+
+
+class _Timers:
+    """Timers are recorded, never run."""
+
+    def __init__(self):
+        self.registered = []
+
+    def register(self, function, first_interval=0, persistent=False):
+        self.registered.append(function)
+
+    def unregister(self, function):
+        if function in self.registered:
+            self.registered.remove(function)
+
+    def is_registered(self, function):
+        return function in self.registered
+
+
+def _persistent(function):
+    return function
+
+
+app = _types.SimpleNamespace(
+    tempdir=os.path.join(tempfile.gettempdir(), ""), timers=_Timers(), background=True,
+    version=(4, 0, 0), binary_path=sys.executable,
+    handlers=_types.SimpleNamespace(persistent=_persistent, depsgraph_update_post=[], save_pre=[], save_post=[],
+                                    load_pre=[], load_post=[]))
+
+
+def _register_class(cls):
+    pass
+
+
+def _register_classes_factory(classes):
+    return (lambda: None), (lambda: None)
+
+
+def _user_resource(resource_type, path="", create=False):
+    resource_path = os.path.join(tempfile.gettempdir(), "automdl_benchmark_config", resource_type.lower(), path)
+    if create:
+        os.makedirs(resource_path, exist_ok=True)
+    return resource_path
+
+
+utils = _types.SimpleNamespace(register_class=_register_class, unregister_class=_register_class,
+                               register_classes_factory=_register_classes_factory, user_resource=_user_resource)
+ops = _types.SimpleNamespace(object=_types.SimpleNamespace(mode_set=lambda mode: None),
+                             uilist=_types.SimpleNamespace(entry_add=lambda **kwargs: None),
+                             wm=_types.SimpleNamespace())
+
+sys.modules["bpy.types"] = types
+sys.modules["bpy.props"] = props
+sys.modules["bpy.utils"] = utils
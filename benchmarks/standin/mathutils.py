@@ -0,0 +1,99 @@
+"""Minimal mathutils stand-in backed by NumPy."""
+import math
+import numpy as np
+
+
+class Vector:
+    def __init__(self, values=(0.0, 0.0, 0.0)):
+        self._v = [float(v) for v in values]
+
+    def __getitem__(self, i):
+        return self._v[i]
+
+    def __len__(self):
+        return len(self._v)
+
+    def __iter__(self):
+        return iter(self._v)
+
+    x = property(lambda self: self._v[0])
+    y = property(lambda self: self._v[1])
+    z = property(lambda self: self._v[2])
+
+
+class Quaternion:
+    def __init__(self, wxyz=(1.0, 0.0, 0.0, 0.0)):
+        self.wxyz = tuple(float(v) for v in wxyz)
+
+    def to_matrix(self):
+        w, x, y, z = self.wxyz
+        return Matrix([
+            [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+            [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+            [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+        ])
+
+
+class Matrix:
+    def __init__(self, rows=None):
+        self._m = np.identity(4) if rows is None else np.array(rows, dtype=np.float64)
+
+    @classmethod
+    def Identity(cls, size):
+        return cls(np.identity(size))
+
+    @classmethod
+    def Diagonal(cls, values):
+        return cls(np.diag([float(v) for v in values]))
+
+    @classmethod
+    def Rotation(cls, angle, size, axis):
+        c, s = math.cos(angle), math.sin(angle)
+        rows = {"X": [[1, 0, 0], [0, c, -s], [0, s, c]],
+                "Y": [[c, 0, s], [0, 1, 0], [-s, 0, c]],
+                "Z": [[c, -s, 0], [s, c, 0], [0, 0, 1]]}[axis]
+        m = cls(rows)
+        return m.to_4x4() if size == 4 else m
+
+    def __array__(self, dtype=None, copy=None):
+        return self._m.astype(dtype) if dtype else self._m.copy()
+
+    def __iter__(self):
+        return iter([Vector(r) for r in self._m])
+
+    def __len__(self):
+        return len(self._m)
+
+    def __matmul__(self, other):
+        return Matrix(self._m @ np.asarray(other._m))
+
+    def to_3x3(self):
+        return Matrix(self._m[:3, :3])
+
+    def to_4x4(self):
+        m = np.identity(4)
+        n = min(len(self._m), 4)
+        m[:n, :n] = self._m[:n, :n]
+        return Matrix(m)
+
+    def decompose(self):
+        m = self._m
+        loc = Vector(m[:3, 3]) if len(m) == 4 else Vector()
+        basis = m[:3, :3]
+        scale = np.linalg.norm(basis, axis=0)
+        rot = basis / np.where(scale == 0, 1, scale)
+        # matrix -> quaternion
+        t = np.trace(rot)
+        if t > 0:
+            s = math.sqrt(t + 1.0) * 2
+            q = ((0.25 * s), (rot[2, 1] - rot[1, 2]) / s, (rot[0, 2] - rot[2, 0]) / s, (rot[1, 0] - rot[0, 1]) / s)
+        else:
+            i = int(np.argmax(np.diag(rot)))
+            j, k = (i + 1) % 3, (i + 2) % 3
+            s = math.sqrt(1.0 + rot[i, i] - rot[j, j] - rot[k, k]) * 2
+            q = [0.0] * 4
+            q[0] = (rot[k, j] - rot[j, k]) / s
+            q[1 + i] = 0.25 * s
+            q[1 + j] = (rot[j, i] + rot[i, j]) / s
+            q[1 + k] = (rot[k, i] + rot[i, k]) / s
+        return loc, Quaternion(q), Vector(scale)
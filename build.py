@@ -0,0 +1,984 @@
+"""One compile of a collection: settings, export, QC writing and the compile queue."""
+
+import bpy
+import os
+import json
+import time
+from typing import List, Dict, Any, Set, Tuple, Optional
+from dataclasses import dataclass, field
+
+from . import bl_info, is_float
+from .model_paths import get_models_path, get_relative_dir_path
+from .materials import MaterialIndex
+from .smd_export import exportObjectToSmd
+from .lod import LodLevel, get_lod_levels
+from .collision_hulls import CollisionHullSettings
+from .mesh_islands import find_object_islands
+from .manifest import CompileManifest, get_manifest_path, get_model_fingerprint, get_model_outputs, get_inputs_key
+from .compiler import CompileJob, CompileResult, CompilePolicy, StudiomdlScheduler, get_compile_job_count
+from .diagnostics import Diagnostic
+from .dedup import DuplicateIndex, get_alias_list_path, link_mesh_file
+from .validation import (get_model_candidates, get_collision_collection, find_collision_object, sanitize_model_name,
+                         validate_collection, count_validation_issues)
+from .tracing import Tracer, get_trace_path
+from .artifact_cache import ArtifactCache, get_file_digest
+from .workspace import ScratchWorkspace, get_default_scratch_root, get_ram_scratch_root, remove_orphaned_workspaces
+
+
+@dataclass
+class BuildSettings:
+    """Everything a collection compile reads, so it can run from the UI or from the command line."""
+    blend_path: str
+    collection_name: str
+    game_dir: str
+    studiomdl_exe: str
+    staticprop: bool = False
+    mass: Any = 35.0 # None if the mass entered in the panel isn't a number
+    surfaceprop: str = "Concrete"
+    mostlyopaque: bool = False
+    scale_factor: float = 100.0
+    cdmaterials_type: str = '0' # '0' same as MDL, '1' manual list
+    cdmaterials_manual: List[str] = field(default_factory=list)
+    make_folders: bool = True
+    make_vmts: bool = True
+    mesh_format: str = "smd" # "smd" or "dmx", see dmx_export.py
+    lods: List[LodLevel] = field(default_factory=list) # Decimated $lod copies of the visual mesh, see lod.py
+    generate_collision: bool = False # Convex hulls of the visual mesh for models without a COL_ mesh, see collision_hulls.py
+    simplify_collision: bool = False # Export COL_ meshes as convex hulls too, one per island
+    collision_hull_vertices: int = 32
+    collision_max_pieces: int = 16 # Generated collision is cut and merged into at most this many hulls
+    compile_aliases: bool = False # Compile models with identical meshes once, see dedup.py
+    use_legacy_export: bool = False
+    smd_precision: int = 6
+    smd_uv_precision: int = 6
+    smd_collision_precision: int = 6
+    smd_threaded_writer: bool = True
+    compile_jobs: int = 0
+    compile_timeout: float = 120.0 # Seconds per studiomdl run, 0 for none, see CompilePolicy
+    compile_timeout_per_k_triangles: float = 10.0
+    hang_timeout: float = 300.0 # No output and no CPU use for this long kills studiomdl, 0 to never check
+    compile_retries: int = 1
+    scratch_dir: str = "" # Root of the per-run temp folders, empty for the default, see workspace.py
+    scratch_in_ram: bool = False # Put them on a RAM disk (/dev/shm) when there is one
+    keep_failed_scratch: bool = True # Leave the temp files of failed models for inspection
+    artifact_cache_dir: str = "" # Compiled models cache shared between runs and machines, empty for none, see artifact_cache.py
+    artifact_cache_gb: float = 10.0 # Least recently used models are evicted above this size
+    validate: bool = True
+    force_rebuild: bool = False
+    changed_objects: Optional[List[str]] = None # Compile Changed: objects edited since their compile, see dirty.py
+    trace: bool = False # Record per-stage timings, see tracing.py
+    trace_memory: bool = False
+
+def get_build_settings(scene, addon_prefs, blend_path: str, collection_name: str, game_dir: str, studiomdl_exe: str) -> BuildSettings:
+    """Reads the compile settings stored in the .blend file and the add-on preferences.
+
+    Args:
+        addon_prefs: The AutoMDL preferences, or None to use their defaults (e.g. when the
+            add-on was enabled from the command line without saving the preferences).
+    """
+    settings = BuildSettings(
+        blend_path=blend_path,
+        collection_name=collection_name,
+        game_dir=game_dir,
+        studiomdl_exe=studiomdl_exe,
+        staticprop=scene.staticprop,
+        mass=float(scene.mass_text_input) if is_float(scene.mass_text_input) else None,
+        surfaceprop=scene.surfaceprop,
+        mostlyopaque=scene.mostlyopaque,
+        scale_factor=scene.qc_scale_factor,
+        cdmaterials_type=scene.cdmaterials_type,
+        cdmaterials_manual=[item.name for item in scene.cdmaterials_list],
+        mesh_format=scene.mesh_format.lower(),
+        lods=[LodLevel(item.ratio / 100.0, item.distance) for item in scene.lod_list] if scene.generate_lods else [],
+        generate_collision=scene.generate_collision,
+        simplify_collision=scene.simplify_collision,
+        collision_hull_vertices=scene.collision_hull_vertices,
+        collision_max_pieces=scene.collision_max_pieces,
+        compile_aliases=scene.compile_duplicates_as_aliases,
+    )
+    if addon_prefs is not None:
+        settings.make_folders = addon_prefs.do_make_folders_for_cdmaterials
+        settings.make_vmts = addon_prefs.do_make_vmts
+        settings.use_legacy_export = addon_prefs.use_legacy_smd_export
+        settings.smd_precision = addon_prefs.smd_precision
+        settings.smd_uv_precision = addon_prefs.smd_uv_precision
+        settings.smd_collision_precision = addon_prefs.smd_collision_precision
+        settings.smd_threaded_writer = addon_prefs.smd_threaded_writer
+        settings.compile_jobs = addon_prefs.compile_jobs
+        settings.compile_timeout = addon_prefs.compile_timeout
+        settings.compile_timeout_per_k_triangles = addon_prefs.compile_timeout_per_k_triangles
+        settings.hang_timeout = addon_prefs.hang_timeout
+        settings.compile_retries = addon_prefs.compile_retries
+        settings.scratch_dir = bpy.path.abspath(addon_prefs.scratch_dir) if addon_prefs.scratch_dir else ""
+        settings.scratch_in_ram = addon_prefs.scratch_in_ram
+        settings.keep_failed_scratch = addon_prefs.keep_failed_scratch
+        settings.artifact_cache_dir = bpy.path.abspath(addon_prefs.artifact_cache_dir) if addon_prefs.artifact_cache_dir else ""
+        settings.artifact_cache_gb = addon_prefs.artifact_cache_gb
+        settings.validate = addon_prefs.validate_before_compile
+        settings.trace = addon_prefs.trace_compile
+        settings.trace_memory = addon_prefs.trace_memory
+    return settings
+
+def get_addon_prefs(context):
+    addon = context.preferences.addons.get(__package__)
+    return addon.preferences if addon else None
+
+
+@dataclass
+class ModelReport:
+    """Per-model outcome of a collection compile, written to the command line summary."""
+    object_name: str
+    model_path: str = ""
+    triangles: int = 0
+    mesh_bytes: int = 0 # Size of the exported SMD/DMX files
+    lod_triangles: List[int] = field(default_factory=list) # Per $lod, 0 for levels decimated to nothing
+    alias_of: str = "" # Model compiled instead of this one, see dedup.py
+    from_cache: bool = False # Restored from the artifact cache instead of compiled
+    export_seconds: float = 0.0
+    compile_seconds: float = 0.0
+    outputs: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list) # From the pre-flight validation
+    diagnostics: List[Diagnostic] = field(default_factory=list) # Printed by studiomdl, see diagnostics.py
+    stopped_early: bool = False # studiomdl was stopped at its first fatal error
+    timed_out: bool = False # Stopped by the watchdog: took too long or hung
+    retry_reasons: List[str] = field(default_factory=list) # Why studiomdl was run again
+
+
+class CollectionBuild:
+    """One compile of a collection, advanced one model at a time.
+
+    Exporting has to happen on the main thread because bpy isn't thread-safe, compiling
+    happens on the scheduler's worker threads. The blocking operator and the command line
+    call export_next() in a loop, the modal operator calls it from a timer in small slices
+    so Blender stays responsive while studiomdl runs.
+    """
+
+    def __init__(self, context, settings: BuildSettings, report):
+        self.context = context
+        self.settings = settings
+        self.report = report # Same signature as Operator.report
+        self.scheduler = None
+        self.candidate_names: List[str] = []
+        self.next_candidate = 0
+        self.statuses: Dict[str, str] = {} # object name: status text for the panel
+        self.model_reports: Dict[str, ModelReport] = {}
+        self.errors = []
+        self.validation_results = None # validate_collection() results, None if the collection wasn't validated
+        self.compiled_count = 0
+        self.skipped_count = 0
+        self.queued_count = 0
+        self.exported_triangles = 0
+        self.exported_bytes = 0
+        self.lod_triangles = 0
+        self.export_seconds = 0.0
+        self.start_time = time.perf_counter()
+        self.tracer = Tracer(settings.trace, settings.trace_memory)
+        self.trace_path = "" # Set once the trace is written
+        self.is_finished = False
+        self.was_cancelled = False
+        self.cancel_requested = False # Set by request_cancel(), the modal operator cancels on its next tick
+        self.duplicates = DuplicateIndex(None) # Filled in start()
+        self.workspace = None # Scratch folder of this run, created in start()
+        self.kept_scratch_dir = "" # Set if the temp files of failed models were kept
+        self.artifact_cache = None # Set in start() if a cache folder is configured
+        self.mesh_ext = settings.mesh_format
+        self.lod_levels = get_lod_levels(settings.lods)
+
+    def start(self) -> bool:
+        """Validates the settings and starts the compile workers. Returns False if the compile can't start."""
+        settings = self.settings
+
+        blend_path = settings.blend_path
+        if not blend_path:
+            self.report({'ERROR'}, "Please save the project file first.")
+            return False
+
+        self.models_root = get_models_path(blend_path)
+        if not self.models_root:
+             self.report({'ERROR'}, "Please save the project inside a 'models' folder structure.")
+             return False
+
+
+        if settings.staticprop:
+            settings.mass = 1
+        elif settings.mass is None:
+            self.report({'ERROR'}, "Mass value is invalid.")
+            return False
+             
+        self.selected_collection = bpy.data.collections.get(settings.collection_name)
+        if not self.selected_collection:
+            self.report({'ERROR'}, f"Collection '{settings.collection_name}' not found.")
+            return False
+        
+        # Calculate base relative path from blend file location ONCE
+        try:
+            self.relative_dir_path = get_relative_dir_path(blend_path, self.models_root)
+        except ValueError:
+            self.report({'ERROR'}, "Blend file is not saved within the expected 'models' directory structure.")
+            return False
+
+        # --- Incremental Compile Manifest ---
+        self.manifest = CompileManifest(get_manifest_path(blend_path))
+        self.manifest.load()
+        # Settings shared by every model, changing any of them rebuilds the whole collection
+        self.shared_inputs = json.dumps({
+            "addon_version": list(bl_info["version"]),
+            "studiomdl": settings.studiomdl_exe,
+            "game": settings.game_dir,
+            "scale": settings.scale_factor,
+            "staticprop": settings.staticprop,
+            "mass": settings.mass,
+            "surfaceprop": settings.surfaceprop,
+            "mostlyopaque": settings.mostlyopaque,
+            "cdmaterials_type": settings.cdmaterials_type,
+            "cdmaterials": settings.cdmaterials_manual,
+            "mesh_format": settings.mesh_format,
+            "lods": [[level.ratio, level.distance] for level in get_lod_levels(settings.lods)],
+            "collision_hulls": [settings.generate_collision, settings.simplify_collision, settings.collision_hull_vertices, settings.collision_max_pieces],
+            "legacy_export": settings.use_legacy_export,
+            "precision": [settings.smd_precision, settings.smd_uv_precision, settings.smd_collision_precision],
+        }, sort_keys=True)
+        self.depsgraph = self.context.evaluated_depsgraph_get()
+        
+        # --- Find Collision Sub-Collection --- 
+        self.collision_sub_collection = get_collision_collection(self.selected_collection)
+
+        # --- Objects to process ---
+        self.used_model_paths: Set[str] = set()
+        self.material_index = MaterialIndex()
+        for obj in get_model_candidates(self.selected_collection):
+            self.candidate_names.append(obj.name)
+            self.material_index.add_object(obj.name, obj.material_slots)
+            self.statuses[obj.name] = "Waiting"
+            self.model_reports[obj.name] = ModelReport(obj.name)
+
+        # --- Compile Changed ---
+        if settings.changed_objects is not None and not settings.force_rebuild:
+            self.skip_unchanged(set(settings.changed_objects))
+
+        if not os.path.isfile(settings.studiomdl_exe):
+            self.report({'ERROR'}, f"Studiomdl.exe not found at '{settings.studiomdl_exe}'. Cannot compile.")
+            return False
+
+        self.tracer.start()
+
+        # --- Scratch Workspace ---
+        if not self.create_workspace():
+            self.tracer.stop()
+            return False
+
+        # --- Pre-flight Validation ---
+        if settings.validate:
+            with self.tracer.span("validate", "validate", models=self.total_count):
+                self.validate()
+
+        # --- Group Duplicate Meshes ---
+        with self.tracer.span("dedup", "dedup", models=self.total_count):
+            self.group_duplicates()
+
+        # --- Compiled Model Cache ---
+        if settings.artifact_cache_dir:
+            with self.tracer.span("open_cache", "cache"):
+                self.open_artifact_cache()
+
+        # Compiles run in the background while the next models are exported
+        self.scheduler = StudiomdlScheduler(settings.studiomdl_exe, settings.game_dir, get_compile_job_count(settings.compile_jobs),
+                                            on_job_started=self.on_job_started, tracer=self.tracer, keep_failed=settings.keep_failed_scratch,
+                                            cache=self.artifact_cache, policy=CompilePolicy(settings.compile_timeout, settings.compile_timeout_per_k_triangles,
+                                                                                            settings.hang_timeout, settings.compile_retries))
+        self.report({'INFO'}, f"Compiling with up to {self.scheduler.max_jobs} parallel studiomdl job(s).")
+        return True
+
+    def skip_unchanged(self, changed_objects: Set[str]):
+        """Skips the models whose objects weren't edited since the manifest vouches for them, without evaluating their meshes."""
+        for object_name in self.candidate_names:
+            vis_mesh_obj = bpy.data.objects[object_name]
+            phy_mesh_obj = find_collision_object(self.collision_sub_collection, vis_mesh_obj)
+            if object_name in changed_objects or (phy_mesh_obj is not None and phy_mesh_obj.name in changed_objects):
+                continue
+            model_path = self.get_model_path(sanitize_model_name(object_name))
+            inputs_key = get_inputs_key(self.shared_inputs, phy_mesh_obj.name if phy_mesh_obj else "")
+            if model_path and self.manifest.is_unchanged_since(model_path, object_name, inputs_key, self.models_root):
+                self.statuses[object_name] = "Up to date"
+                self.model_reports[object_name].model_path = model_path
+                self.skipped_count += 1
+        self.report({'INFO'}, f"Compile Changed: {self.skipped_count} unchanged model(s) skipped without evaluating them, "
+                              f"{self.total_count - self.skipped_count} to check.")
+
+    def get_model_path(self, sanitized_name: str) -> str:
+        """Returns the $modelname of a model, without extension."""
+        if not sanitized_name:
+            return ""
+        return os.path.join(self.relative_dir_path, sanitized_name).replace("\\", "/") if self.relative_dir_path else sanitized_name
+
+    def create_workspace(self) -> bool:
+        """Creates this run's scratch folder, after removing the ones left behind by crashed runs."""
+        settings = self.settings
+        scratch_root = settings.scratch_dir or get_default_scratch_root(bpy.app.tempdir)
+        if settings.scratch_in_ram:
+            ram_scratch_root = get_ram_scratch_root()
+            if ram_scratch_root:
+                scratch_root = ram_scratch_root
+            else:
+                self.report({'WARNING'}, f"No RAM disk with enough free space found, writing temp files to '{scratch_root}' instead.")
+        with self.tracer.span("remove_orphans", "io"):
+            removed_count = remove_orphaned_workspaces(scratch_root)
+        if removed_count > 0:
+            self.report({'INFO'}, f"Removed {removed_count} temp folder(s) left behind by earlier compiles.")
+        self.workspace = ScratchWorkspace(scratch_root, settings.keep_failed_scratch)
+        try:
+            self.workspace.create()
+        except OSError as e:
+            self.report({'ERROR'}, f"Failed to create the temp folder in '{scratch_root}': {e}")
+            self.workspace = None
+            return False
+        return True
+
+    def open_artifact_cache(self):
+        """Opens the compiled model cache, keyed to this exact studiomdl binary. Compiles without it if it can't be opened."""
+        settings = self.settings
+        try:
+            artifact_cache = ArtifactCache(settings.artifact_cache_dir, int(settings.artifact_cache_gb * (1 << 30)), get_file_digest(settings.studiomdl_exe))
+            artifact_cache.create()
+        except OSError as e:
+            self.report({'WARNING'}, f"Could not open the compiled model cache '{settings.artifact_cache_dir}': {e}. Compiling without it.")
+            return
+        self.artifact_cache = artifact_cache
+
+    def evict_artifact_cache(self):
+        """Trims the compiled model cache to its size, least recently used models first."""
+        if self.artifact_cache is not None:
+            with self.tracer.span("evict_cache", "cache"):
+                self.artifact_cache.evict()
+
+    def group_duplicates(self):
+        """Keys every candidate's meshes, so models with identical ones can share exports and compiles."""
+        dedup_start = time.perf_counter()
+        self.duplicates.depsgraph = self.depsgraph
+        for object_name in self.candidate_names:
+            vis_mesh_obj = bpy.data.objects.get(object_name)
+            if vis_mesh_obj is None or self.statuses[object_name] in ("Invalid", "Up to date"):
+                continue
+            try:
+                phy_mesh_obj = find_collision_object(self.collision_sub_collection, vis_mesh_obj)
+                self.duplicates.add_model(vis_mesh_obj, phy_mesh_obj, self.get_hull_mode(phy_mesh_obj))
+            except Exception as e:
+                # Compiled on its own and always rebuilt, like before deduplication
+                self.report({'WARNING'}, f"Could not fingerprint '{object_name}' for deduplication and the compile manifest: {e}")
+        self.duplicates.finish_grouping()
+        if not self.duplicates.shared_meshes:
+            return
+        try:
+            shared_dir = self.workspace.make_shared_dir()
+        except OSError as e:
+            self.report({'WARNING'}, f"Failed to create the temp folder for shared meshes: {e}. Exporting them for every model.")
+            self.duplicates.set_shared_dir(None)
+            return
+        self.duplicates.set_shared_dir(shared_dir)
+        self.report({'INFO'}, f"Found {len(self.duplicates.shared_meshes)} mesh(es) shared by several models in {time.perf_counter() - dedup_start:.2f}s, "
+                              f"{self.duplicates.hashed_meshes} distinct mesh(es) hashed.")
+
+    def get_hull_mode(self, phy_mesh_obj) -> str:
+        """Returns how a model's collision is made of convex hulls, see DuplicateIndex.add_model(). Empty if it isn't."""
+        if phy_mesh_obj is None:
+            return "generate" if self.settings.generate_collision else ""
+        return "simplify" if self.settings.simplify_collision else ""
+
+    def get_hull_settings(self, hull_mode: str) -> Optional[CollisionHullSettings]:
+        if not hull_mode:
+            return None
+        # COL_ meshes keep the pieces the artist made, generated collision is cut where the mesh is concave
+        return CollisionHullSettings(self.settings.collision_hull_vertices, self.settings.collision_max_pieces, split_concave=hull_mode == "generate",
+                                     scale_factor=self.settings.scale_factor)
+
+    def validate(self):
+        """Checks every model before exporting, the ones with fatal issues are skipped."""
+        validation_start = time.perf_counter()
+        object_names = {object_name for object_name, status in self.statuses.items() if status != "Up to date"}
+        results = validate_collection(self.selected_collection, self.depsgraph, object_names, self.settings.generate_collision)
+        self.validation_results = results
+        for object_name, issues in results.items():
+            for issue in issues:
+                if object_name not in self.model_reports: # Unused collision meshes
+                    self.report({'WARNING'}, f"'{object_name}': {issue.message}")
+                elif issue.is_fatal:
+                    self.fail(object_name, f"Skipping '{object_name}': {issue.message}")
+                    self.statuses[object_name] = "Invalid"
+                else:
+                    self.report({'WARNING'}, f"'{object_name}': {issue.message}")
+                    self.model_reports[object_name].warnings.append(issue.message)
+        fatal_count, warning_count = count_validation_issues(results)
+        self.report({'INFO'}, f"Validated {len(object_names)} model(s) in {time.perf_counter() - validation_start:.2f}s: {fatal_count} error(s), {warning_count} warning(s).")
+
+    @property
+    def total_count(self) -> int:
+        return len(self.candidate_names)
+
+    @property
+    def done_count(self) -> int:
+        return sum(1 for status in self.statuses.values() if status in ("Done", "Failed", "Invalid", "Up to date", "Alias", "Cancelled"))
+
+    def get_eta_seconds(self):
+        """Estimated seconds left, based on the average time per finished model. None until one finishes."""
+        done = self.done_count
+        if done == 0:
+            return None
+        return (time.perf_counter() - self.start_time) / done * (self.total_count - done)
+
+    def has_pending_exports(self) -> bool:
+        return self.next_candidate < len(self.candidate_names) and not self.scheduler.studiomdl_missing.is_set()
+
+    def can_export(self) -> bool:
+        """Whether export_next() can run without blocking on a full compile queue."""
+        return self.has_pending_exports() and self.scheduler.has_free_slot()
+
+    def on_job_started(self, job: CompileJob):
+        self.statuses[job.object_name] = "Compiling"
+
+    def fail(self, object_name: str, error_msg: str):
+        self.report({'ERROR'}, error_msg)
+        self.errors.append(error_msg)
+        self.statuses[object_name] = "Failed"
+        if object_name in self.model_reports:
+            self.model_reports[object_name].errors.append(error_msg)
+
+    def export_next(self) -> bool:
+        """Exports the next model and queues it for compiling. Returns False once there is nothing left to export."""
+        if not self.has_pending_exports():
+            return False
+        object_name = self.candidate_names[self.next_candidate]
+        self.next_candidate += 1
+        if self.statuses[object_name] in ("Invalid", "Up to date"):
+            return True
+
+        # Objects can be renamed or deleted while a modal compile runs
+        vis_mesh_obj = bpy.data.objects.get(object_name)
+        if vis_mesh_obj is None:
+            self.fail(object_name, f"Object '{object_name}' was removed or renamed during the compile.")
+            return True
+        self.statuses[object_name] = "Exporting"
+        with self.tracer.span("export_model", "export", object=object_name):
+            self.export_model(vis_mesh_obj)
+        return True
+
+    def export_model(self, vis_mesh_obj):
+        self.report({'INFO'}, f"Processing: {vis_mesh_obj.name}")
+
+        # Sanitize name for filenames/paths
+        vis_mesh_name_raw = vis_mesh_obj.name
+        sanitized_vis_mesh_name = sanitize_model_name(vis_mesh_name_raw)
+        if not sanitized_vis_mesh_name:
+            sanitized_vis_mesh_name = f"default_model_{self.queued_count}" # Ensure unique fallback
+            self.report({'WARNING'}, f"Visual mesh name '{vis_mesh_name_raw}' resulted in empty sanitized name. Using '{sanitized_vis_mesh_name}'.")
+
+        # --- Determine Paths for this object ---
+        qc_modelpath = self.get_model_path(sanitized_vis_mesh_name)
+        if qc_modelpath.lower() in self.used_model_paths:
+            error_msg = f"Skipping '{vis_mesh_obj.name}': another object in the collection already compiles to '{qc_modelpath}.mdl'. Rename one of them."
+            self.fail(vis_mesh_obj.name, error_msg)
+            return
+        self.used_model_paths.add(qc_modelpath.lower())
+        model_report = self.model_reports[vis_mesh_obj.name]
+        model_report.model_path = qc_modelpath
+
+        qc_vismesh_name = sanitized_vis_mesh_name + "_ref"
+        qc_phymesh_name = sanitized_vis_mesh_name + "_phy"
+
+        # --- Find Corresponding Collision Mesh ---
+        phy_mesh_obj = find_collision_object(self.collision_sub_collection, vis_mesh_obj)
+        has_collision = phy_mesh_obj is not None
+        if has_collision:
+            # Check for smooth shading and apply if necessary
+            needs_smooth = any(not poly.use_smooth for poly in phy_mesh_obj.data.polygons)
+            if needs_smooth:
+                self.report({'INFO'}, f"Applying Shade Smooth to collision mesh '{phy_mesh_obj.name}' for '{vis_mesh_obj.name}'.")
+                try:
+                    # Use foreach_set for potentially better performance
+                    phy_mesh_obj.data.polygons.foreach_set("use_smooth", [True] * len(phy_mesh_obj.data.polygons))
+                except Exception as smooth_e:
+                    self.report({'WARNING'}, f"Could not automatically apply Shade Smooth to '{phy_mesh_obj.name}': {smooth_e}. Skipping collision.")
+                    phy_mesh_obj = None # Treat as no collision if smoothing fails
+                    has_collision = False
+
+        # --- Generated Collision ---
+        hull_settings = self.get_hull_settings(self.get_hull_mode(phy_mesh_obj))
+        collision_obj = vis_mesh_obj if phy_mesh_obj is None and hull_settings else phy_mesh_obj # Exported as the collision mesh
+        has_collision = collision_obj is not None
+
+        # --- Compile Identical Models Once ---
+        primary_model_path = self.duplicates.get_primary(vis_mesh_obj.name) if self.settings.compile_aliases else None
+        if primary_model_path:
+            self.duplicates.add_alias(qc_modelpath, primary_model_path, 2 if has_collision else 1)
+            self.statuses[vis_mesh_obj.name] = "Alias"
+            model_report.alias_of = primary_model_path + ".mdl"
+            self.report({'INFO'}, f"'{vis_mesh_obj.name}' has the same meshes as '{primary_model_path}.mdl', listed as an alias of it instead of compiling.")
+            return
+
+        # --- Skip Unchanged Models ---
+        # Keyed in group_duplicates(), models that couldn't be are always rebuilt
+        vis_key = self.duplicates.vis_keys.get(vis_mesh_obj.name, "")
+        phy_key = self.duplicates.phy_keys.get(vis_mesh_obj.name, "") if has_collision else ""
+        fingerprint = get_model_fingerprint(self.shared_inputs, qc_modelpath, vis_key, phy_key) if vis_key else ""
+        inputs_key = get_inputs_key(self.shared_inputs, phy_mesh_obj.name if phy_mesh_obj else "")
+        if fingerprint and not self.settings.force_rebuild and self.manifest.is_up_to_date(qc_modelpath, fingerprint, self.models_root):
+            self.manifest.set_inputs_key(qc_modelpath, inputs_key) # Entries from before Compile Changed have none
+            self.duplicates.set_primary(vis_mesh_obj.name, qc_modelpath)
+            self.skipped_count += 1
+            self.statuses[vis_mesh_obj.name] = "Up to date"
+            self.report({'INFO'}, f"Up to date, skipping: {vis_mesh_obj.name}")
+            return
+
+        # Every job gets its own temp folder so parallel compiles never share QC/SMD paths
+        try:
+            job_dir = self.workspace.make_job_dir(sanitized_vis_mesh_name)
+        except OSError as e:
+            error_msg = f"Failed to create temp folder for '{vis_mesh_obj.name}': {e}"
+            self.fail(vis_mesh_obj.name, error_msg)
+            return
+        temp_qc_path = os.path.join(job_dir, f"qc_{sanitized_vis_mesh_name}.qc")
+        temp_vis_smd_path = os.path.join(job_dir, qc_vismesh_name)
+        temp_phy_smd_path = os.path.join(job_dir, qc_phymesh_name)
+        qc_lodmesh_names = [f"{sanitized_vis_mesh_name}_lod{lod_number}" for lod_number in range(1, len(self.lod_levels) + 1)]
+        temp_lod_smd_paths = [os.path.join(job_dir, qc_lodmesh_name) for qc_lodmesh_name in qc_lodmesh_names]
+
+        # --- Export SMDs ---
+        try:
+            export_start = time.perf_counter()
+            exported_before = self.exported_triangles
+            object_triangles, lod_triangles = self.export_mesh(vis_mesh_obj, vis_key, temp_vis_smd_path, False, temp_lod_smd_paths)
+            hull_pieces = []
+            if has_collision:
+                object_triangles += self.export_mesh(collision_obj, phy_key, temp_phy_smd_path, True, [], hull_settings, hull_pieces)[0]
+            object_export_seconds = time.perf_counter() - export_start
+            mesh_paths = ([temp_vis_smd_path, temp_phy_smd_path] if has_collision else [temp_vis_smd_path]) + temp_lod_smd_paths
+            model_report.mesh_bytes = sum(os.path.getsize(f"{mesh_path}.{self.mesh_ext}") for mesh_path in mesh_paths
+                                          if os.path.isfile(f"{mesh_path}.{self.mesh_ext}"))
+            self.export_seconds += object_export_seconds
+            model_report.triangles = object_triangles
+            model_report.lod_triangles = lod_triangles
+            model_report.export_seconds = object_export_seconds
+            exported_triangles = self.exported_triangles - exported_before
+            lods_msg = f" LODs: {', '.join(str(count) for count in lod_triangles)} triangle(s)." if lod_triangles else ""
+            if exported_triangles == 0 and object_triangles > 0:
+                self.report({'INFO'}, f"All {object_triangles} triangle(s) of '{vis_mesh_obj.name}' were already exported for other models.{lods_msg}")
+            else:
+                shared_msg = f" {object_triangles - exported_triangles} more shared with other models." if exported_triangles < object_triangles else ""
+                self.report({'INFO'}, f"Exported {exported_triangles} triangle(s) for '{vis_mesh_obj.name}' in {object_export_seconds:.3f}s "
+                                      f"({format_throughput(exported_triangles, object_export_seconds)}).{shared_msg}{lods_msg}")
+        except Exception as e:
+            error_msg = f"Failed to export {self.mesh_ext.upper()} for '{vis_mesh_obj.name}': {e}"
+            self.fail(vis_mesh_obj.name, error_msg)
+            self.workspace.release_job_dir(job_dir, failed=True)
+            return # Skip this object
+
+        # --- Look Up Materials ---
+        material_names = self.material_index.get_materials(vis_mesh_obj.name, vis_mesh_obj.material_slots)
+
+        # --- Prepare QC Data ---
+        convex_pieces = 0
+        if hull_settings:
+            convex_pieces = hull_pieces[0] if hull_pieces else 0
+            if convex_pieces == 0:
+                self.report({'WARNING'}, f"'{collision_obj.name}' has no volume to build collision hulls from, compiling '{vis_mesh_obj.name}' without collision.")
+                has_collision = False
+            else:
+                self.report({'INFO'}, f"Collision for '{vis_mesh_obj.name}': {convex_pieces} convex hull(s) of up to {hull_settings.max_vertices} vertices from '{collision_obj.name}'.")
+        elif has_collision:
+            try:
+                # Counted on the evaluated mesh, the same geometry the collision SMD was exported from
+                with self.tracer.span("count_islands", "export", object=phy_mesh_obj.name):
+                    convex_pieces = find_object_islands(phy_mesh_obj, self.depsgraph).count
+            except Exception as e:
+                 self.report({'WARNING'}, f"Could not count collision islands for '{phy_mesh_obj.name}': {e}. Proceeding without concave.")
+                 convex_pieces = 1 # Assume single piece if count fails
+
+        qc_cdmaterials_list_current = []
+        has_materials = len(material_names) > 0
+
+        if has_materials:
+            if self.settings.cdmaterials_type == '1': # Manual
+                qc_cdmaterials_list_current.extend([os.path.join(p, '', '').replace("\\", "/") for p in self.settings.cdmaterials_manual])
+            else: # Auto
+                # Auto path is relative to models/ directory, using the model's path
+                auto_cd_path = "models/" + os.path.dirname(qc_modelpath) if os.path.dirname(qc_modelpath) else "models"
+                qc_cdmaterials_list_current.append(auto_cd_path.replace("\\", "/"))
+
+        qc_concave = convex_pieces > 1
+        qc_maxconvexpieces = convex_pieces
+        qc_inertia = 1
+        qc_damping = 0
+        qc_rotdamping = 0
+
+        # --- Write QC File ---
+        try:
+            with self.tracer.span("write_qc", "export", object=vis_mesh_obj.name), open(temp_qc_path, "w") as file:
+                file.write(f'$modelname "{qc_modelpath}.mdl"\n')
+                if self.settings.scale_factor != 1.0:
+                    file.write(f"$scale {self.settings.scale_factor:.6f}\n")
+                file.write("\n")
+                file.write(f'$bodygroup "Body"\n{{\n\tstudio "{qc_vismesh_name}.{self.mesh_ext}"\n}}\n')
+
+                # --- Write LODs --- #
+                for level, qc_lodmesh_name, triangle_count in zip(self.lod_levels, qc_lodmesh_names, lod_triangles):
+                    if triangle_count > 0: # Nothing left at this ratio, the previous level stays in use
+                        file.write(f'\n$lod {level.distance:g}\n{{\n\treplacemodel "{qc_vismesh_name}.{self.mesh_ext}" "{qc_lodmesh_name}.{self.mesh_ext}"\n}}\n')
+
+                # --- Write Texturegroup --- #
+                texturegroup_qc_string = self.material_index.get_texturegroup_qc(material_names)
+                if texturegroup_qc_string:
+                    file.write("\n")
+                    file.write(texturegroup_qc_string)
+
+                if self.settings.staticprop:
+                    file.write("\n$staticprop\n")
+                if self.settings.mostlyopaque:
+                    file.write("\n$mostlyopaque\n")
+
+                file.write(f'\n$surfaceprop "{self.settings.surfaceprop}"\n')
+                file.write("\n$contents \"solid\"\n")
+
+                file.write("\n")
+                if qc_cdmaterials_list_current:
+                    for cd_path in qc_cdmaterials_list_current:
+                        file.write(f'$cdmaterials "{cd_path}"\n')
+                else:
+                     file.write('$cdmaterials ""\n') # Explicitly add if no materials/paths
+
+                file.write("\n")
+                file.write(f'$sequence "idle" {{\n\t"{qc_vismesh_name}.{self.mesh_ext}"\n\tfps 30\n\tfadein 0.2\n\tfadeout 0.2\n\tloop\n}}\n')
+
+                if has_collision:
+                    file.write("\n")
+                    collision_str = f'$collisionmodel "{qc_phymesh_name}.{self.mesh_ext}" {{'
+                    if qc_concave:
+                        collision_str += f"\n\t$concave\n\t$maxconvexpieces {qc_maxconvexpieces}"
+                    collision_str += f"\n\t$mass {self.settings.mass}\n\t$inertia {qc_inertia}\n\t$damping {qc_damping}\n\t$rotdamping {qc_rotdamping}"
+                    collision_str += '\n\t$rootbone " "' # Ensure rootbone exists
+                    collision_str += "\n}}"
+                    file.write(collision_str)
+
+        except IOError as e:
+            error_msg = f"Failed to write QC file for '{vis_mesh_obj.name}': {e}"
+            self.fail(vis_mesh_obj.name, error_msg)
+            self.workspace.release_job_dir(job_dir, failed=True)
+            return # Skip this object
+
+        # --- Queue for compiling ---
+        self.duplicates.set_primary(vis_mesh_obj.name, qc_modelpath)
+        self.statuses[vis_mesh_obj.name] = "Queued"
+        with self.tracer.span("wait_for_slot", "compile", object=vis_mesh_obj.name): # Blocks while the compile queue is full
+            mesh_objects = {qc_vismesh_name: vis_mesh_obj.name, **{qc_lodmesh_name: vis_mesh_obj.name for qc_lodmesh_name in qc_lodmesh_names}}
+            if has_collision:
+                mesh_objects[qc_phymesh_name] = collision_obj.name
+            self.scheduler.submit(CompileJob(vis_mesh_obj.name, temp_qc_path, job_dir, qc_cdmaterials_list_current, list(material_names),
+                                             qc_modelpath, fingerprint, inputs_key, os.path.join(self.models_root, qc_modelpath), mesh_objects,
+                                             model_report.triangles + sum(model_report.lod_triangles)))
+        self.queued_count += 1
+
+    def export_mesh(self, obj, mesh_key: str, path: str, is_collision: bool, lod_paths: List[str],
+                    hull_settings: Optional[CollisionHullSettings] = None, hull_pieces: Optional[List[int]] = None) -> Tuple[int, List[int]]:
+        """Exports one mesh of a model, or links the files already exported for another model with the same mesh.
+
+        With hull_settings, convex hulls of the mesh are exported instead and their number is
+        appended to hull_pieces.
+
+        Returns the triangle count of the mesh and of each LOD.
+        """
+        shared_mesh = self.duplicates.get_shared_mesh(mesh_key)
+        if shared_mesh is None: # The only model with this mesh
+            return self.write_mesh(obj, path, is_collision, lod_paths, hull_settings, hull_pieces)
+        shared_lod_paths = [f"{shared_mesh.path}_lod{lod_number}" for lod_number in range(1, len(lod_paths) + 1)]
+        if not shared_mesh.exported_by:
+            shared_hull_pieces = []
+            triangles, lod_triangles = self.write_mesh(obj, shared_mesh.path, is_collision, shared_lod_paths, hull_settings, shared_hull_pieces)
+            if triangles == 0:
+                return 0, lod_triangles # The next model of the group tries again
+            shared_mesh.exported_by = obj.name
+            shared_mesh.triangles = triangles
+            shared_mesh.lod_triangles = lod_triangles
+            shared_mesh.hull_pieces = sum(shared_hull_pieces)
+        else:
+            self.duplicates.exports_saved += 1
+            self.report({'INFO'}, f"Reusing the {self.mesh_ext.upper()} exported from '{shared_mesh.exported_by}' for '{obj.name}'.")
+        with self.tracer.span("link_shared", "export", object=obj.name):
+            for shared_path, job_path in zip([shared_mesh.path] + shared_lod_paths, [path] + lod_paths):
+                if os.path.isfile(f"{shared_path}.{self.mesh_ext}"): # LODs decimated to nothing have no file
+                    link_mesh_file(f"{shared_path}.{self.mesh_ext}", f"{job_path}.{self.mesh_ext}")
+        if hull_settings and hull_pieces is not None:
+            hull_pieces.append(shared_mesh.hull_pieces)
+        return shared_mesh.triangles, list(shared_mesh.lod_triangles)
+
+    def write_mesh(self, obj, path: str, is_collision: bool, lod_paths: List[str],
+                   hull_settings: Optional[CollisionHullSettings] = None, hull_pieces: Optional[List[int]] = None) -> Tuple[int, List[int]]:
+        settings = self.settings
+        precision, uv_precision = (settings.smd_collision_precision, settings.smd_collision_precision) if is_collision else (settings.smd_precision, settings.smd_uv_precision)
+        lod_triangles = []
+        triangles = exportObjectToSmd(obj, path, is_collision, settings.use_legacy_export, precision, uv_precision, settings.smd_threaded_writer, self.tracer,
+                                      self.mesh_ext, [(level.ratio, lod_path) for level, lod_path in zip(self.lod_levels, lod_paths)], lod_triangles,
+                                      hull_settings, hull_pieces)
+        self.exported_triangles += triangles
+        self.lod_triangles += sum(lod_triangles)
+        self.exported_bytes += sum(os.path.getsize(f"{mesh_path}.{self.mesh_ext}") for mesh_path in [path] + lod_paths
+                                   if os.path.isfile(f"{mesh_path}.{self.mesh_ext}"))
+        return triangles, lod_triangles
+
+    def collect_results(self):
+        """Handles the compiles that finished so far, without waiting for the others."""
+        for result in self.scheduler.poll():
+            self.handle_result(result)
+
+    def handle_result(self, result: CompileResult):
+        job = result.job
+        model_report = self.model_reports[job.object_name]
+        model_report.compile_seconds = result.seconds
+        model_report.diagnostics = result.diagnostics
+        model_report.stopped_early = result.stopped_early
+        model_report.timed_out = result.timed_out or result.hung
+        model_report.retry_reasons = result.retry_reasons
+        for attempt, reason in enumerate(result.retry_reasons, 2):
+            self.report({'WARNING'}, f"Compiling '{job.object_name}' again (attempt {attempt}): {reason}")
+        if result.cancelled:
+            self.statuses[job.object_name] = "Cancelled"
+        elif not result.success:
+            self.fail(job.object_name, result.error)
+            self.manifest.forget(job.model_path)
+        else:
+            if job.fingerprint:
+                self.manifest.record(job.model_path, job.object_name, job.fingerprint, self.models_root, job.inputs_key)
+            # --- Create Material Folders/VMTs (for this object) ---
+            if job.material_names and self.settings.make_folders:
+                with self.tracer.span("material_files", "io", object=job.object_name, materials=len(job.material_names)):
+                    self.material_index.create_material_files(self.models_root, job.cdmaterials, job.material_names, self.settings.make_vmts and self.settings.cdmaterials_type == '0')
+            output_dir = os.path.join(self.models_root, os.path.dirname(job.model_path))
+            model_report.outputs = [os.path.join(output_dir, file_name).replace("\\", "/")
+                                    for file_name in sorted(get_model_outputs(self.models_root, job.model_path))]
+            self.compiled_count += 1
+            self.statuses[job.object_name] = "Done"
+            model_report.from_cache = result.from_cache
+            if result.from_cache:
+                self.report({'INFO'}, f"Restored from the compiled model cache: {job.object_name} ({result.seconds:.2f}s)")
+            else:
+                self.report({'INFO'}, f"Finished processing: {job.object_name} ({result.seconds:.2f}s in studiomdl)")
+            for diagnostic in result.diagnostics:
+                self.report({'WARNING'}, f"Studiomdl warning for '{job.object_name}': {diagnostic.format()}")
+
+        # --- Temp files are removed by the compile worker ---
+        if result.temp_kept:
+            self.workspace.keep_job_dir(job.work_dir)
+        elif not result.temp_removed:
+            # Non-critical, just report
+            self.report({'WARNING'}, f"Could not clean up temporary files for '{job.object_name}' in '{job.work_dir}'.")
+
+    def get_compiled_object_names(self) -> Set[str]:
+        """Returns the objects whose models are compiled and current: the visual meshes and their collision meshes."""
+        object_names = set()
+        for object_name, status in self.statuses.items():
+            if status not in ("Done", "Up to date", "Alias"):
+                continue
+            object_names.add(object_name)
+            vis_mesh_obj = bpy.data.objects.get(object_name)
+            phy_mesh_obj = find_collision_object(self.collision_sub_collection, vis_mesh_obj) if vis_mesh_obj else None
+            if phy_mesh_obj is not None:
+                object_names.add(phy_mesh_obj.name)
+        return object_names
+
+    def is_done(self) -> bool:
+        return not self.has_pending_exports() and self.scheduler.is_idle()
+
+    def save_manifest(self):
+        try:
+            with self.tracer.span("save_manifest", "manifest"):
+                self.manifest.save()
+        except OSError as e:
+            self.report({'WARNING'}, f"Could not save the compile manifest '{self.manifest.path}': {e}")
+
+    def save_aliases(self):
+        """Writes the models compiled as aliases of others next to the .blend file, if aliases are allowed."""
+        if not self.settings.compile_aliases:
+            return
+        alias_list_path = get_alias_list_path(self.settings.blend_path)
+        try:
+            self.duplicates.write_alias_list(alias_list_path)
+        except OSError as e:
+            self.report({'WARNING'}, f"Could not save the alias list '{alias_list_path}': {e}")
+            return
+        if self.duplicates.aliases:
+            self.report({'INFO'}, f"{len(self.duplicates.aliases)} alias(es) written to '{alias_list_path}'.")
+
+    def close_workspace(self, keep_failed_jobs: bool = True):
+        """Removes this run's temp files in one step, except the ones of failed models if they are kept."""
+        if self.workspace is None:
+            return
+        run_dir = self.workspace.run_dir
+        with self.tracer.span("remove_workspace", "io"):
+            removed = self.workspace.close(keep_failed_jobs)
+        if not removed:
+            self.report({'WARNING'}, f"Could not clean up the temporary files in '{run_dir}'.")
+        elif self.workspace.kept_dirs:
+            self.kept_scratch_dir = run_dir
+            self.report({'INFO'}, f"Kept the temp files of {len(self.workspace.kept_dirs)} failed model(s) for inspection in '{run_dir}'.")
+
+    def write_trace(self):
+        """Writes the Chrome trace next to the .blend file and prints the stage totals, if tracing is on."""
+        if not self.tracer.enabled:
+            return
+        self.tracer.stop()
+        print(f"AutoMDL stage timings for '{self.settings.collection_name}':\n{self.tracer.format_summary()}")
+        trace_path = get_trace_path(self.settings.blend_path)
+        try:
+            self.tracer.write_chrome_trace(trace_path)
+        except OSError as e:
+            self.report({'WARNING'}, f"Could not write the compile trace '{trace_path}': {e}")
+            return
+        self.trace_path = trace_path
+        self.report({'INFO'}, f"Compile trace written to '{trace_path}', open it in chrome://tracing or ui.perfetto.dev.")
+
+    def request_cancel(self):
+        """Asks whoever drives the compile to cancel it, for callers outside its loop (e.g. a newer save)."""
+        self.cancel_requested = True
+
+    def cancel(self):
+        """Stops the compile: kills running studiomdl processes and removes every temp folder."""
+        for result in self.scheduler.cancel():
+            self.handle_result(result)
+        for object_name in self.candidate_names[self.next_candidate:]:
+            self.statuses[object_name] = "Cancelled"
+        self.next_candidate = len(self.candidate_names)
+        self.save_manifest() # Keep the models that did finish
+        self.close_workspace(keep_failed_jobs=False)
+        self.write_trace()
+        self.is_finished = True
+        self.was_cancelled = True
+        self.report({'WARNING'}, f"Compile cancelled. {self.compiled_count} of {self.total_count} model(s) were compiled.")
+
+    def finish(self) -> Set[str]:
+        """Waits for the remaining compiles and reports the outcome. Returns the operator result."""
+        with self.tracer.span("wait_for_compiles", "compile"):
+            results = self.scheduler.finish()
+        for result in results:
+            self.handle_result(result)
+        self.save_manifest()
+        self.save_aliases()
+        self.close_workspace()
+        self.evict_artifact_cache()
+        self.write_trace()
+        self.is_finished = True
+
+        compiled_count = self.compiled_count
+        skipped_count = self.skipped_count
+        errors = self.errors
+        selected_collection = self.selected_collection
+
+        # --- Final Report ---
+        if self.exported_triangles > 0:
+            if self.mesh_ext == "dmx":
+                export_path_name = "DMX export"
+            else:
+                export_path_name = "SMD export (legacy)" if self.settings.use_legacy_export else "SMD export (vectorized)"
+            compile_seconds = sum(model_report.compile_seconds for model_report in self.model_reports.values())
+            lods_msg = f" LODs: {self.lod_triangles} triangle(s) over {len(self.lod_levels)} level(s)." if self.lod_levels else ""
+            self.report({'INFO'}, f"{export_path_name}: {self.exported_triangles} triangle(s), {self.exported_bytes / (1 << 20):.1f} MB in {self.export_seconds:.3f}s, "
+                                  f"{format_throughput(self.exported_triangles, self.export_seconds)}.{lods_msg} Studiomdl: {compile_seconds:.3f}s in total.")
+
+        if self.duplicates.exports_saved > 0:
+            aliases_msg = f", {self.duplicates.compiles_saved} compile(s) saved by listing aliases" if self.settings.compile_aliases else ""
+            self.report({'INFO'}, f"Deduplication: {self.duplicates.exports_saved} mesh export(s) saved{aliases_msg}.")
+
+        artifact_cache = self.artifact_cache
+        if artifact_cache is not None:
+            evicted_msg = f", {artifact_cache.evicted} least recently used model(s) evicted" if artifact_cache.evicted > 0 else ""
+            self.report({'INFO'}, f"Compiled model cache: {artifact_cache.hits} hit(s), {artifact_cache.misses} miss(es), {artifact_cache.stores} stored, "
+                                  f"{artifact_cache.restored_bytes / (1 << 20):.1f} MB restored{evicted_msg}.")
+
+        diagnostic_counts = self.get_diagnostic_counts()
+        if any(diagnostic_counts.values()):
+            stopped_msg = f", {diagnostic_counts['stopped_early']} compile(s) stopped at their first fatal error" if diagnostic_counts['stopped_early'] else ""
+            timed_out_msg = f", {diagnostic_counts['timed_out']} timed out or hung" if diagnostic_counts['timed_out'] else ""
+            retries_msg = f", {diagnostic_counts['retries']} retried" if diagnostic_counts['retries'] else ""
+            self.report({'INFO'}, f"Studiomdl diagnostics: {diagnostic_counts['errors']} error(s), {diagnostic_counts['warnings']} warning(s){stopped_msg}{timed_out_msg}{retries_msg}.")
+
+        skipped_msg = f" {skipped_count} unchanged model(s) skipped." if skipped_count > 0 else ""
+        if compiled_count > 0 and not errors:
+            self.report({'INFO'}, f"Successfully compiled {compiled_count} model(s) from collection '{selected_collection.name}'. Output is in the blend file's directory.{skipped_msg}")
+            return {'FINISHED'}
+        elif compiled_count > 0 and errors:
+            self.report({'WARNING'}, f"Compiled {compiled_count} model(s) from '{selected_collection.name}' with {len(errors)} error(s). Check console/report.{skipped_msg}")
+            # Optionally print all errors here
+            # for err in errors: print(err)
+            return {'FINISHED'} # Still finished, but with warnings
+        elif skipped_count > 0 and not errors:
+             self.report({'INFO'}, f"All {skipped_count} model(s) in '{selected_collection.name}' are up to date. Nothing compiled (use Force Rebuild to compile anyway).")
+             return {'FINISHED'}
+        elif compiled_count == 0 and not errors:
+             self.report({'WARNING'}, f"No valid visual mesh objects found in collection '{selected_collection.name}'. Nothing compiled.")
+             return {'CANCELLED'}
+        else: # No models compiled and errors occurred
+             self.report({'ERROR'}, f"Failed to compile any models from '{selected_collection.name}'. {len(errors)} error(s) occurred. Check console/report.{skipped_msg}")
+             # Optionally print all errors here
+             # for err in errors: print(err)
+             return {'CANCELLED'}
+
+    def get_diagnostic_counts(self) -> Dict[str, int]:
+        """Returns the number of studiomdl errors and warnings, of compiles stopped early or by the watchdog, and of retries."""
+        diagnostics = [diagnostic for model_report in self.model_reports.values() for diagnostic in model_report.diagnostics]
+        return {
+            "errors": sum(1 for diagnostic in diagnostics if diagnostic.severity == "error"),
+            "warnings": sum(1 for diagnostic in diagnostics if diagnostic.severity == "warning"),
+            "stopped_early": sum(1 for model_report in self.model_reports.values() if model_report.stopped_early),
+            "timed_out": sum(1 for model_report in self.model_reports.values() if model_report.timed_out),
+            "retries": sum(len(model_report.retry_reasons) for model_report in self.model_reports.values()),
+        }
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Returns the outcome of the compile as JSON-serializable data."""
+        models = []
+        for object_name in self.candidate_names:
+            model_report = self.model_reports[object_name]
+            models.append({
+                "object": object_name,
+                "model_path": model_report.model_path + ".mdl" if model_report.model_path else "",
+                "status": self.statuses[object_name],
+                "triangles": model_report.triangles,
+                "mesh_bytes": model_report.mesh_bytes,
+                "lod_triangles": model_report.lod_triangles,
+                "alias_of": model_report.alias_of,
+                "from_cache": model_report.from_cache,
+                "export_seconds": round(model_report.export_seconds, 4),
+                "compile_seconds": round(model_report.compile_seconds, 4),
+                "outputs": model_report.outputs,
+                "errors": model_report.errors,
+                "warnings": model_report.warnings,
+                "diagnostics": [diagnostic.to_dict() for diagnostic in model_report.diagnostics],
+                "stopped_early": model_report.stopped_early,
+                "timed_out": model_report.timed_out,
+                "retries": model_report.retry_reasons,
+            })
+        return {
+            "blend_file": self.settings.blend_path,
+            "collection": self.settings.collection_name,
+            "game": self.settings.game_dir,
+            "studiomdl": self.settings.studiomdl_exe,
+            "mesh_format": self.mesh_ext,
+            "lods": [{"ratio": level.ratio, "distance": level.distance} for level in self.lod_levels],
+            "compiled": self.compiled_count,
+            "up_to_date": self.skipped_count,
+            "failed": sum(1 for status in self.statuses.values() if status in ("Failed", "Invalid")),
+            "cancelled": self.was_cancelled,
+            "exports_saved": self.duplicates.exports_saved,
+            "compiles_saved": self.duplicates.compiles_saved,
+            "kept_temp_dir": self.kept_scratch_dir,
+            "cache_hits": self.artifact_cache.hits if self.artifact_cache else 0,
+            "cache_misses": self.artifact_cache.misses if self.artifact_cache else 0,
+            "diagnostics": self.get_diagnostic_counts(),
+            "seconds": round(time.perf_counter() - self.start_time, 4),
+            "models": models,
+            "errors": self.errors,
+            "trace": self.trace_path,
+        }
+
+
+def format_throughput(triangle_count, seconds):
+    if seconds <= 0.0:
+        return "n/a tris/s"
+    return f"{triangle_count / seconds:,.0f} tris/s"
@@ -0,0 +1,173 @@
+"""Headless command line compile.
+
+blender -b props.blend --python-expr "import addon_utils; addon_utils.enable('AutoMDL-Enhanced').cli_main()" -- --collection Props --game <gameinfo dir>
+"""
+
+import bpy
+import os
+import sys
+import json
+import argparse
+from typing import List, Dict, Any, Set
+
+from .build import CollectionBuild, get_build_settings, get_addon_prefs
+from .lod import LodLevel, parse_lod_levels
+
+
+
+# Exit codes of the command line compile
+CLI_EXIT_OK = 0
+CLI_EXIT_MODEL_FAILED = 1 # At least one model failed to export or compile
+CLI_EXIT_SETUP_FAILED = 2 # Bad arguments, or the compile couldn't start
+
+def get_cli_summary_path(blend_path: str) -> str:
+    """Returns the default path of the command line JSON summary, next to the .blend file."""
+    return os.path.splitext(blend_path)[0] + ".automdl-summary.json"
+
+def parse_lod_arg(text: str) -> List[LodLevel]:
+    try:
+        return parse_lod_levels(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_cli_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="blender -b <file.blend> --python-expr \"...cli_main()\" --",
+        description="Compiles the models of a collection in the open .blend file. "
+                    "QC options not given here are taken from the AutoMDL panel settings saved in the .blend file.")
+    parser.add_argument("--collection", required=True, help="Name of the collection to compile")
+    parser.add_argument("--game", required=True, help="Game folder containing gameinfo.txt")
+    parser.add_argument("--studiomdl", help="Path to studiomdl (default: <game>/../bin/studiomdl.exe)")
+    parser.add_argument("--jobs", type=int, help="Parallel studiomdl processes, 0 = one per CPU core (default: add-on preferences)")
+    parser.add_argument("--timeout", type=float, help="Seconds a studiomdl run may take, plus --timeout-per-k-tris per 1000 triangles, 0 = none (default: add-on preferences)")
+    parser.add_argument("--timeout-per-k-tris", type=float, help="Seconds added to --timeout per 1000 triangles of the model (default: add-on preferences)")
+    parser.add_argument("--hang-timeout", type=float, help="Stop studiomdl after this many seconds without output or CPU use, 0 = never (default: add-on preferences)")
+    parser.add_argument("--retries", type=int, help="Runs of studiomdl after one that failed without an error message, hung or found its files locked (default: add-on preferences)")
+    parser.add_argument("--summary", help="Where to write the JSON summary (default: <blend name>.automdl-summary.json)")
+    parser.add_argument("--force", action="store_true", help="Compile every model, even the ones that haven't changed")
+    parser.add_argument("--scale", type=float, help="$scale value")
+    parser.add_argument("--mass", type=float, help="Collision model mass in kilograms")
+    parser.add_argument("--surfaceprop", help="$surfaceprop value")
+    parser.add_argument("--format", choices=["smd", "dmx"], help="Mesh file format exported for studiomdl (default: the one set in the .blend file)")
+    parser.add_argument("--lods", type=parse_lod_arg, help='LODs as ratio@distance, e.g. "0.5@30,0.25@80", "" for none (default: the ones set in the .blend file)')
+    parser.add_argument("--aliases", action=argparse.BooleanOptionalAction, default=None, help="Compile models with identical meshes once and list the others as aliases")
+    parser.add_argument("--generate-collision", action=argparse.BooleanOptionalAction, default=None, help="Give models without a COL_ mesh convex hulls of their visual mesh as collision")
+    parser.add_argument("--simplify-collision", action=argparse.BooleanOptionalAction, default=None, help="Export COL_ meshes as convex hulls of at most --hull-vertices each")
+    parser.add_argument("--hull-vertices", type=int, help="Most vertices per collision hull (default: the number set in the .blend file)")
+    parser.add_argument("--max-convex-pieces", type=int, help="Most hulls of generated collision (default: the number set in the .blend file)")
+    parser.add_argument("--scratch-dir", help="Folder for the temp QC and mesh files, every compile gets its own subfolder (default: add-on preferences)")
+    parser.add_argument("--scratch-ram", action=argparse.BooleanOptionalAction, default=None, help="Write the temp files to a RAM disk (/dev/shm) when there is one")
+    parser.add_argument("--keep-failed-scratch", action=argparse.BooleanOptionalAction, default=None, help="Keep the temp files of models studiomdl failed on")
+    parser.add_argument("--cache-dir", help='Compiled model cache folder, "" for none (default: add-on preferences)')
+    parser.add_argument("--cache-size", type=float, help="Compiled model cache size in GB (default: add-on preferences)")
+    parser.add_argument("--staticprop", action=argparse.BooleanOptionalAction, default=None, help="Compile as $staticprop")
+    parser.add_argument("--trace", action="store_true", help="Write per-stage timings as a Chrome trace (<blend name>.automdl-trace.json)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record memory peaks in the trace, implies --trace")
+    return parser.parse_args(argv)
+
+def cli_report(level: Set[str], message: str):
+    """Operator.report replacement that prints to the console."""
+    print(f"AutoMDL {'/'.join(sorted(level))}: {message}", flush=True)
+
+def write_cli_summary(summary_path: str, summary: Dict[str, Any]):
+    temp_summary_path = summary_path + ".tmp"
+    with open(temp_summary_path, "w") as file:
+        json.dump(summary, file, indent=2)
+    os.replace(temp_summary_path, summary_path)
+
+def run_cli(argv: List[str], context=None) -> int:
+    """Compiles a collection of the open .blend file from command line arguments.
+
+    Unlike the operator, nothing is read from the game selection or the panel's collection
+    picker, so the same pipeline can run on a build machine.
+
+    Args:
+        argv: The arguments after Blender's "--" separator.
+        context: Blender context to use, bpy.context by default.
+
+    Returns:
+        The process exit code, see CLI_EXIT_*.
+    """
+    args = parse_cli_args(argv)
+    context = context or bpy.context
+    blend_path = bpy.data.filepath
+    if not blend_path:
+        cli_report({'ERROR'}, "No .blend file is open. Pass it before --python-expr.")
+        return CLI_EXIT_SETUP_FAILED
+
+    game_dir = os.path.abspath(args.game)
+    studiomdl_exe = os.path.abspath(args.studiomdl) if args.studiomdl else os.path.join(os.path.dirname(game_dir), "bin", "studiomdl.exe")
+    settings = get_build_settings(context.scene, get_addon_prefs(context), blend_path, args.collection, game_dir, studiomdl_exe)
+    if args.staticprop is not None:
+        settings.staticprop = args.staticprop
+    if args.mass is not None:
+        settings.mass = args.mass
+    if args.scale is not None:
+        settings.scale_factor = args.scale
+    if args.surfaceprop:
+        settings.surfaceprop = args.surfaceprop
+    if args.format:
+        settings.mesh_format = args.format
+    if args.lods is not None:
+        settings.lods = args.lods
+    if args.aliases is not None:
+        settings.compile_aliases = args.aliases
+    if args.generate_collision is not None:
+        settings.generate_collision = args.generate_collision
+    if args.simplify_collision is not None:
+        settings.simplify_collision = args.simplify_collision
+    if args.hull_vertices is not None:
+        settings.collision_hull_vertices = max(4, args.hull_vertices)
+    if args.max_convex_pieces is not None:
+        settings.collision_max_pieces = max(1, args.max_convex_pieces)
+    if args.jobs is not None:
+        settings.compile_jobs = max(0, args.jobs)
+    if args.timeout is not None:
+        settings.compile_timeout = max(0.0, args.timeout)
+    if args.timeout_per_k_tris is not None:
+        settings.compile_timeout_per_k_triangles = max(0.0, args.timeout_per_k_tris)
+    if args.hang_timeout is not None:
+        settings.hang_timeout = max(0.0, args.hang_timeout)
+    if args.retries is not None:
+        settings.compile_retries = max(0, args.retries)
+    if args.scratch_dir:
+        settings.scratch_dir = os.path.abspath(args.scratch_dir)
+    if args.scratch_ram is not None:
+        settings.scratch_in_ram = args.scratch_ram
+    if args.keep_failed_scratch is not None:
+        settings.keep_failed_scratch = args.keep_failed_scratch
+    if args.cache_dir is not None:
+        settings.artifact_cache_dir = os.path.abspath(args.cache_dir) if args.cache_dir else ""
+    if args.cache_size is not None:
+        settings.artifact_cache_gb = args.cache_size
+    settings.force_rebuild = args.force
+    if args.trace or args.trace_memory:
+        settings.trace = True
+        settings.trace_memory = args.trace_memory
+
+    summary_path = args.summary or get_cli_summary_path(blend_path)
+    build = CollectionBuild(context, settings, cli_report)
+    if not build.start():
+        summary = build.get_summary()
+        summary["errors"].append("The compile could not start, see the console output.")
+        exit_code = CLI_EXIT_SETUP_FAILED
+    else:
+        while build.export_next():
+            build.collect_results()
+        build.finish()
+        summary = build.get_summary()
+        exit_code = CLI_EXIT_MODEL_FAILED if build.errors else CLI_EXIT_OK
+    summary["exit_code"] = exit_code
+
+    try:
+        write_cli_summary(summary_path, summary)
+        cli_report({'INFO'}, f"Summary written to '{summary_path}'.")
+    except OSError as e:
+        cli_report({'ERROR'}, f"Could not write the summary '{summary_path}': {e}")
+        exit_code = exit_code or CLI_EXIT_SETUP_FAILED
+    return exit_code
+
+def cli_main():
+    """Command line entry point, exits Blender with run_cli's exit code."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(run_cli(argv))
@@ -0,0 +1,353 @@
+"""Collision generation: convex hulls for $collisionmodel, made from a mesh's exported arrays.
+
+studiomdl turns every connected piece of a collision mesh into a convex hull itself, and a
+densely modeled piece makes a hull with as many vertices, which is slow in the game's
+physics. The hulls are built here instead, with a vectorized quickhull: every round adds
+the point farthest outside the hull so far, so stopping at a vertex budget leaves the hull
+that loses the least volume for that many vertices.
+
+Models without a COL_ mesh get one hull per island of the visual mesh. Islands too concave
+for one hull (a surface far below the hull) are cut in two along their longest axis, at
+their deepest vertex, until every piece fits its hull or the piece budget is spent; more
+islands than the budget are merged into neighbouring groups first. Existing COL_ meshes can
+go through the same simplification, one hull per island, without cuts.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+
+from .smd_export import MeshArrays, normalize_rows, unique_inverse
+from .mesh_islands import label_connected_vertices
+
+HULL_EPSILON = 1e-7 # Points closer to a face than this share of the piece's size count as on it
+# Lengths in units after the QC's $scale, see CollisionHullSettings.get_mesh_length()
+HULL_MIN_THICKNESS = 0.5 # Flat pieces are thickened to this, studiomdl rejects thinner collision as 2-dimensional
+HULL_GAP = 0.01 # Hulls shrink this much towards their center, so touching pieces never share a vertex
+CONCAVITY_TOLERANCE = 0.05 # A piece is cut when a vertex lies deeper inside its hull than this share of its size
+CUT_MARGIN = 0.1 # Cuts closer to a piece's end than this share of its length go through its middle instead
+MAX_CUT_DEPTH = 8
+DEPTH_CHUNK_CORNERS = 65536 # Triangle corners measured against a hull's faces at once
+DEPTH_SAMPLE_TRIANGLES = 16384 # Denser pieces are measured on an evenly spread sample of their triangles
+
+
+@dataclass
+class CollisionHullSettings:
+    """How the convex hulls of a collision mesh are built."""
+    max_vertices: int = 32 # Per hull
+    max_pieces: int = 16 # Hulls per model, studiomdl's $maxconvexpieces
+    split_concave: bool = True # Cut concave islands and merge surplus ones, False for one hull per island
+    scale_factor: float = 1.0 # The QC's $scale, applied by studiomdl after the hulls are built
+
+    def get_mesh_length(self, length: float) -> float:
+        """Converts a length studiomdl sees (after $scale) to one in the mesh's own units."""
+        return length / self.scale_factor if self.scale_factor > 0.0 else length
+
+
+@dataclass
+class ConvexHull:
+    points: np.ndarray # (n, 3)
+    triangles: np.ndarray # (m, 3) indices into points, counterclockwise seen from outside
+
+
+# --- Quickhull ---
+
+def get_face_planes(points: np.ndarray, faces: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the unit normal and the offset along it of every face, zero normals for degenerate faces."""
+    corners = points[faces]
+    normals = normalize_rows(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]))
+    return normals, np.einsum("ij,ij->i", normals, corners[:, 0])
+
+def find_initial_simplex(points: np.ndarray, epsilon: float) -> Optional[List[int]]:
+    """Picks four points spanning a tetrahedron as large as cheaply found, None if the points are flat."""
+    extremes = np.concatenate([points.argmin(axis=0), points.argmax(axis=0)])
+    extreme_points = points[extremes]
+    pair_distances = np.linalg.norm(extreme_points[:, None] - extreme_points[None], axis=2)
+    first, second = np.unravel_index(np.argmax(pair_distances), pair_distances.shape)
+    a, b = int(extremes[first]), int(extremes[second])
+    if pair_distances[first, second] <= epsilon:
+        return None
+    line = points[b] - points[a]
+    line_distances = np.linalg.norm(np.cross(points - points[a], line), axis=1) / np.linalg.norm(line)
+    c = int(np.argmax(line_distances))
+    if line_distances[c] <= epsilon:
+        return None
+    normal = normalize_rows(np.cross(line, points[c] - points[a])[None])[0]
+    plane_distances = np.abs((points - points[a]) @ normal)
+    d = int(np.argmax(plane_distances))
+    if plane_distances[d] <= epsilon:
+        return None
+    return [a, b, c, d]
+
+def assign_outside_points(points: np.ndarray, point_ids: np.ndarray, face_ids: np.ndarray, normals: np.ndarray,
+                          offsets: np.ndarray, epsilon: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Gives each point outside any of the faces to the face it's farthest above, dropping the others.
+
+    Returns the kept point ids, their faces and their distances above them.
+    """
+    if len(point_ids) == 0 or len(face_ids) == 0:
+        return point_ids[:0], point_ids[:0], np.zeros(0)
+    distances = points[point_ids] @ normals[face_ids].T - offsets[face_ids]
+    best = np.argmax(distances, axis=1)
+    best_distances = distances[np.arange(len(point_ids)), best]
+    outside = best_distances > epsilon
+    return point_ids[outside], face_ids[best[outside]], best_distances[outside]
+
+def quickhull(points: np.ndarray, max_vertices: int) -> Optional[ConvexHull]:
+    """Returns the convex hull of the points, grown one farthest point at a time up to max_vertices.
+
+    Each round, the faces the new point sees are removed and their horizon is joined to the
+    point; only the points above the removed faces are measured again, against the new faces.
+
+    Returns:
+        None if the points span no volume (fewer than 4, flat or on a line).
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 4:
+        return None
+    extent = float(np.ptp(points, axis=0).max())
+    epsilon = HULL_EPSILON * extent
+    simplex = find_initial_simplex(points, epsilon) if extent > 0.0 else None
+    if simplex is None:
+        return None
+
+    # Every face of the tetrahedron is turned to face away from its fourth corner
+    a, b, c, d = simplex
+    faces = np.array([[a, b, c], [a, c, d], [a, d, b], [b, d, c]], dtype=np.int64)
+    opposite = np.array([d, b, c, a])
+    normals, offsets = get_face_planes(points, faces)
+    inward = np.einsum("ij,ij->i", normals, points[opposite]) - offsets > 0.0
+    faces[inward] = faces[inward][:, [0, 2, 1]]
+    normals, offsets = get_face_planes(points, faces)
+    alive = np.ones(len(faces), dtype=bool)
+
+    is_candidate = np.ones(len(points), dtype=bool)
+    is_candidate[simplex] = False
+    candidates = np.flatnonzero(is_candidate)
+    point_ids, point_faces, point_distances = assign_outside_points(points, candidates, np.arange(4), normals, offsets, epsilon)
+    vertex_count = 4
+    while len(point_ids) and vertex_count < max_vertices:
+        farthest = int(np.argmax(point_distances))
+        eye = point_ids[farthest]
+        live_faces = np.flatnonzero(alive)
+        visible = live_faces[normals[live_faces] @ points[eye] - offsets[live_faces] > epsilon]
+
+        # Horizon: the edges of visible faces whose reverse edge belongs to a face the point doesn't see
+        edges = faces[visible][:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        edge_keys = edges[:, 0] * len(points) + edges[:, 1]
+        horizon = edges[~np.isin(edges[:, 1] * len(points) + edges[:, 0], edge_keys)]
+        new_faces = np.column_stack([horizon, np.full(len(horizon), eye)])
+        new_normals, new_offsets = get_face_planes(points, new_faces)
+
+        first_new_face = len(faces)
+        alive[visible] = False
+        is_visible = np.zeros(len(faces), dtype=bool)
+        is_visible[visible] = True
+        faces = np.concatenate([faces, new_faces])
+        normals = np.concatenate([normals, new_normals])
+        offsets = np.concatenate([offsets, new_offsets])
+        alive = np.concatenate([alive, np.ones(len(new_faces), dtype=bool)])
+        vertex_count += 1
+
+        # Points above the removed faces go to the new faces they are outside of, the rest are inside now
+        orphaned = is_visible[point_faces]
+        orphaned[farthest] = True
+        kept = ~orphaned
+        orphaned[farthest] = False
+        new_ids, new_point_faces, new_distances = assign_outside_points(
+            points, point_ids[orphaned], np.arange(first_new_face, len(faces)), normals, offsets, epsilon)
+        point_ids = np.concatenate([point_ids[kept], new_ids])
+        point_faces = np.concatenate([point_faces[kept], new_point_faces])
+        point_distances = np.concatenate([point_distances[kept], new_distances])
+
+    hull_faces = faces[alive & normals.any(axis=1)] # Without the slivers left by points on the extension of an edge
+    used, corner_vertices = unique_inverse(hull_faces.ravel())
+    return ConvexHull(points[hull_faces.ravel()[used]], corner_vertices.reshape(-1, 3))
+
+def thicken_flat_points(points: np.ndarray, thickness: float) -> Optional[np.ndarray]:
+    """Returns flat points with a copy of them moved thickness along their plane's normal, None if they lie on a line."""
+    if len(points) < 3:
+        return None
+    centered = points - points.mean(axis=0)
+    _, singular_values, axes = np.linalg.svd(centered, full_matrices=False)
+    if singular_values[1] <= HULL_EPSILON * max(singular_values[0], 1e-12):
+        return None
+    offset = axes[2] * (thickness / 2)
+    return np.concatenate([points - offset, points + offset])
+
+def get_piece_hull(positions: np.ndarray, max_vertices: int, min_thickness: float) -> Optional[ConvexHull]:
+    hull = quickhull(positions, max_vertices)
+    if hull is None:
+        thickened = thicken_flat_points(positions, min_thickness)
+        if thickened is not None:
+            hull = quickhull(thickened, max_vertices)
+    return hull
+
+
+# --- Pieces ---
+
+def compact_piece(positions: np.ndarray, triangles: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the vertices the triangles use and the triangles renumbered to them."""
+    used, corner_vertices = unique_inverse(triangles.ravel())
+    return positions[triangles.ravel()[used]], corner_vertices.reshape(-1, 3)
+
+def get_island_pieces(positions: np.ndarray, triangles: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Splits a mesh into its connected islands, as (positions, triangles) each. Loose vertices are left out."""
+    if len(triangles) == 0:
+        return []
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]]])
+    roots = label_connected_vertices(len(positions), edges)
+    triangle_roots = roots[triangles[:, 0]]
+    order = np.argsort(triangle_roots, kind="stable")
+    boundaries = np.flatnonzero(np.diff(triangle_roots[order])) + 1
+    return [compact_piece(positions, triangles[island]) for island in np.split(order, boundaries)]
+
+def merge_pieces(pieces: List[Tuple[np.ndarray, np.ndarray]], max_pieces: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Merges pieces into max_pieces groups of neighbours, ordered along the axis their centers spread the most."""
+    centers = np.array([positions.mean(axis=0) for positions, _ in pieces])
+    axis = int(np.argmax(np.ptp(centers, axis=0)))
+    merged = []
+    for group in np.array_split(np.argsort(centers[:, axis], kind="stable"), max_pieces):
+        offsets = np.cumsum([0] + [len(pieces[index][0]) for index in group[:-1]])
+        merged.append((np.concatenate([pieces[index][0] for index in group]),
+                       np.concatenate([pieces[index][1] + offset for index, offset in zip(group, offsets)])))
+    return merged
+
+def cut_piece(positions: np.ndarray, triangles: np.ndarray, axis: int, value: float) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Cuts a piece in two with the plane where the axis coordinate is value, splitting the triangles it crosses.
+
+    Triangles only touching the plane stay whole on their side, and triangles lying in it go
+    to the side behind them, so the walls at a concave corner stay with the part they bound.
+    """
+    corner_heights = positions[:, axis][triangles] - value
+    tolerance = HULL_EPSILON * float(np.ptp(positions, axis=0).max())
+    above = (corner_heights > tolerance).any(axis=1)
+    below = (corner_heights < -tolerance).any(axis=1)
+    crossing = above & below
+    in_plane = ~above & ~below
+    corners = positions[triangles[in_plane]]
+    faces_up = np.zeros(len(triangles), dtype=bool)
+    faces_up[in_plane] = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])[:, axis] >= 0.0
+    whole_upper = (above & ~below) | (in_plane & ~faces_up)
+    whole_lower = (below & ~above) | (in_plane & faces_up)
+    crossed = triangles[crossing]
+    crossed_upper = corner_heights[crossing] >= -tolerance # Corners on the plane go with the upper side
+    # Each crossed triangle is turned so its lone corner, the one alone on its side, comes first
+    lone_is_upper = crossed_upper.sum(axis=1) == 1
+    lone = np.where(lone_is_upper, np.argmax(crossed_upper, axis=1), np.argmin(crossed_upper, axis=1))
+    crossed = np.take_along_axis(crossed, (lone[:, None] + np.arange(3)) % 3, axis=1)
+    lone_points, second_points, third_points = positions[crossed[:, 0]], positions[crossed[:, 1]], positions[crossed[:, 2]]
+
+    def intersect(start, end):
+        t = (value - start[:, axis]) / (end[:, axis] - start[:, axis])
+        return start + (end - start) * t[:, None]
+
+    crossed_count = len(crossed)
+    extended = np.concatenate([positions, intersect(lone_points, second_points), intersect(lone_points, third_points)])
+    first_cut = len(positions) + np.arange(crossed_count)
+    second_cut = first_cut + crossed_count
+    lone_triangles = np.column_stack([crossed[:, 0], first_cut, second_cut])
+    quad_triangles = np.concatenate([np.column_stack([first_cut, crossed[:, 1], crossed[:, 2]]),
+                                     np.column_stack([first_cut, crossed[:, 2], second_cut])])
+    quad_is_upper = np.tile(~lone_is_upper, 2)
+    halves = [
+        np.concatenate([triangles[whole_upper], lone_triangles[lone_is_upper], quad_triangles[quad_is_upper]]),
+        np.concatenate([triangles[whole_lower], lone_triangles[~lone_is_upper], quad_triangles[~quad_is_upper]]),
+    ]
+    return [compact_piece(extended, half) for half in halves if len(half)]
+
+def get_concavity_depths(positions: np.ndarray, triangles: np.ndarray, hull: ConvexHull) -> np.ndarray:
+    """Returns how far the surface at each vertex lies below the hull, looking out along its triangles' normals.
+
+    Measured along the normals rather than to the nearest hull face, so the inner corner of
+    an L-shaped slab counts as deep even though it lies on the hull's top and bottom faces.
+    """
+    hull_normals, hull_offsets = get_face_planes(hull.points, hull.triangles)
+    if len(triangles) > DEPTH_SAMPLE_TRIANGLES:
+        triangles = triangles[::-(-len(triangles) // DEPTH_SAMPLE_TRIANGLES)]
+    face_normals, _ = get_face_planes(positions, triangles)
+    depths = np.zeros(len(positions))
+    chunk_size = max(1, DEPTH_CHUNK_CORNERS // 3)
+    for start in range(0, len(triangles), chunk_size):
+        chunk = triangles[start:start + chunk_size]
+        facing = face_normals[start:start + len(chunk)] @ hull_normals.T # (tris, hull faces)
+        corner_heights = hull_offsets - positions[chunk] @ hull_normals.T # (tris, 3, hull faces), distance below each face
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distances = np.where(facing[:, None] > 0.0, corner_heights / facing[:, None], np.inf).min(axis=2)
+        distances[~np.isfinite(distances)] = 0.0 # Degenerate triangles
+        np.maximum.at(depths, chunk.ravel(), distances.ravel())
+    return depths
+
+def cut_concave_piece(positions: np.ndarray, triangles: np.ndarray, hull: ConvexHull, min_depth: float) -> Optional[List[Tuple[np.ndarray, np.ndarray]]]:
+    """Cuts a piece at its deepest vertex along its longest axis. Returns None if it's convex enough for its hull.
+
+    Concavities shallower than min_depth (in mesh units) are never cut, whatever the piece's size.
+    """
+    extents = np.ptp(positions, axis=0)
+    depths = get_concavity_depths(positions, triangles, hull)
+    deepest = int(np.argmax(depths))
+    if depths[deepest] <= max(CONCAVITY_TOLERANCE * float(np.linalg.norm(extents)), min_depth):
+        return None
+    axis = int(np.argmax(extents))
+    low, high = float(positions[:, axis].min()), float(positions[:, axis].max())
+    value = float(positions[deepest, axis])
+    if not low + CUT_MARGIN * (high - low) <= value <= high - CUT_MARGIN * (high - low):
+        value = (low + high) / 2
+    halves = cut_piece(positions, triangles, axis, value)
+    return halves if len(halves) == 2 else None
+
+
+# --- Collision Mesh ---
+
+def build_convex_hulls(arrays: MeshArrays, settings: CollisionHullSettings) -> List[ConvexHull]:
+    """Builds the convex pieces of a collision mesh from the arrays of a mesh."""
+    triangles = arrays.triangle_vertices.reshape(-1, 3).astype(np.int64)
+    pieces = get_island_pieces(arrays.positions, triangles)
+    if settings.split_concave and len(pieces) > settings.max_pieces:
+        pieces = merge_pieces(pieces, settings.max_pieces)
+
+    # Largest pieces first, they are cut before the piece budget runs out
+    pieces.sort(key=lambda piece: -float(np.linalg.norm(np.ptp(piece[0], axis=0))))
+    min_thickness = settings.get_mesh_length(HULL_MIN_THICKNESS)
+    hulls = []
+    pending = [(positions, triangles, 0) for positions, triangles in pieces]
+    piece_count = len(pending)
+    while pending:
+        positions, triangles, depth = pending.pop(0)
+        hull = get_piece_hull(positions, settings.max_vertices, min_thickness)
+        if hull is None:
+            piece_count -= 1
+            continue
+        if settings.split_concave and depth < MAX_CUT_DEPTH and piece_count < settings.max_pieces:
+            halves = cut_concave_piece(positions, triangles, hull, min_thickness)
+            if halves:
+                pending.extend((half_positions, half_triangles, depth + 1) for half_positions, half_triangles in halves)
+                piece_count += 1
+                continue
+        hulls.append(hull)
+    return hulls
+
+def get_hull_arrays(hulls: List[ConvexHull], gap: float) -> MeshArrays:
+    """Merges hulls into the arrays of one collision mesh, each hull an island of its own, shrunk by gap (in mesh units)."""
+    positions, corner_vertices, normals = [], [], []
+    vertex_offset = 0
+    for hull in hulls:
+        to_center = hull.points.mean(axis=0) - hull.points
+        distances = np.linalg.norm(to_center, axis=1, keepdims=True)
+        points = hull.points + normalize_rows(to_center) * np.minimum(gap, distances / 2)
+        face_normals, _ = get_face_planes(points, hull.triangles)
+        vertex_normals = np.zeros_like(points)
+        np.add.at(vertex_normals, hull.triangles.ravel(), np.repeat(face_normals, 3, axis=0))
+        positions.append(points)
+        normals.append(normalize_rows(vertex_normals))
+        corner_vertices.append(hull.triangles.ravel() + vertex_offset)
+        vertex_offset += len(points)
+    if not hulls:
+        return MeshArrays(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+    triangle_vertices = np.concatenate(corner_vertices).astype(np.int32)
+    return MeshArrays(np.concatenate(positions), np.concatenate(normals), triangle_vertices, np.zeros(len(triangle_vertices) // 3, dtype=np.int32))
+
+def build_collision_arrays(arrays: MeshArrays, settings: CollisionHullSettings) -> Tuple[MeshArrays, int]:
+    """Returns the arrays of a collision mesh made of convex hulls of the mesh, and the number of hulls."""
+    hulls = build_convex_hulls(arrays, settings)
+    return get_hull_arrays(hulls, settings.get_mesh_length(HULL_GAP)), len(hulls)
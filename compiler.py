@@ -0,0 +1,432 @@
+"""Runs studiomdl, several processes at a time."""
+
+import os
+import time
+import queue
+import signal
+import shutil
+import threading
+import subprocess
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+from .tracing import Tracer, NULL_TRACER
+from .diagnostics import Diagnostic, DiagnosticParser
+
+
+@dataclass
+class CompileJob:
+    """A model whose QC and SMDs have been written and that is ready for studiomdl."""
+    object_name: str
+    qc_path: str
+    work_dir: str # Temp folder holding the QC and SMDs, owned by this job only
+    cdmaterials: List[str] = field(default_factory=list)
+    material_names: List[str] = field(default_factory=list)
+    model_path: str = "" # $modelname without extension, relative to the models folder
+    fingerprint: str = "" # Inputs fingerprint for the compile manifest
+    inputs_key: str = "" # Settings and collision mesh, for Compile Changed
+    output_base: str = "" # Compiled files without extension, for the artifact cache
+    mesh_objects: Dict[str, str] = field(default_factory=dict) # Mesh file name without extension: object it was exported from
+    triangles: int = 0 # Of every mesh, the compile timeout scales with it
+
+@dataclass
+class CompileResult:
+    job: CompileJob
+    success: bool
+    error: str = ""
+    seconds: float = 0.0
+    temp_removed: bool = True
+    temp_kept: bool = False # Failed and left in place for inspection
+    cancelled: bool = False
+    from_cache: bool = False # Restored from the artifact cache instead of running studiomdl
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+    stopped_early: bool = False # Killed at the first fatal message instead of waiting for studiomdl to exit
+    timed_out: bool = False
+    hung: bool = False # Killed after printing nothing and using no CPU for CompilePolicy.hang_seconds
+    retry_reasons: List[str] = field(default_factory=list) # Why each earlier attempt was run again
+
+@dataclass
+class CompilePolicy:
+    """How long a studiomdl run may take, and which failures are worth running it again for."""
+    timeout_seconds: float = 120.0 # Of every job, 0 for no timeout
+    timeout_seconds_per_k_triangles: float = 10.0 # Added per 1000 triangles, concave collision meshes take long
+    hang_seconds: float = 300.0 # No output and no CPU use for this long counts as hung, 0 to never check
+    retries: int = 1 # Runs after the first one, for failures that can pass on the next try
+    retry_backoff_seconds: float = 2.0 # Wait before the first retry, doubled for every further one
+
+    def get_timeout(self, triangles: int) -> float:
+        if self.timeout_seconds <= 0:
+            return 0.0
+        return self.timeout_seconds + self.timeout_seconds_per_k_triangles * triangles / 1000
+
+WATCHDOG_INTERVAL = 2.0 # Seconds between checks of the running studiomdl processes
+TRANSIENT_KINDS = {"file_locked"} # Diagnostic kinds that often pass on the next try
+
+def get_compile_job_count(requested_jobs: int) -> int:
+    """Returns the number of parallel studiomdl processes to run, 0 meaning one per CPU core."""
+    if requested_jobs > 0:
+        return requested_jobs
+    return os.cpu_count() or 1
+
+def get_studiomdl_args(studiomdl_exe: str, game_dir: str, qc_path: str) -> List[str]:
+    studiomdl_quiet = True
+    studiomdl_fastbuild = False
+    studiomdl_nowarnings = True
+    studiomdl_nox360 = True
+    studiomdl_args = [studiomdl_exe, "-game", game_dir, "-nop4"]
+    if studiomdl_quiet: studiomdl_args.append("-quiet")
+    if studiomdl_fastbuild: studiomdl_args.append("-fastbuild")
+    if studiomdl_nowarnings: studiomdl_args.append("-nowarnings")
+    if studiomdl_nox360: studiomdl_args.append("-nox360")
+    studiomdl_args.append(qc_path)
+    return studiomdl_args
+
+def get_process_cpu_seconds(pid: int) -> Optional[float]:
+    """Returns the CPU time used by a process and the processes of its group so far, None where it can't be read.
+
+    Off Windows, studiomdl runs under Wine, in the process group run_studiomdl() starts it in.
+    """
+    if os.name == "nt":
+        import ctypes
+        from ctypes import wintypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            creation_time, exit_time, kernel_time, user_time = (wintypes.FILETIME() for _ in range(4))
+            if not kernel32.GetProcessTimes(handle, ctypes.byref(creation_time), ctypes.byref(exit_time), ctypes.byref(kernel_time), ctypes.byref(user_time)):
+                return None
+            return sum(filetime.dwHighDateTime << 32 | filetime.dwLowDateTime for filetime in (kernel_time, user_time)) / 1e7
+        finally:
+            kernel32.CloseHandle(handle)
+    if not os.path.isdir("/proc"):
+        return None # macOS
+    clock_ticks = 0
+    try:
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry.name}/stat", "r") as file:
+                    fields = file.read().rsplit(")", 1)[1].split() # The process name can contain spaces
+            except OSError:
+                continue # Exited meanwhile
+            if int(fields[2]) == pid: # Process group
+                clock_ticks += int(fields[11]) + int(fields[12]) # User and system time
+    except (OSError, ValueError, IndexError):
+        return None
+    return clock_ticks / os.sysconf("SC_CLK_TCK")
+
+def kill_process_tree(process: subprocess.Popen):
+    """Kills a studiomdl process and whatever it started, e.g. Wine's."""
+    if process.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    try:
+        process.kill() # In case the tree couldn't be killed
+    except OSError:
+        pass
+
+def remove_job_dir(work_dir: str) -> bool:
+    """Deletes a compile job's temp folder. Returns False if it could not be removed."""
+    try:
+        shutil.rmtree(work_dir)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error removing temp folder '{work_dir}': {e}")
+        return False
+    return True
+
+@dataclass
+class WatchedProcess:
+    """A running studiomdl process, checked by the scheduler's watchdog thread."""
+    process: subprocess.Popen
+    timeout: float # Seconds, 0 for none
+    start: float = field(default_factory=time.monotonic)
+    last_activity: float = field(default_factory=time.monotonic) # Last output or CPU use
+    cpu_seconds: Optional[float] = None
+    timed_out: bool = False
+    hung: bool = False
+
+
+class StudiomdlScheduler:
+    """Runs studiomdl for compile jobs on a pool of background threads.
+
+    Jobs can be submitted while the main thread is still exporting the next models,
+    so exporting and compiling overlap. studiomdl is an external process, so the
+    worker threads only wait on it and clean up after it, they never touch bpy.
+    At most ``max_jobs + max_pending`` jobs are queued or running at once, and
+    ``submit`` blocks until a slot frees up, which caps the temp disk usage.
+    With ``keep_failed``, the temp folders of failed compiles are left for the caller.
+    With a ``cache`` (see artifact_cache.py), jobs compiled before are restored from it
+    instead, and new compiles are added to it.
+    A watchdog thread kills the studiomdl runs that exceed the ``policy`` timeout or hang,
+    and failures that can pass on the next try are run again after a backoff.
+    """
+
+    def __init__(self, studiomdl_exe: str, game_dir: str, max_jobs: int, max_pending: int = None, on_job_started=None,
+                 tracer: Tracer = NULL_TRACER, keep_failed: bool = False, cache=None, policy: CompilePolicy = None):
+        self.studiomdl_exe = studiomdl_exe
+        self.game_dir = game_dir
+        self.tracer = tracer
+        self.keep_failed = keep_failed
+        self.cache = cache
+        self.policy = policy or CompilePolicy()
+        self.max_jobs = max(1, max_jobs)
+        self.max_pending = self.max_jobs if max_pending is None else max(0, max_pending)
+        self.on_job_started = on_job_started # Called from the worker thread, must not touch bpy
+        self.studiomdl_missing = threading.Event()
+        self.cancelled = threading.Event()
+        self.pool = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="AutoMDL studiomdl")
+        self.lock = threading.Condition()
+        self.active_jobs = 0 # Queued or running
+        self.processes: Dict[subprocess.Popen, WatchedProcess] = {}
+        self.jobs_by_future = {}
+        self.finished_futures = queue.Queue()
+        self.watchdog_stopped = threading.Event()
+        self.watchdog = None
+        if self.policy.timeout_seconds > 0 or self.policy.hang_seconds > 0:
+            self.watchdog = threading.Thread(target=self._watch_processes, name="AutoMDL studiomdl watchdog", daemon=True)
+            self.watchdog.start()
+
+    def run_job(self, job: CompileJob) -> CompileResult:
+        if self.cancelled.is_set():
+            return CompileResult(job, False, f"Compile of '{job.object_name}' was cancelled.", cancelled=True)
+        if self.studiomdl_missing.is_set():
+            return CompileResult(job, False, f"Skipped compiling '{job.object_name}': studiomdl.exe not found at '{self.studiomdl_exe}'.")
+
+        start = time.perf_counter()
+        cache_key = ""
+        if self.cache is not None and job.output_base:
+            with self.tracer.span("cache_restore", "cache", object=job.object_name) as span:
+                try:
+                    cache_key = self.cache.get_key(job.qc_path)
+                except OSError:
+                    pass # Compiled without the cache
+                from_cache = bool(cache_key) and self.cache.restore(cache_key, job.output_base)
+                span.set(hit=from_cache)
+            if from_cache:
+                return CompileResult(job, True, seconds=time.perf_counter() - start, from_cache=True)
+
+        if self.on_job_started:
+            self.on_job_started(job)
+        compiled_after_ns = time.time_ns()
+        retry_reasons = []
+        while True:
+            result = self.run_studiomdl(job)
+            retry_reason = self.get_retry_reason(result)
+            if not retry_reason or len(retry_reasons) >= self.policy.retries:
+                break
+            retry_reasons.append(retry_reason)
+            if self.cancelled.wait(self.policy.retry_backoff_seconds * 2 ** (len(retry_reasons) - 1)):
+                break
+        if self.cancelled.is_set():
+            return CompileResult(job, False, f"Compile of '{job.object_name}' was cancelled.", time.perf_counter() - start, cancelled=True)
+        result.retry_reasons = retry_reasons
+        result.seconds = time.perf_counter() - start
+        if result.success and cache_key:
+            with self.tracer.span("cache_store", "cache", object=job.object_name):
+                self.cache.store(cache_key, job.output_base, compiled_after_ns)
+        return result
+
+    def run_studiomdl(self, job: CompileJob) -> CompileResult:
+        """Runs studiomdl once for a job, under the watchdog."""
+        start = time.perf_counter()
+        try:
+            # studiomdl prints its errors on stdout, stderr is merged in so nothing is missed.
+            # Started in a group of its own, so the watchdog can kill Wine's processes with it.
+            process = subprocess.Popen(get_studiomdl_args(self.studiomdl_exe, self.game_dir, job.qc_path),
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace",
+                                       start_new_session=os.name != "nt")
+        except FileNotFoundError:
+            # No point starting the remaining jobs if studiomdl isn't found
+            self.studiomdl_missing.set()
+            error_msg = f"Studiomdl.exe not found at '{self.studiomdl_exe}'. Cannot compile."
+            return CompileResult(job, False, error_msg)
+        except OSError as e:
+            error_msg = f"Could not run studiomdl for '{job.object_name}': {e}"
+            return CompileResult(job, False, error_msg, time.perf_counter() - start)
+
+        timeout = self.policy.get_timeout(job.triangles)
+        watched = WatchedProcess(process, timeout)
+        with self.lock:
+            self.processes[process] = watched
+            if self.cancelled.is_set(): # Cancelled while starting up
+                kill_process_tree(process)
+        parser = DiagnosticParser(job.object_name, job.mesh_objects)
+        stopped_early = False
+        try:
+            # Read while it runs, so a fatal error stops it without waiting for the rest of the compile
+            for line in process.stdout:
+                watched.last_activity = time.monotonic()
+                diagnostic = parser.feed(line)
+                if diagnostic is not None and diagnostic.fatal and not stopped_early:
+                    stopped_early = True
+                    kill_process_tree(process)
+            process.wait()
+        finally:
+            process.stdout.close()
+            with self.lock:
+                self.processes.pop(process, None)
+
+        seconds = time.perf_counter() - start
+        if self.cancelled.is_set():
+            return CompileResult(job, False, f"Compile of '{job.object_name}' was cancelled.", seconds, cancelled=True)
+        if watched.timed_out or watched.hung:
+            if watched.timed_out:
+                message = f"Timed out after {seconds:.0f}s, the limit for {job.triangles} triangle(s). Raise the compile timeout in the add-on preferences if it needs longer."
+            else:
+                message = f"Hung: no output and no CPU use for {self.policy.hang_seconds:.0f}s, stopped after {seconds:.0f}s."
+            diagnostics = parser.diagnostics + [Diagnostic("error", "timeout" if watched.timed_out else "hang", message, job.object_name, fatal=True)]
+            error_msg = f"Studiomdl failed for '{job.object_name}' (QC: {os.path.basename(job.qc_path)}). {message}"
+            return CompileResult(job, False, error_msg, seconds, diagnostics=diagnostics, timed_out=watched.timed_out, hung=watched.hung)
+        if stopped_early or process.returncode != 0:
+            errors = parser.get_errors()
+            details = "\n".join(diagnostic.format() for diagnostic in errors) if errors else (parser.get_output_tail() or "(no output)")
+            stopped_msg = ", stopped at its first fatal error" if stopped_early else ""
+            error_msg = f"Studiomdl failed for '{job.object_name}' (QC: {os.path.basename(job.qc_path)}{stopped_msg}). Error:\n{details}"
+            return CompileResult(job, False, error_msg, seconds, diagnostics=parser.diagnostics, stopped_early=stopped_early)
+        return CompileResult(job, True, seconds=seconds, diagnostics=parser.diagnostics)
+
+    def get_retry_reason(self, result: CompileResult) -> str:
+        """Returns why a failed run is worth repeating, "" if the next run would fail the same way.
+
+        Timeouts and recognized errors aren't retried. Runs that fail without saying why
+        are, like the first compile of an object with a dot in its name often does.
+        """
+        if result.success or result.cancelled or result.timed_out or self.studiomdl_missing.is_set():
+            return ""
+        if result.hung:
+            return "studiomdl hung"
+        errors = [diagnostic for diagnostic in result.diagnostics if diagnostic.severity == "error"]
+        transient_errors = [diagnostic for diagnostic in errors if diagnostic.kind in TRANSIENT_KINDS]
+        if transient_errors:
+            return transient_errors[0].message
+        if not errors:
+            return "studiomdl failed without an error message"
+        return ""
+
+    def is_hung(self, watched: WatchedProcess, now: float) -> bool:
+        """Returns whether a process printed nothing and used no CPU for the policy's hang_seconds.
+
+        Always False where the CPU time can't be read, a long silent compile would look the same.
+        """
+        if self.policy.hang_seconds <= 0:
+            return False
+        cpu_seconds = get_process_cpu_seconds(watched.process.pid)
+        if cpu_seconds is None:
+            return False
+        if cpu_seconds != watched.cpu_seconds:
+            watched.cpu_seconds = cpu_seconds
+            watched.last_activity = now
+        return now - watched.last_activity > self.policy.hang_seconds
+
+    def _watch_processes(self):
+        # Watchdog thread: kills the studiomdl runs that take too long or stopped doing anything
+        while not self.watchdog_stopped.wait(WATCHDOG_INTERVAL):
+            with self.lock:
+                watched_processes = list(self.processes.values())
+            now = time.monotonic()
+            for watched in watched_processes:
+                if watched.timed_out or watched.hung:
+                    continue
+                if watched.timeout and now - watched.start > watched.timeout:
+                    watched.timed_out = True
+                elif self.is_hung(watched, now):
+                    watched.hung = True
+                else:
+                    continue
+                kill_process_tree(watched.process)
+
+    def _run_and_clean_up(self, job: CompileJob) -> CompileResult:
+        result = None
+        temp_removed = False
+        try:
+            with self.tracer.span("studiomdl", "compile", object=job.object_name) as span:
+                result = self.run_job(job)
+                span.set(success=result.success, retries=len(result.retry_reasons), timed_out=result.timed_out, hung=result.hung)
+        finally:
+            if self.keep_failed and result is not None and not result.success and not result.cancelled:
+                result.temp_kept = True
+            else:
+                # The temp files are only needed by studiomdl, free the disk space right away
+                with self.tracer.span("remove_temp", "io", object=job.object_name):
+                    temp_removed = remove_job_dir(job.work_dir)
+        result.temp_removed = temp_removed or result.temp_kept
+        return result
+
+    def _job_done(self, future):
+        with self.lock:
+            self.active_jobs -= 1
+            self.lock.notify_all()
+        self.finished_futures.put(future)
+
+    def has_free_slot(self) -> bool:
+        with self.lock:
+            return self.active_jobs < self.max_jobs + self.max_pending
+
+    def is_idle(self) -> bool:
+        with self.lock:
+            return self.active_jobs == 0
+
+    def submit(self, job: CompileJob):
+        """Queues a job for compiling, blocking while the queue is full."""
+        with self.lock:
+            while self.active_jobs >= self.max_jobs + self.max_pending:
+                self.lock.wait()
+            self.active_jobs += 1
+        try:
+            future = self.pool.submit(self._run_and_clean_up, job)
+        except BaseException:
+            with self.lock:
+                self.active_jobs -= 1
+                self.lock.notify_all()
+            raise
+        self.jobs_by_future[future] = job
+        future.add_done_callback(self._job_done)
+
+    def poll(self) -> List[CompileResult]:
+        """Returns the results of the jobs that finished since the last call, without waiting."""
+        results = []
+        while True:
+            try:
+                future = self.finished_futures.get_nowait()
+            except queue.Empty:
+                return results
+            job = self.jobs_by_future.pop(future)
+            if future.cancelled():
+                # Never started, so the worker didn't clean up after it
+                results.append(CompileResult(job, False, f"Compile of '{job.object_name}' was cancelled.",
+                                             cancelled=True, temp_removed=remove_job_dir(job.work_dir)))
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(CompileResult(job, False, f"Unexpected error while compiling '{job.object_name}': {e}"))
+
+    def finish(self) -> List[CompileResult]:
+        """Waits for every submitted job and returns the results not polled yet."""
+        self.pool.shutdown(wait=True)
+        self.watchdog_stopped.set()
+        return self.poll()
+
+    def cancel(self) -> List[CompileResult]:
+        """Drops the queued jobs, kills the running studiomdl processes and returns the results not polled yet."""
+        self.cancelled.set()
+        with self.lock:
+            for process in self.processes:
+                kill_process_tree(process)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self.watchdog_stopped.set()
+        return self.poll()
@@ -0,0 +1,147 @@
+"""Geometry deduplication: models with identical meshes share one export, and optionally one compile.
+
+Modular sets are full of linked duplicates (objects sharing a mesh datablock) and exact
+copies. Every candidate gets a key per exported mesh: a hash of the evaluated geometry,
+the materials and the rotation/scale the export applies. Models with the same key would
+get byte-identical SMD/DMX files, so the mesh is exported once into a shared folder and
+linked into each model's compile folder. Models whose visual and collision keys both
+match would even compile to identical MDLs apart from $modelname; with aliases allowed,
+only the first one is compiled and the others are listed as aliases of it.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from typing import List, Dict, Optional
+from dataclasses import dataclass, field
+
+from .manifest import hash_mesh_geometry, hash_object_transform
+
+
+ALIAS_LIST_VERSION = 1
+
+def get_alias_list_path(blend_path: str) -> str:
+    """Returns the path of the alias list stored next to a .blend file."""
+    return os.path.splitext(blend_path)[0] + ".automdl-aliases.json"
+
+def link_mesh_file(shared_path: str, path: str):
+    """Puts a shared mesh file at path: a hard link where the file system allows it, a copy otherwise."""
+    try:
+        os.link(shared_path, path)
+    except OSError:
+        shutil.copyfile(shared_path, path)
+
+
+@dataclass
+class SharedMesh:
+    """A mesh exported once for every model of its group."""
+    object_names: List[str] = field(default_factory=list) # In compile order
+    path: str = "" # In the build's shared folder, without extension
+    exported_by: str = "" # Object the files were exported from, empty until exported
+    triangles: int = 0
+    lod_triangles: List[int] = field(default_factory=list)
+    hull_pieces: int = 0 # Convex hulls of a collision mesh exported as hulls
+
+
+class DuplicateIndex:
+    """Keys the meshes of a collection compile and groups the models that share them.
+
+    Evaluated meshes of objects without modifiers are the mesh datablock itself, so linked
+    duplicates are hashed once per datablock rather than once per object.
+    """
+
+    def __init__(self, depsgraph):
+        self.depsgraph = depsgraph
+        self.geometry_digests: Dict[tuple, bytes] = {} # (mesh datablock, include_shading): digest
+        self.vis_keys: Dict[str, str] = {} # object name: key
+        self.phy_keys: Dict[str, str] = {} # object name: key of its collision mesh, "" if it has none
+        self.shared_meshes: Dict[str, SharedMesh] = {} # mesh key: meshes used by more than one model
+        self.primaries: Dict[str, str] = {} # compile key: model path of the model compiled for it
+        self.aliases: Dict[str, str] = {} # alias model path: model path compiled instead, both with .mdl
+        self.exports_saved = 0
+        self.compiles_saved = 0
+        self.hashed_meshes = 0
+
+    def get_geometry_digest(self, obj, include_shading: bool) -> bytes:
+        cache_key = (obj.data, include_shading) if not obj.modifiers else None
+        digest = self.geometry_digests.get(cache_key) if cache_key else None
+        if digest is None:
+            hasher = hashlib.sha1()
+            hash_mesh_geometry(hasher, obj, self.depsgraph, include_shading)
+            digest = hasher.digest()
+            self.hashed_meshes += 1
+            if cache_key:
+                self.geometry_digests[cache_key] = digest
+        return digest
+
+    def get_mesh_key(self, obj, is_collision: bool, hull_mode: str = "") -> str:
+        """Returns a key that is the same for two objects exactly when their exported meshes are.
+
+        hull_mode keys collision meshes exported as convex hulls apart from the mesh itself, see add_model().
+        """
+        hasher = hashlib.sha1((b"phy" if is_collision else b"ref") + hull_mode.encode())
+        hasher.update(self.get_geometry_digest(obj, include_shading=not is_collision))
+        hash_object_transform(hasher, obj)
+        if not is_collision: # Collision meshes are written with a placeholder material
+            hasher.update("\0".join(slot.material.name if slot.material else "" for slot in obj.material_slots).encode())
+        return hasher.hexdigest()
+
+    def add_model(self, vis_mesh_obj, phy_mesh_obj, hull_mode: str = ""):
+        """Keys a candidate's meshes and adds it to the groups of the ones already seen.
+
+        Args:
+            hull_mode: "simplify" if the COL_ mesh is exported as convex hulls, "generate" if
+                the model has none and its collision hulls are generated from the visual mesh.
+        """
+        vis_key = self.get_mesh_key(vis_mesh_obj, False)
+        if phy_mesh_obj:
+            phy_key = self.get_mesh_key(phy_mesh_obj, True, hull_mode)
+        else:
+            phy_key = self.get_mesh_key(vis_mesh_obj, True, hull_mode) if hull_mode else ""
+        self.vis_keys[vis_mesh_obj.name] = vis_key
+        self.phy_keys[vis_mesh_obj.name] = phy_key
+        for mesh_key in (vis_key, phy_key):
+            if mesh_key:
+                self.shared_meshes.setdefault(mesh_key, SharedMesh()).object_names.append(vis_mesh_obj.name)
+
+    def finish_grouping(self):
+        """Drops the meshes only one model uses, they are exported straight into its compile folder."""
+        self.shared_meshes = {mesh_key: shared_mesh for mesh_key, shared_mesh in self.shared_meshes.items()
+                              if len(shared_mesh.object_names) > 1}
+
+    def set_shared_dir(self, shared_dir: Optional[str]):
+        """Sets the folder the shared meshes are exported to, None to export them per model after all."""
+        if shared_dir is None:
+            self.shared_meshes.clear()
+        for mesh_number, shared_mesh in enumerate(self.shared_meshes.values()):
+            shared_mesh.path = os.path.join(shared_dir, f"mesh{mesh_number}")
+
+    def get_shared_mesh(self, mesh_key: str) -> Optional[SharedMesh]:
+        return self.shared_meshes.get(mesh_key)
+
+    def get_compile_key(self, object_name: str) -> Optional[str]:
+        """Returns a key that is the same for two models exactly when their meshes are, None if they couldn't be keyed."""
+        if object_name not in self.vis_keys:
+            return None
+        return self.vis_keys[object_name] + self.phy_keys[object_name]
+
+    def get_primary(self, object_name: str) -> Optional[str]:
+        """Returns the model path already compiled from the same meshes, None if there is none yet."""
+        return self.primaries.get(self.get_compile_key(object_name))
+
+    def set_primary(self, object_name: str, model_path: str):
+        compile_key = self.get_compile_key(object_name)
+        if compile_key:
+            self.primaries.setdefault(compile_key, model_path)
+
+    def add_alias(self, model_path: str, primary_model_path: str, mesh_count: int):
+        self.aliases[model_path + ".mdl"] = primary_model_path + ".mdl"
+        self.compiles_saved += 1
+        self.exports_saved += mesh_count
+
+    def write_alias_list(self, path: str):
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": ALIAS_LIST_VERSION, "aliases": self.aliases}, file, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
@@ -0,0 +1,120 @@
+"""Studiomdl diagnostics: the known messages in its output, turned into structured records.
+
+studiomdl prints most of its errors on stdout rather than stderr, prefixed with ERROR: or
+WARNING:, and with the QC path and line for problems in the QC. The compile worker feeds
+its output to a DiagnosticParser line by line while it runs, so a fatal message can stop
+the process right away instead of waiting for it to exit. Only ERROR: lines and a few exact
+system messages are fatal; the rest of its output is progress that merely mentions collision
+models or files.
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+
+MAX_DIAGNOSTICS = 50 # Per compile, studiomdl can repeat a warning for every vertex
+OUTPUT_TAIL_LINES = 20 # Shown when studiomdl fails without a message we recognize
+
+# (kind, severity, stops the compile, pattern), the first matching pattern wins
+DIAGNOSTIC_PATTERNS = (
+    ("collision", "warning", False, re.compile(r"costly collision model|error with convex elements", re.IGNORECASE)),
+    ("too_many_vertices", "error", True, re.compile(r"too many (?:unified )?(?:verts|vertices|vertexes)|vertex count .*exceed", re.IGNORECASE)),
+    ("material", "error", True, re.compile(r"too many (?:materials|skin|texture)|material .*(?:not found|too long)", re.IGNORECASE)),
+    ("collision", "error", True, re.compile(r"2-dimensional geometry|\$collisionmodel|collision model|too many convex|convex hull", re.IGNORECASE)),
+    ("file_locked", "error", True, re.compile(r"being used by another process|sharing violation|access is denied|permission denied", re.IGNORECASE)),
+    ("missing_file", "error", True, re.compile(r"(?:can't|could not|couldn't|unable to) (?:open|find|load)|file not found|no such file", re.IGNORECASE)),
+)
+# Fatal messages printed without a prefix (by Windows on studiomdl's behalf), matched whole.
+# Any other line without an ERROR: prefix never stops studiomdl: it prints progress like
+# "Collision model completed." that the patterns above would take for an error
+UNPREFIXED_FATAL_MESSAGES = frozenset((
+    "the process cannot access the file because it is being used by another process",
+    "access is denied",
+))
+SEVERITY_PREFIX = re.compile(r"^\s*(ERROR|WARNING)\s*:\s*", re.IGNORECASE)
+QC_LOCATION = re.compile(r"[^\s\"']*?\.qc\((\d+)\)\s*:?\s*-?\s*", re.IGNORECASE) # "C:\...\qc_a.qc(12): - "
+
+
+@dataclass
+class Diagnostic:
+    """A message studiomdl printed about a model."""
+    severity: str # "error" or "warning"
+    kind: str # "too_many_vertices", "material", "collision", "file_locked", "missing_file", "timeout", "hang" or "other"
+    message: str # Without the ERROR:/WARNING: prefix and the temp QC path
+    object_name: str = "" # Object whose mesh file the message names, else the model's object
+    qc_line: int = 0 # Line of the QC studiomdl reported, 0 if it didn't
+    fatal: bool = False # studiomdl is stopped as soon as it prints one of these
+
+    def format(self) -> str:
+        qc_line_text = f" (QC line {self.qc_line})" if self.qc_line else ""
+        return f"{self.object_name}: {self.message}{qc_line_text}"
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def parse_line(line: str, object_name: str, mesh_objects: Dict[str, str]) -> Optional[Diagnostic]:
+    """Returns the diagnostic in a line of studiomdl output, None if the line isn't one we recognize.
+
+    mesh_objects maps the mesh file names of the job (without extension) to the objects
+    they were exported from, so messages about the COL_ mesh name the collision object.
+    """
+    line = line.strip()
+    prefix_match = SEVERITY_PREFIX.match(line)
+    message = line[prefix_match.end():] if prefix_match else line
+    qc_line = 0
+    location_match = QC_LOCATION.search(message)
+    if location_match:
+        qc_line = int(location_match.group(1))
+        message = (message[:location_match.start()] + message[location_match.end():]).strip()
+    if not message:
+        return None
+
+    for kind, severity, stops, pattern in DIAGNOSTIC_PATTERNS:
+        if pattern.search(message):
+            break
+    else:
+        kind, severity, stops = "other", "error", True
+    if prefix_match:
+        if prefix_match.group(1).upper() == "WARNING":
+            severity, stops = "warning", False # Whatever it says, studiomdl carries on
+    elif message.rstrip(".").lower() in UNPREFIXED_FATAL_MESSAGES:
+        severity, stops = "error", True
+    elif severity != "warning":
+        return None # Too loose a match to act on, it's in the output tail if the compile fails
+
+    message_lower = message.lower()
+    for file_name in sorted(mesh_objects, key=len, reverse=True):
+        if file_name.lower() in message_lower:
+            object_name = mesh_objects[file_name]
+            break
+    return Diagnostic(severity, kind, message, object_name, qc_line, stops)
+
+
+class DiagnosticParser:
+    """Collects the diagnostics of one studiomdl run from its output, fed one line at a time."""
+
+    def __init__(self, object_name: str, mesh_objects: Dict[str, str]):
+        self.object_name = object_name
+        self.mesh_objects = mesh_objects
+        self.diagnostics: List[Diagnostic] = []
+        self.output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+
+    def feed(self, line: str) -> Optional[Diagnostic]:
+        """Parses a line of output. Returns its diagnostic, whose fatal flag says whether to stop studiomdl."""
+        if line.strip():
+            self.output_tail.append(line.rstrip())
+        diagnostic = parse_line(line, self.object_name, self.mesh_objects)
+        if diagnostic is None:
+            return None
+        if len(self.diagnostics) < MAX_DIAGNOSTICS:
+            self.diagnostics.append(diagnostic)
+        return diagnostic
+
+    def get_errors(self) -> List[Diagnostic]:
+        return [diagnostic for diagnostic in self.diagnostics if diagnostic.severity == "error"]
+
+    def get_output_tail(self) -> str:
+        return "\n".join(self.output_tail)
@@ -0,0 +1,123 @@
+"""Dirty tracking: which objects changed since they were last compiled, without evaluating any mesh.
+
+A depsgraph handler records the meshes of the picked model collections (and of their collision
+sub-collections) whose geometry, transform, shading, materials or modifiers were edited, including
+edits and renames of the materials they use. Compile Changed then only exports the models that were
+edited (or whose COL_ mesh was), plus the ones the compile manifest can't vouch for; every other
+model is skipped without touching its mesh. The list is saved in the .blend file.
+
+Kept free of heavy imports, it's loaded when the add-on registers.
+"""
+
+import json
+from typing import Dict, Iterable, Set
+
+import bpy
+
+
+DIRTY_OBJECTS_PROPERTY = "automdl_dirty_objects" # Scene property the list is saved in
+
+dirty_objects: Dict[str, int] = {} # object name: generation it was last changed in
+generation = 0
+
+
+def mark_dirty(object_name: str):
+    global generation
+    generation += 1
+    dirty_objects[object_name] = generation
+
+def get_generation() -> int:
+    """Returns a marker of the changes recorded so far, see clear_dirty()."""
+    return generation
+
+def get_dirty_objects() -> Set[str]:
+    return set(dirty_objects)
+
+def clear_dirty(object_names: Iterable[str], up_to_generation: int):
+    """Forgets the changes to compiled objects, except the ones made after up_to_generation (e.g. during the compile)."""
+    for object_name in object_names:
+        if dirty_objects.get(object_name, up_to_generation + 1) <= up_to_generation:
+            del dirty_objects[object_name]
+
+def get_compiled_collections() -> Set:
+    """Returns the model collections picked in any scene and their "collision" sub-collections."""
+    collections = set()
+    for scene in bpy.data.scenes:
+        collection = getattr(scene, "model_collection", None)
+        if collection is None:
+            continue
+        collections.add(collection)
+        for child in collection.children:
+            if child.name.lower() == "collision":
+                collections.add(child)
+    return collections
+
+def is_compiled_object(obj, compiled_collections: Set) -> bool:
+    """Whether an object can be a model or a COL_ mesh: a mesh in one of the compiled collections."""
+    return obj.type == 'MESH' and any(collection in compiled_collections for collection in obj.users_collection)
+
+@bpy.app.handlers.persistent
+def onDepsgraphUpdatePost(scene, depsgraph):
+    # Runs after every edit, so only cheap checks here
+    compiled_collections = None
+    updated_mesh_names = set()
+    updated_material_names = set()
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Object):
+            # Modifier and material slot edits come in as geometry updates of the object
+            if update.is_updated_geometry or update.is_updated_transform or update.is_updated_shading:
+                if compiled_collections is None:
+                    compiled_collections = get_compiled_collections()
+                if is_compiled_object(id_data, compiled_collections):
+                    mark_dirty(id_data.name)
+        elif isinstance(id_data, bpy.types.Mesh) and (update.is_updated_geometry or update.is_updated_shading):
+            updated_mesh_names.add(id_data.name)
+        elif isinstance(id_data, bpy.types.Material):
+            # Material names end up in the compiled model, renames come in as updates of the material
+            updated_material_names.add(id_data.name)
+    if updated_mesh_names or updated_material_names:
+        # Mesh data edited without an update of its objects (e.g. from a script), or a material they use
+        if compiled_collections is None:
+            compiled_collections = get_compiled_collections()
+        for collection in compiled_collections:
+            for obj in collection.objects:
+                if obj.type != 'MESH':
+                    continue
+                if obj.data.name in updated_mesh_names or any(slot.material is not None and slot.material.name in updated_material_names for slot in obj.material_slots):
+                    mark_dirty(obj.name)
+
+@bpy.app.handlers.persistent
+def onSavePre(*args):
+    saved_list = json.dumps(sorted(dirty_objects))
+    for scene in bpy.data.scenes:
+        setattr(scene, DIRTY_OBJECTS_PROPERTY, saved_list)
+
+@bpy.app.handlers.persistent
+def onLoadPost(*args):
+    global generation
+    dirty_objects.clear()
+    generation = 0
+    for scene in bpy.data.scenes:
+        try:
+            object_names = json.loads(getattr(scene, DIRTY_OBJECTS_PROPERTY, "") or "[]")
+        except ValueError:
+            continue
+        for object_name in object_names:
+            mark_dirty(object_name)
+
+HANDLERS = (
+    (bpy.app.handlers.depsgraph_update_post, onDepsgraphUpdatePost),
+    (bpy.app.handlers.save_pre, onSavePre),
+    (bpy.app.handlers.load_post, onLoadPost),
+)
+
+def register_handlers():
+    for handler_list, handler in HANDLERS:
+        if handler not in handler_list:
+            handler_list.append(handler)
+
+def unregister_handlers():
+    for handler_list, handler in HANDLERS:
+        if handler in handler_list:
+            handler_list.remove(handler)
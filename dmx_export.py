@@ -0,0 +1,299 @@
+"""Binary DMX model export, an alternative to SMD that studiomdl reads without parsing text.
+
+An SMD repeats the full position, normal and UV of every triangle corner as text. A DMX
+model stores each distinct position, normal and UV once as float32 and the triangles as
+indices into them, grouped into one face set per material.
+
+Written as binary keyvalues2, encoding version 2 with model format 18, which every
+Source 1 studiomdl since the Orange Box reads.
+"""
+
+import os
+import uuid
+import struct
+from typing import List, Dict, Tuple, Any
+import numpy as np
+
+from .smd_export import MeshArrays, unique_inverse
+
+DMX_ENCODING = "binary"
+DMX_ENCODING_VERSION = 2
+DMX_FORMAT = "model"
+DMX_FORMAT_VERSION = 18
+
+# Attribute types of binary DMX, arrays are the single value type + AT_ARRAY_OFFSET
+AT_ELEMENT = 1
+AT_INT = 2
+AT_FLOAT = 3
+AT_BOOL = 4
+AT_STRING = 5
+AT_VECTOR2 = 9
+AT_VECTOR3 = 10
+AT_QUATERNION = 13
+AT_ARRAY_OFFSET = 14
+AT_ELEMENT_ARRAY = AT_ELEMENT + AT_ARRAY_OFFSET
+AT_INT_ARRAY = AT_INT + AT_ARRAY_OFFSET
+AT_STRING_ARRAY = AT_STRING + AT_ARRAY_OFFSET
+AT_VECTOR2_ARRAY = AT_VECTOR2 + AT_ARRAY_OFFSET
+AT_VECTOR3_ARRAY = AT_VECTOR3 + AT_ARRAY_OFFSET
+
+NUMPY_ARRAY_TYPES = {AT_INT_ARRAY: "<i4", AT_VECTOR2_ARRAY: "<f4", AT_VECTOR3_ARRAY: "<f4"}
+
+
+class DmxElement:
+    """An element of a DMX file: a type, a name and attributes in the order they're set."""
+
+    def __init__(self, name: str, element_type: str = "DmElement"):
+        self.name = name
+        self.type = element_type
+        self.id = uuid.uuid4().bytes
+        self.attributes: Dict[str, Tuple[int, Any]] = {}
+
+    def set(self, name: str, attribute_type: int, value: Any) -> "DmxElement":
+        self.attributes[name] = (attribute_type, value)
+        return self
+
+    def get_children(self) -> List["DmxElement"]:
+        children = []
+        for attribute_type, value in self.attributes.values():
+            if attribute_type == AT_ELEMENT and value is not None:
+                children.append(value)
+            elif attribute_type == AT_ELEMENT_ARRAY:
+                children.extend(value)
+        return children
+
+
+def collect_elements(root: DmxElement) -> List[DmxElement]:
+    """Returns every element reachable from root, root first."""
+    elements = [root]
+    seen = {id(root)}
+    stack = [root]
+    while stack:
+        for child in stack.pop().get_children():
+            if id(child) not in seen:
+                seen.add(id(child))
+                elements.append(child)
+                stack.append(child)
+    return elements
+
+
+def encode_string(text: str) -> bytes:
+    return text.encode("utf-8") + b"\0"
+
+
+class BinaryDmxWriter:
+    """Writes a DMX element tree in the binary encoding.
+
+    Element types and attribute names go in a string table referenced by 16-bit index,
+    element names and string values are written inline (encoding version 2). Vertex and
+    index arrays are written straight from their NumPy buffers.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.file.write(data)
+        self.bytes_written += len(data)
+
+    def write_file(self, root: DmxElement, format_name: str = DMX_FORMAT, format_version: int = DMX_FORMAT_VERSION):
+        elements = collect_elements(root)
+        element_indices = {id(element): index for index, element in enumerate(elements)}
+
+        self.write(encode_string(f"<!-- dmx encoding {DMX_ENCODING} {DMX_ENCODING_VERSION} format {format_name} {format_version} -->\n"))
+
+        strings: Dict[str, int] = {}
+        for element in elements:
+            strings.setdefault(element.type, len(strings))
+            for attribute_name in element.attributes:
+                strings.setdefault(attribute_name, len(strings))
+        if len(strings) > 0x7FFF:
+            raise ValueError(f"Too many distinct DMX strings ({len(strings)}) for a 16-bit string table.")
+        self.write(struct.pack("<i", len(strings)))
+        self.write(b"".join(encode_string(text) for text in strings))
+
+        self.write(struct.pack("<i", len(elements)))
+        for element in elements:
+            self.write(struct.pack("<h", strings[element.type]) + encode_string(element.name) + element.id)
+
+        for element in elements:
+            self.write(struct.pack("<i", len(element.attributes)))
+            for attribute_name, (attribute_type, value) in element.attributes.items():
+                self.write(struct.pack("<hB", strings[attribute_name], attribute_type))
+                self.write_value(attribute_type, value, element_indices)
+
+    def write_value(self, attribute_type: int, value: Any, element_indices: Dict[int, int]):
+        if attribute_type == AT_ELEMENT:
+            self.write(struct.pack("<i", -1 if value is None else element_indices[id(value)]))
+        elif attribute_type == AT_INT:
+            self.write(struct.pack("<i", value))
+        elif attribute_type == AT_FLOAT:
+            self.write(struct.pack("<f", value))
+        elif attribute_type == AT_BOOL:
+            self.write(struct.pack("<?", value))
+        elif attribute_type == AT_STRING:
+            self.write(encode_string(value))
+        elif attribute_type in (AT_VECTOR2, AT_VECTOR3, AT_QUATERNION):
+            self.write(struct.pack(f"<{len(value)}f", *value))
+        elif attribute_type == AT_ELEMENT_ARRAY:
+            self.write(struct.pack(f"<i{len(value)}i", len(value), *(element_indices[id(element)] for element in value)))
+        elif attribute_type == AT_STRING_ARRAY:
+            self.write(struct.pack("<i", len(value)) + b"".join(encode_string(text) for text in value))
+        elif attribute_type in NUMPY_ARRAY_TYPES:
+            array = np.ascontiguousarray(value, dtype=NUMPY_ARRAY_TYPES[attribute_type])
+            self.write(struct.pack("<i", len(array)))
+            self.write(array.reshape(-1).view(np.uint8))
+        else:
+            raise ValueError(f"Unsupported DMX attribute type {attribute_type}")
+
+
+# --- Indexed Mesh ---
+
+def unique_rows(rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the distinct rows of an (n, 2) or (n, 3) float32 array, compared bit for bit, and the index of each row in them."""
+    rows = np.ascontiguousarray(rows, dtype=np.float32)
+    # Sorting integers is much faster than sorting raw bytes, the first two floats make one 64-bit key
+    first, inverse = unique_inverse(np.ascontiguousarray(rows[:, :2]).view(np.uint64).ravel())
+    if rows.shape[1] == 3:
+        first, inverse = unique_inverse(inverse * (1 << 32) + rows[:, 2].view(np.uint32))
+    return rows[first], inverse
+
+def combine_indices(columns: List[np.ndarray], sizes: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Numbers the distinct combinations of per-corner indices.
+
+    Args:
+        columns: Per-corner index arrays of the same length.
+        sizes: Number of distinct values of each column.
+
+    Returns:
+        A corner with each combination, and the combination number of every corner.
+    """
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    key_size = 1
+    first = np.zeros(0, dtype=np.int64)
+    for column, size in zip(columns, sizes):
+        if key_size * size >= 1 << 62:
+            # Renumber the combinations so far to keep the key in 64 bits
+            first, key = unique_inverse(key)
+            key_size = len(first)
+        key = key * size + column
+        key_size *= size
+    return unique_inverse(key)
+
+def build_dmx_model(model_name: str, mesh_name: str, arrays: MeshArrays, name_table: np.ndarray) -> DmxElement:
+    """Builds the DmeModel tree of one mesh with indexed vertex streams and a face set per material.
+
+    Args:
+        model_name: Name of the DmeModel.
+        mesh_name: Name of the DmeMesh.
+        arrays: The mesh's MeshArrays, see smd_export.read_mesh_arrays().
+        name_table: Material name of each material index, see smd_export.build_material_name_table().
+            Indices past its end use the last name.
+    """
+    num_tris = len(arrays.material_indices)
+    corner_verts = arrays.triangle_vertices
+
+    positions, position_of_vertex = unique_rows(arrays.positions)
+    position_indices = position_of_vertex[corner_verts]
+
+    # Flat triangles use their face normal, numbered after the vertex normals
+    if arrays.flat_triangles is not None:
+        candidate_normals = np.concatenate([arrays.vertex_normals, arrays.triangle_normals])
+        corner_sources = np.where(np.repeat(arrays.flat_triangles, 3), np.repeat(np.arange(num_tris) + len(arrays.vertex_normals), 3), corner_verts)
+        # Only the normals some corner uses, the vertex normals of flat shaded areas are left out
+        used_sources, corner_used = unique_inverse(corner_sources)
+        normals, normal_of_used = unique_rows(candidate_normals[corner_sources[used_sources]])
+        normal_indices = normal_of_used[corner_used]
+    else:
+        normals, normal_of_vertex = unique_rows(arrays.vertex_normals)
+        normal_indices = normal_of_vertex[corner_verts]
+
+    if arrays.triangle_loops is not None:
+        uvs, uv_of_loop = unique_rows(arrays.uvs)
+        uv_indices = uv_of_loop[arrays.triangle_loops]
+    else:
+        uvs = np.zeros((1, 2), dtype=np.float32)
+        uv_indices = np.zeros(len(corner_verts), dtype=np.int64)
+
+    # A DMX vertex is a distinct position/normal/UV combination, faces index the vertices
+    first_corners, corner_vertices = combine_indices([position_indices, normal_indices, uv_indices], [len(positions), len(normals), len(uvs)])
+
+    vertex_data = DmxElement("bind", "DmeVertexData")
+    vertex_data.set("vertexFormat", AT_STRING_ARRAY, ["positions", "normals", "textureCoordinates"])
+    vertex_data.set("jointCount", AT_INT, 0)
+    vertex_data.set("flipVCoordinates", AT_BOOL, True) # Blender UVs start at the bottom like SMD ones
+    vertex_data.set("positions", AT_VECTOR3_ARRAY, positions)
+    vertex_data.set("positionsIndices", AT_INT_ARRAY, position_indices[first_corners])
+    vertex_data.set("normals", AT_VECTOR3_ARRAY, normals)
+    vertex_data.set("normalsIndices", AT_INT_ARRAY, normal_indices[first_corners])
+    vertex_data.set("textureCoordinates", AT_VECTOR2_ARRAY, uvs)
+    vertex_data.set("textureCoordinatesIndices", AT_INT_ARRAY, uv_indices[first_corners])
+
+    # Faces are vertex indices terminated by -1, one face set per material in order of first use
+    faces = np.full((num_tris, 4), -1, dtype=np.int32)
+    faces[:, :3] = corner_vertices.reshape(-1, 3)
+    triangle_slots = np.minimum(arrays.material_indices, len(name_table) - 1)
+    first_triangles = np.full(len(name_table), num_tris, dtype=np.int64)
+    first_triangles[triangle_slots[::-1]] = np.arange(num_tris - 1, -1, -1) # The last write wins, so each slot keeps its first triangle
+    set_of_name: Dict[str, int] = {} # Slots can share a material, e.g. empty slots all use the default name
+    set_of_slot = np.zeros(len(name_table), dtype=np.int32)
+    for slot in np.argsort(first_triangles, kind="stable"):
+        if first_triangles[slot] < num_tris:
+            set_of_slot[slot] = set_of_name.setdefault(str(name_table[slot]), len(set_of_name))
+    triangle_sets = set_of_slot[triangle_slots]
+    set_order = np.argsort(triangle_sets, kind="stable")
+    set_ends = np.cumsum(np.bincount(triangle_sets, minlength=len(set_of_name)))
+    face_sets = []
+    for material_name, set_index in set_of_name.items():
+        material = DmxElement(material_name, "DmeMaterial").set("mtlName", AT_STRING, material_name)
+        face_set = DmxElement(material_name, "DmeFaceSet")
+        face_set.set("material", AT_ELEMENT, material)
+        set_start = set_ends[set_index - 1] if set_index else 0
+        face_set.set("faces", AT_INT_ARRAY, faces[set_order[set_start:set_ends[set_index]]].ravel())
+        face_sets.append(face_set)
+
+    mesh = DmxElement(mesh_name, "DmeMesh")
+    mesh.set("visible", AT_BOOL, True)
+    mesh.set("bindState", AT_ELEMENT, vertex_data)
+    mesh.set("currentState", AT_ELEMENT, vertex_data)
+    mesh.set("baseStates", AT_ELEMENT_ARRAY, [vertex_data])
+    mesh.set("deltaStates", AT_ELEMENT_ARRAY, [])
+    mesh.set("faceSets", AT_ELEMENT_ARRAY, face_sets)
+
+    # One "root" bone at the origin like the SMD skeleton, the transform is baked into the vertices
+    dag = DmxElement("root", "DmeDag")
+    dag.set("transform", AT_ELEMENT, make_identity_transform("root"))
+    dag.set("shape", AT_ELEMENT, mesh)
+    dag.set("visible", AT_BOOL, True)
+    dag.set("children", AT_ELEMENT_ARRAY, [])
+
+    base_state = DmxElement("base", "DmeTransformList").set("transforms", AT_ELEMENT_ARRAY, [make_identity_transform("root")])
+    model = DmxElement(model_name, "DmeModel")
+    model.set("transform", AT_ELEMENT, make_identity_transform(model_name))
+    model.set("visible", AT_BOOL, True)
+    model.set("children", AT_ELEMENT_ARRAY, [dag])
+    model.set("jointList", AT_ELEMENT_ARRAY, [dag])
+    model.set("baseStates", AT_ELEMENT_ARRAY, [base_state])
+
+    root = DmxElement("root")
+    root.set("skeleton", AT_ELEMENT, model)
+    root.set("model", AT_ELEMENT, model)
+    return root
+
+def make_identity_transform(name: str) -> DmxElement:
+    transform = DmxElement(name, "DmeTransform")
+    transform.set("position", AT_VECTOR3, (0.0, 0.0, 0.0))
+    transform.set("orientation", AT_QUATERNION, (0.0, 0.0, 0.0, 1.0))
+    return transform
+
+
+# --- DMX Export ---
+
+def exportMeshToDmx(path: str, mesh_name: str, arrays: MeshArrays, name_table: np.ndarray) -> int:
+    """Writes a mesh's arrays as a binary DMX model. Returns the number of bytes written."""
+    root = build_dmx_model(os.path.splitext(os.path.basename(path))[0], mesh_name, arrays, name_table)
+    with open(path, "wb", buffering=1 << 20) as file:
+        writer = BinaryDmxWriter(file)
+        writer.write_file(root)
+    return writer.bytes_written
@@ -0,0 +1,265 @@
+"""Finds the installed Source games that ship studiomdl, across every Steam library.
+
+Scanning steamapps/common can take seconds on slow drives, so the results are kept in a
+JSON index. A refresh only re-reads what changed since the last one: a library whose
+common folder has the same mtime keeps its game list, a game whose folder and bin folder
+have the same mtimes keeps its entry.
+
+Kept free of bpy, the add-on runs refresh() on a background thread.
+"""
+
+import os
+import sys
+import json
+import threading
+from typing import List, Dict, Any, Optional
+
+GAME_INDEX_VERSION = 1
+STUDIOMDL_EXE = "studiomdl.exe"
+
+# Where Steam installs itself outside Windows. Source games run through Proton on Linux,
+# their studiomdl.exe is still found in the usual steamapps/common/<game>/bin folder.
+STEAM_PATH_CANDIDATES = {
+    "linux": ["~/.steam/steam", "~/.local/share/Steam", "~/.var/app/com.valvesoftware.Steam/.local/share/Steam"],
+    "darwin": ["~/Library/Application Support/Steam"],
+}
+
+
+def find_steam_path() -> Optional[str]:
+    """Returns the Steam installation folder, or None if Steam isn't installed."""
+    if os.name == "nt":
+        import winreg # Windows only, imported here so the add-on loads on every platform
+        registry_keys = [
+            (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Valve\Steam", "SteamPath"),
+            (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\WOW6432Node\Valve\Steam", "InstallPath"),
+        ]
+        for hive, key_path, value_name in registry_keys:
+            try:
+                with winreg.OpenKey(hive, key_path) as key:
+                    return winreg.QueryValueEx(key, value_name)[0]
+            except OSError:
+                continue
+        return None
+
+    platform = "darwin" if sys.platform == "darwin" else "linux"
+    for candidate in STEAM_PATH_CANDIDATES[platform]:
+        path = os.path.expanduser(candidate)
+        if os.path.isdir(os.path.join(path, "steamapps")):
+            return os.path.realpath(path) # ~/.steam/steam is usually a symlink
+    return None
+
+
+def parse_vdf(text: str) -> Dict[str, Any]:
+    """Parses Valve KeyValues text (e.g. libraryfolders.vdf) into nested dicts.
+
+    Only what Steam writes is supported: quoted or bare keys and values, nested blocks
+    and // comments. Conditionals like [$WIN32] are skipped.
+    """
+    tokens = []
+    i = 0
+    length = len(text)
+    while i < length:
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = length if newline == -1 else newline + 1
+        elif c in "{}":
+            tokens.append(c)
+            i += 1
+        elif c == '"':
+            i += 1
+            chars = []
+            while i < length and text[i] != '"':
+                if text[i] == "\\" and i + 1 < length:
+                    i += 1
+                    chars.append({"n": "\n", "t": "\t"}.get(text[i], text[i]))
+                else:
+                    chars.append(text[i])
+                i += 1
+            tokens.append(("".join(chars),))
+            i += 1
+        elif c == "[":
+            end = text.find("]", i)
+            i = length if end == -1 else end + 1
+        else:
+            start = i
+            while i < length and not text[i].isspace() and text[i] not in '{}"':
+                i += 1
+            tokens.append((text[start:i],))
+
+    root: Dict[str, Any] = {}
+    stack = [root]
+    key = None
+    for token in tokens:
+        if token == "{":
+            block: Dict[str, Any] = {}
+            stack[-1][key if key is not None else ""] = block
+            stack.append(block)
+            key = None
+        elif token == "}":
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        elif key is None:
+            key = token[0]
+        else:
+            stack[-1][key] = token[0]
+            key = None
+    return root
+
+def read_library_folders(steam_path: str) -> List[str]:
+    """Returns every Steam library folder, the Steam installation's own first."""
+    libraries = [steam_path]
+    vdf_path = os.path.join(steam_path, "steamapps", "libraryfolders.vdf")
+    try:
+        with open(vdf_path, "r", encoding="utf-8", errors="replace") as file:
+            data = parse_vdf(file.read())
+    except OSError:
+        return libraries
+
+    folders = next((value for key, value in data.items() if key.lower() == "libraryfolders" and isinstance(value, dict)), {})
+    for key, value in folders.items():
+        if not key.isdigit():
+            continue # "TimeNextStatsReport", "ContentStatsID"
+        # New format: "0" { "path" "D:\\SteamLibrary" ... }, old format: "1" "D:\\SteamLibrary"
+        path = value.get("path") if isinstance(value, dict) else value
+        if path:
+            libraries.append(path)
+
+    unique_libraries = []
+    seen = set()
+    for library in libraries:
+        normalized = os.path.normcase(os.path.normpath(library))
+        if normalized not in seen:
+            seen.add(normalized)
+            unique_libraries.append(library)
+    return unique_libraries
+
+def get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def get_game_mtimes(game_root: str) -> List[Optional[int]]:
+    """The mtimes a game entry is checked against: the game folder (mod folders added or removed) and its bin folder."""
+    return [get_mtime(game_root), get_mtime(os.path.join(game_root, "bin"))]
+
+def scan_game(game_root: str) -> Dict[str, Any]:
+    """Looks for studiomdl and the folder containing gameinfo.txt in one game folder."""
+    entry = {"mtimes": get_game_mtimes(game_root), "studiomdl": False, "gameinfo_dir": None}
+    entry["studiomdl"] = os.path.isfile(os.path.join(game_root, "bin", STUDIOMDL_EXE))
+    try:
+        subdirectories = sorted(e.path for e in os.scandir(game_root) if e.is_dir())
+    except OSError:
+        return entry
+    for subdir in subdirectories:
+        # currently we're returning the first folder which has a gameinfo.txt, in alot of games there are multiple folders which match this criteria. todo: is this an issue?
+        if os.path.isfile(os.path.join(subdir, "gameinfo.txt")):
+            entry["gameinfo_dir"] = subdir
+            break
+    return entry
+
+
+class GameIndex:
+    """Persistent index of game folders, see the module docstring.
+
+    refresh() can run on a background thread while the main thread calls the other methods.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+        self.libraries: Dict[str, Optional[int]] = {} # library path: mtime of its steamapps/common
+        self.library_games: Dict[str, List[str]] = {} # library path: game folders
+        self.games: Dict[str, Dict[str, Any]] = {} # game folder: scan_game() entry
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != GAME_INDEX_VERSION:
+            return
+        with self.lock:
+            self.libraries = data.get("libraries", {})
+            self.library_games = data.get("library_games", {})
+            self.games = data.get("games", {})
+
+    def save(self):
+        with self.lock:
+            data = {"version": GAME_INDEX_VERSION, "libraries": self.libraries, "library_games": self.library_games, "games": self.games}
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(data, file, indent=1)
+        os.replace(temp_path, self.cache_path)
+
+    def get_gameinfo_dirs(self) -> List[str]:
+        """Returns the gameinfo folder of every indexed Steam game that has studiomdl, sorted by game name."""
+        with self.lock:
+            game_roots = [root for roots in self.library_games.values() for root in roots]
+            entries = [self.games[root] for root in game_roots if root in self.games]
+        gameinfo_dirs = [entry["gameinfo_dir"] for entry in entries if entry["studiomdl"] and entry["gameinfo_dir"]]
+        return sorted(gameinfo_dirs, key=lambda path: os.path.basename(os.path.dirname(path)).lower())
+
+    def get_game(self, game_root: str) -> Dict[str, Any]:
+        """Returns the entry of a game folder, scanning it only if it changed since it was indexed."""
+        with self.lock:
+            entry = self.games.get(game_root)
+        if entry is None or entry["mtimes"] != get_game_mtimes(game_root):
+            entry = scan_game(game_root)
+            with self.lock:
+                self.games[game_root] = entry
+        return entry
+
+    def refresh(self, steam_path: str, force: bool = False) -> bool:
+        """Brings the index up to date with the Steam libraries. Returns whether the game list changed.
+
+        Args:
+            force: Rescan every library and game, even the unchanged ones.
+        """
+        old_games = self.get_gameinfo_dirs()
+        with self.lock:
+            old_libraries = dict(self.libraries)
+            old_library_games = dict(self.library_games)
+            old_entries = dict(self.games)
+
+        libraries = {}
+        library_games = {}
+        games = {}
+        for library in read_library_folders(steam_path):
+            common = os.path.join(library, "steamapps", "common")
+            mtime = get_mtime(common)
+            libraries[library] = mtime
+            if mtime is None:
+                library_games[library] = []
+                continue
+            if not force and old_libraries.get(library) == mtime and library in old_library_games:
+                game_roots = old_library_games[library]
+            else:
+                try:
+                    game_roots = sorted(e.path for e in os.scandir(common) if e.is_dir())
+                except OSError:
+                    game_roots = []
+            library_games[library] = game_roots
+            for game_root in game_roots:
+                entry = old_entries.get(game_root)
+                if force or entry is None or entry["mtimes"] != get_game_mtimes(game_root):
+                    entry = scan_game(game_root)
+                games[game_root] = entry
+
+        # Keep manually entered games that aren't in a Steam library
+        steam_roots = set(games)
+        for game_root, entry in old_entries.items():
+            if game_root not in steam_roots and not any(game_root in roots for roots in old_library_games.values()):
+                games[game_root] = entry
+
+        with self.lock:
+            self.libraries = libraries
+            self.library_games = library_games
+            self.games = games
+        return self.get_gameinfo_dirs() != old_games
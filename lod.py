@@ -0,0 +1,144 @@
+"""LOD generation: decimated copies of a visual mesh for $lod, made from its exported arrays.
+
+Decimation is vertex clustering: the mesh is cut into a grid of cubic cells, the vertices
+in a cell are merged at their average position, and triangles that lose a corner to the
+merge are dropped. It runs on the arrays already read for the export, so the artist's
+object never gets a modifier, and it's a handful of NumPy passes even on dense meshes.
+The cell size is searched for until the triangle count is near the requested ratio.
+"""
+
+from dataclasses import dataclass, replace
+from typing import List, Tuple
+import numpy as np
+
+from .smd_export import MeshArrays, normalize_rows, unique_inverse
+
+LOD_TOLERANCE = 0.1 # Accept a triangle count within 10% of the target
+LOD_MAX_ITERATIONS = 8
+LOD_MIN_TRIANGLES = 1
+
+
+@dataclass
+class LodLevel:
+    """One $lod: the share of the triangles to keep and the distance the model switches to it at."""
+    ratio: float
+    distance: float
+
+
+def parse_lod_levels(text: str) -> List[LodLevel]:
+    """Parses LOD levels written as "ratio@distance" separated by commas, e.g. "0.5@30,0.25@80".
+
+    Raises:
+        ValueError: If a level isn't written that way, or its ratio isn't between 0 and 1.
+    """
+    levels = []
+    for part in text.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        ratio_text, separator, distance_text = part.partition("@")
+        if not separator:
+            raise ValueError(f"LOD level '{part}' should be written as ratio@distance, e.g. 0.5@30")
+        level = LodLevel(float(ratio_text), float(distance_text))
+        if not 0.0 < level.ratio < 1.0:
+            raise ValueError(f"LOD ratio {level.ratio} should be between 0 and 1")
+        levels.append(level)
+    return levels
+
+def get_lod_levels(levels: List[LodLevel]) -> List[LodLevel]:
+    """Returns the levels usable for $lod: sorted by distance, keeping one level per distance."""
+    usable = {}
+    for level in sorted(levels, key=lambda level: level.distance):
+        if 0.0 < level.ratio < 1.0 and level.distance > 0.0:
+            usable.setdefault(level.distance, level)
+    return list(usable.values())
+
+
+# --- Decimation ---
+
+def cluster_vertices(positions: np.ndarray, cell_size: float) -> Tuple[np.ndarray, int]:
+    """Numbers the grid cells of a cell_size grid that the vertices fall in.
+
+    Returns the cell number of each vertex and the number of occupied cells.
+    """
+    cells = np.floor((positions - positions.min(axis=0)) / cell_size).astype(np.int64)
+    counts = cells.max(axis=0) + 1
+    first, cell_of_vertex = unique_inverse((cells[:, 0] * counts[1] + cells[:, 1]) * counts[2] + cells[:, 2])
+    return cell_of_vertex, len(first)
+
+def get_kept_triangles(triangle_clusters: np.ndarray) -> np.ndarray:
+    """Returns which triangles still have three distinct corners after clustering."""
+    a, b, c = triangle_clusters[:, 0], triangle_clusters[:, 1], triangle_clusters[:, 2]
+    return (a != b) & (b != c) & (a != c)
+
+def decimate_mesh_arrays(arrays: MeshArrays, ratio: float) -> MeshArrays:
+    """Returns a copy of the mesh arrays with about ratio of their triangles.
+
+    Triangles keep their material, flat shading and UVs. Smooth corners get the average
+    normal of the vertices merged into them, flat triangles get a new face normal.
+    """
+    num_tris = len(arrays.material_indices)
+    if ratio >= 1.0 or num_tris == 0:
+        return arrays
+    target = max(LOD_MIN_TRIANGLES, int(num_tris * ratio))
+    triangle_vertices = arrays.triangle_vertices.reshape(-1, 3)
+    positions = arrays.positions
+
+    # First guess: the surface area spread over about half as many cells as target triangles
+    corners = positions[triangle_vertices]
+    area = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum()
+    extent = float((positions.max(axis=0) - positions.min(axis=0)).max())
+    if extent <= 0.0:
+        return replace(arrays, triangle_vertices=arrays.triangle_vertices[:0], material_indices=arrays.material_indices[:0],
+                       flat_triangles=None, triangle_normals=None, triangle_loops=None)
+    cell_size = float(np.sqrt(area / (target / 2))) if area > 0.0 else extent / 2
+    cell_size = min(max(cell_size, extent * 1e-6), extent * 2)
+
+    best = None # (distance to target, vertex clusters, cluster count, kept triangles)
+    for _ in range(LOD_MAX_ITERATIONS):
+        cluster_of_vertex, cluster_count = cluster_vertices(positions, cell_size)
+        kept = get_kept_triangles(cluster_of_vertex[triangle_vertices])
+        kept_count = int(kept.sum())
+        miss = abs(kept_count - target) / target
+        if best is None or miss < best[0]:
+            best = (miss, cluster_of_vertex, cluster_count, kept)
+        if miss <= LOD_TOLERANCE:
+            break
+        # The triangle count goes roughly with the inverse square of the cell size
+        scale = np.sqrt(max(kept_count, 1) / target)
+        cell_size *= min(max(scale, 0.5), 2.0)
+    _, cluster_of_vertex, cluster_count, kept = best
+    return merge_clusters(arrays, cluster_of_vertex, cluster_count, kept)
+
+def merge_clusters(arrays: MeshArrays, cluster_of_vertex: np.ndarray, cluster_count: int, kept: np.ndarray) -> MeshArrays:
+    """Builds the arrays of the clustered mesh: one vertex per cluster used by a kept triangle."""
+    kept_corner_clusters = cluster_of_vertex[arrays.triangle_vertices.reshape(-1, 3)[kept].ravel()]
+    used_corners, corner_vertices = unique_inverse(kept_corner_clusters)
+    vertex_count = len(used_corners)
+    # New vertex of every old one, -1 for vertices of clusters no kept triangle uses
+    vertex_of_cluster = np.full(cluster_count, -1, dtype=np.int64)
+    vertex_of_cluster[kept_corner_clusters[used_corners]] = np.arange(vertex_count)
+    new_vertex = vertex_of_cluster[cluster_of_vertex]
+    merged = new_vertex >= 0
+    new_vertex = new_vertex[merged]
+
+    positions = np.empty((vertex_count, 3), dtype=np.float64)
+    normals = np.empty((vertex_count, 3), dtype=np.float64)
+    counts = np.bincount(new_vertex, minlength=vertex_count)
+    for axis in range(3):
+        positions[:, axis] = np.bincount(new_vertex, weights=arrays.positions[merged, axis], minlength=vertex_count)
+        normals[:, axis] = np.bincount(new_vertex, weights=arrays.vertex_normals[merged, axis], minlength=vertex_count)
+    positions /= counts[:, None]
+
+    lod = MeshArrays(positions, normalize_rows(normals), corner_vertices.astype(np.int32), arrays.material_indices[kept])
+    if arrays.flat_triangles is not None:
+        lod.flat_triangles = arrays.flat_triangles[kept]
+        corners = positions[corner_vertices.reshape(-1, 3)]
+        face_normals = normalize_rows(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]))
+        collapsed = ~face_normals.any(axis=1) # Corners merged onto a line, keep the old normal
+        face_normals[collapsed] = arrays.triangle_normals[kept][collapsed]
+        lod.triangle_normals = face_normals
+    if arrays.triangle_loops is not None:
+        lod.triangle_loops = arrays.triangle_loops.reshape(-1, 3)[kept].ravel()
+        lod.uvs = arrays.uvs
+    return lod
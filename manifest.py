@@ -0,0 +1,146 @@
+"""Incremental compile manifest, remembers what each model was compiled from."""
+
+import os
+import json
+import glob
+import hashlib
+import numpy as np
+from typing import List, Dict, Any
+
+
+MANIFEST_VERSION = 1
+MODEL_OUTPUT_EXTENSIONS = (".mdl", ".vvd", ".vtx", ".phy", ".ani")
+
+def get_manifest_path(blend_path: str) -> str:
+    """Returns the path of the compile manifest stored next to a .blend file."""
+    return os.path.splitext(blend_path)[0] + ".automdl.json"
+
+def hash_mesh_geometry(hasher, obj, depsgraph, include_shading: bool = True):
+    """Feeds the evaluated mesh of an object into a hashlib hasher.
+
+    Covers everything the SMD export reads from the mesh: positions, triangles, shading,
+    material indices and the active UV layer. include_shading=False leaves out flat/smooth
+    shading, which collision exports don't read.
+    """
+    object_eval = obj.evaluated_get(depsgraph)
+    mesh = object_eval.to_mesh()
+    try:
+        mesh.calc_loop_triangles()
+        arrays = [
+            (mesh.vertices, "co", np.float32, 3),
+            (mesh.loop_triangles, "vertices", np.int32, 3),
+            (mesh.loop_triangles, "loops", np.int32, 3),
+            (mesh.loop_triangles, "material_index", np.int32, 1),
+        ]
+        if include_shading:
+            arrays.append((mesh.loop_triangles, "use_smooth", bool, 1))
+        for collection, attribute, dtype, width in arrays:
+            values = np.empty(len(collection) * width, dtype=dtype)
+            collection.foreach_get(attribute, values)
+            hasher.update(attribute.encode())
+            hasher.update(values.tobytes())
+        if mesh.uv_layers:
+            uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+            mesh.uv_layers.active.data.foreach_get("uv", uvs)
+            hasher.update(b"uv")
+            hasher.update(uvs.tobytes())
+    finally:
+        object_eval.to_mesh_clear()
+
+def hash_object_transform(hasher, obj):
+    """Feeds the rotation/scale the export applies to an object's mesh into a hashlib hasher."""
+    hasher.update(np.array(obj.matrix_world.to_3x3(), dtype=np.float64).tobytes())
+
+def get_model_outputs(models_root: str, model_path: str) -> Dict[str, List[int]]:
+    """Returns the compiled files of a model as {file name: [size, mtime_ns]}."""
+    base_path = os.path.join(models_root, model_path)
+    outputs = {}
+    for file_path in glob.glob(glob.escape(base_path) + ".*"):
+        if file_path.lower().endswith(MODEL_OUTPUT_EXTENSIONS):
+            stat = os.stat(file_path)
+            outputs[os.path.basename(file_path)] = [stat.st_size, stat.st_mtime_ns]
+    return outputs
+
+class CompileManifest:
+    """Remembers what each model was last compiled from, so unchanged models can be skipped.
+
+    Stored as JSON next to the .blend file. Each entry holds the inputs fingerprint of a
+    model and the size/mtime of the files studiomdl produced for it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.models: Dict[str, Dict[str, Any]] = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable compile manifest '{self.path}': {e}")
+            return
+        if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+            self.models = data.get("models", {})
+
+    def save(self):
+        temp_manifest_path = self.path + ".tmp"
+        with open(temp_manifest_path, "w", encoding="utf-8") as file:
+            json.dump({"version": MANIFEST_VERSION, "models": self.models}, file, indent=1, sort_keys=True)
+        os.replace(temp_manifest_path, self.path) # Atomic, a crash never leaves half a manifest
+
+    def is_up_to_date(self, model_path: str, fingerprint: str, models_root: str) -> bool:
+        entry = self.models.get(model_path.lower())
+        if not entry or entry.get("fingerprint") != fingerprint or not entry.get("outputs"):
+            return False
+        return get_model_outputs(models_root, model_path) == entry["outputs"]
+
+    def is_unchanged_since(self, model_path: str, object_name: str, inputs_key: str, models_root: str) -> bool:
+        """Whether a model was compiled from this object with these inputs and its files are untouched, without looking at its meshes.
+
+        For models whose objects weren't edited since, see dirty.py.
+        """
+        entry = self.models.get(model_path.lower())
+        if not entry or entry.get("object") != object_name or entry.get("inputs") != inputs_key or not entry.get("outputs"):
+            return False
+        return get_model_outputs(models_root, model_path) == entry["outputs"]
+
+    def record(self, model_path: str, object_name: str, fingerprint: str, models_root: str, inputs_key: str = ""):
+        self.models[model_path.lower()] = {
+            "object": object_name,
+            "fingerprint": fingerprint,
+            "inputs": inputs_key,
+            "outputs": get_model_outputs(models_root, model_path),
+        }
+
+    def set_inputs_key(self, model_path: str, inputs_key: str):
+        entry = self.models.get(model_path.lower())
+        if entry:
+            entry["inputs"] = inputs_key
+
+    def forget(self, model_path: str):
+        self.models.pop(model_path.lower(), None)
+
+def get_inputs_key(shared_inputs: str, collision_name: str) -> str:
+    """Hashes what a model's compile depends on besides its meshes: the shared settings and which collision mesh it has."""
+    hasher = hashlib.sha1(shared_inputs.encode())
+    hasher.update(b"\0")
+    hasher.update(collision_name.encode())
+    return hasher.hexdigest()
+
+def get_model_fingerprint(shared_inputs: str, model_path: str, vis_mesh_key: str, phy_mesh_key: str) -> str:
+    """Hashes everything a model's compile depends on.
+
+    Args:
+        shared_inputs: Serialized settings shared by every model (QC options, compiler, export settings).
+        model_path: The model's $modelname.
+        vis_mesh_key: Key of the visual mesh, see DuplicateIndex.get_mesh_key().
+        phy_mesh_key: Key of the collision mesh, "" if the model has none.
+    """
+    hasher = hashlib.sha1(shared_inputs.encode())
+    hasher.update(model_path.encode())
+    hasher.update(vis_mesh_key.encode())
+    hasher.update(b"\0")
+    hasher.update(phy_mesh_key.encode())
+    return hasher.hexdigest()
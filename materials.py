@@ -0,0 +1,274 @@
+"""Material skins, $texturegroup QC and placeholder VMTs."""
+
+import os
+import re
+from pathlib import Path
+from typing import List, Dict, Tuple, Set, FrozenSet, Iterable, Optional
+from collections import defaultdict
+from dataclasses import dataclass
+
+SKIN_PATTERN = re.compile(r"^(.*)_skin(\d+)$", re.IGNORECASE)
+
+
+@dataclass
+class MaterialName:
+    """A material name split into its base material and skin number."""
+    name: str
+    name_lower: str
+    base_lower: str # Lowercased base material name, name_lower itself if it isn't a skin variant
+    skin_id: int # 0 if it isn't a skin variant
+
+def split_material_name(name: str) -> MaterialName:
+    name_lower = name.lower()
+    match = SKIN_PATTERN.match(name) if "_skin" in name_lower else None
+    if match:
+        base_name, skin_id_str = match.groups()
+        return MaterialName(name, name_lower, base_name.lower(), int(skin_id_str))
+    return MaterialName(name, name_lower, name_lower, 0)
+
+def parse_material_skins(material_slots: list) -> Tuple[List[str], Dict[int, Dict[str, str]]]:
+    """Parses material slots to identify base materials and their skin variants.
+
+    Args:
+        material_slots: A list of material slots from a Blender object.
+
+    Returns:
+        A tuple containing:
+        - base_materials_ordered: An ordered list of base material names that have skins.
+        - skin_groups: A dictionary mapping skin IDs (int) to dictionaries
+                       where keys are base material names and values are the
+                       corresponding skin variant names for that ID.
+                       Example: {1: {'metal': 'metal_skin1', 'wood': 'wood_skin1'},
+                                 2: {'metal': 'metal_skin2', 'wood': 'wood'}}
+    """
+    return parse_skin_names([split_material_name(slot.material.name) for slot in material_slots if slot.material])
+
+def parse_skin_names(materials: Iterable[MaterialName]) -> Tuple[List[str], Dict[int, Dict[str, str]]]:
+    """parse_material_skins() on already split material names, linear in the number of materials."""
+    base_candidates: Dict[str, Set[int]] = defaultdict(set) # base_name_lower: {skin_id}
+    skin_variants: Dict[Tuple[str, int], str] = {} # (base_name_lower, skin_id): full_skin_name
+    original_names: Dict[str, str] = {} # name_lower: original name, the first one seen if several differ only in case
+
+    for material in materials:
+        original_names.setdefault(material.name_lower, material.name)
+        if material.skin_id:
+            base_candidates[material.base_lower].add(material.skin_id)
+            skin_variants[(material.base_lower, material.skin_id)] = material.name
+
+    # Filter base candidates: only keep those whose base name actually exists as a material
+    valid_base_materials_lower: Dict[str, Set[int]] = {}
+    base_name_map_lower_to_original: Dict[str, str] = {}
+    for base_lower, skin_ids in base_candidates.items():
+        # Find the original casing for the base name
+        original_base_name = original_names.get(base_lower)
+        if original_base_name:
+            valid_base_materials_lower[base_lower] = skin_ids
+            base_name_map_lower_to_original[base_lower] = original_base_name
+
+    if not valid_base_materials_lower:
+        return [], {}
+
+    # Determine the final ordered list of base materials (using original casing)
+    base_materials_ordered: List[str] = sorted([base_name_map_lower_to_original[b] for b in valid_base_materials_lower.keys()])
+
+    # Build the skin_groups dictionary
+    skin_groups: Dict[int, Dict[str, str]] = defaultdict(dict)
+    all_skin_ids = set(sid for ids in valid_base_materials_lower.values() for sid in ids)
+
+    if not all_skin_ids:
+        return [], {}
+
+    min_skin_id = min(all_skin_ids)
+    max_skin_id = max(all_skin_ids)
+
+    for skin_id in range(min_skin_id, max_skin_id + 1):
+        for base_name_original in base_materials_ordered:
+            base_name_lower = base_name_original.lower()
+            variant_key = (base_name_lower, skin_id)
+            if variant_key in skin_variants:
+                skin_groups[skin_id][base_name_original] = skin_variants[variant_key]
+            else:
+                # If no specific skin variant exists for this ID, use the base material name
+                skin_groups[skin_id][base_name_original] = base_name_original
+
+    # Filter out skin IDs that don't actually introduce any changes from the base
+    final_skin_groups: Dict[int, Dict[str, str]] = {}
+    base_row_dict = {base_name: base_name for base_name in base_materials_ordered}
+    for skin_id, skin_map in skin_groups.items():
+        if skin_map != base_row_dict:
+            final_skin_groups[skin_id] = skin_map
+
+    # Renumber skin IDs to be contiguous starting from 1 if necessary
+    renumbered_skin_groups: Dict[int, Dict[str, str]] = {}
+    if final_skin_groups:
+        sorted_skin_ids = sorted(final_skin_groups.keys())
+        for i, old_skin_id in enumerate(sorted_skin_ids):
+            renumbered_skin_groups[i + 1] = final_skin_groups[old_skin_id]
+
+    return base_materials_ordered, renumbered_skin_groups
+
+def generate_texturegroup_qc(base_materials_ordered: List[str], skin_groups: Dict[int, Dict[str, str]]) -> str:
+    """Generates the $texturegroup QC command string.
+
+    Args:
+        base_materials_ordered: An ordered list of base material names that have skins.
+        skin_groups: A dictionary mapping *contiguous* skin IDs (starting from 1)
+                     to dictionaries of {base_name: skin_variant_name}.
+
+    Returns:
+        The formatted $texturegroup QC string, or an empty string if no skins are defined.
+    """
+    if not base_materials_ordered or not skin_groups:
+        return ""
+
+    # Ensure skin_groups keys are contiguous and start from 1
+    if not all(i + 1 in skin_groups for i in range(len(skin_groups))):
+        print("Warning: Skin group IDs are not contiguous starting from 1. QC might be incorrect.")
+        # Or raise an error, depending on desired strictness
+
+    qc_string = "$texturegroup skinfamilies\n{\n"
+
+    # Base materials line (Skin 0)
+    base_line = "\t{ " + " ".join(f'"{mat}"' for mat in base_materials_ordered) + " }"
+    qc_string += base_line + "\n"
+
+    # Skin variant lines
+    sorted_skin_ids = sorted(skin_groups.keys())
+    for skin_id in sorted_skin_ids:
+        skin_map = skin_groups[skin_id]
+        skin_line = "\t{ "
+        material_parts = []
+        for base_name in base_materials_ordered:
+            # Use the variant if present, otherwise default to the base name (should be handled by parse_material_skins)
+            material_parts.append(f'"{skin_map.get(base_name, base_name)}"')
+        skin_line += " ".join(material_parts) + " }"
+        qc_string += skin_line + "\n"
+
+    qc_string += "}\n"
+    return qc_string
+
+
+def get_materials_folder(models_root: str, cd_entry_rel: str) -> str:
+    """Returns the folder under the game's 'materials' folder for a $cdmaterials entry, '' if there is none."""
+    # Base path for materials, sibling to models folder
+    materials_root = os.path.dirname(models_root)
+    if not materials_root: # Check if we could find the parent of 'models'
+        return ""
+    # cd_entry_rel is like "models/props/myfolder" or a manual path
+    # We need the path relative to the *materials* folder
+    # If auto, it starts with models/, strip that. If manual, use as is?
+    # Let's assume manual paths are relative to materials/ already, 
+    # and auto paths need models/ stripped.
+    mat_rel_path = cd_entry_rel
+    if cd_entry_rel.startswith("models/"):
+        mat_rel_path = cd_entry_rel[len("models/"):]
+    elif cd_entry_rel.startswith("models\\"):
+        mat_rel_path = cd_entry_rel[len("models\\"):]
+    return str(Path(os.path.join(materials_root, "materials", mat_rel_path)))
+
+
+class MaterialIndex:
+    """The materials of every model in a collection compile, built once when the compile starts.
+
+    Names are split into base material and skin once, and the $texturegroup of a model is
+    worked out once per distinct set of materials, so modular pieces sharing a palette
+    share the result. Each materials folder is listed once to find the VMTs already there
+    instead of checking every material of every model.
+    """
+
+    def __init__(self):
+        self.materials: Dict[str, MaterialName] = {} # name: split name
+        self.object_materials: Dict[str, Tuple[str, ...]] = {} # object name: material names in slot order
+        self.material_objects: Dict[str, List[str]] = defaultdict(list) # material name: object names using it
+        self.texturegroups: Dict[FrozenSet[str], str] = {} # material names: $texturegroup QC
+        self.folder_files: Dict[str, Optional[Set[str]]] = {} # materials folder: normcased file names in it, None if it failed
+
+    def add_object(self, object_name: str, material_slots: list) -> Tuple[str, ...]:
+        """Indexes the materials in an object's slots, returns their names."""
+        names = []
+        for slot in material_slots:
+            if not slot.material:
+                continue
+            name = slot.material.name
+            if name not in self.materials:
+                self.materials[name] = split_material_name(name)
+            if name not in names:
+                self.material_objects[name].append(object_name)
+            names.append(name)
+        self.object_materials[object_name] = names = tuple(names)
+        return names
+
+    def get_materials(self, object_name: str, material_slots: list) -> Tuple[str, ...]:
+        """Returns the material names of an object, indexing it first if it wasn't."""
+        names = self.object_materials.get(object_name)
+        if names is None:
+            names = self.add_object(object_name, material_slots)
+        return names
+
+    def get_texturegroup_qc(self, material_names: Iterable[str]) -> str:
+        """generate_texturegroup_qc() for a set of indexed materials, reused for every model with the same set."""
+        key = frozenset(material_names)
+        qc = self.texturegroups.get(key)
+        if qc is None:
+            # Sorted so the result doesn't depend on which model with this set came first
+            base_materials_ordered, skin_groups = parse_skin_names(self.materials[name] for name in sorted(key))
+            qc = self.texturegroups[key] = generate_texturegroup_qc(base_materials_ordered, skin_groups)
+        return qc
+
+    def get_folder_files(self, folder: str) -> Optional[Set[str]]:
+        """Creates a materials folder if needed and lists it once, None if it couldn't be created."""
+        if folder in self.folder_files:
+            return self.folder_files[folder]
+        try:
+            os.makedirs(folder, exist_ok=True)
+            files = {os.path.normcase(entry) for entry in os.listdir(folder)}
+        except OSError as e:
+            print(f"Error creating material directory '{folder}': {e}")
+            files = None
+        self.folder_files[folder] = files
+        return files
+
+    def create_material_files(self, models_root: str, cdmaterials: List[str], material_names: List[str], make_vmts: bool):
+        """Creates the materials folders for a model's $cdmaterials and optional placeholder VMTs.
+
+        Args:
+            models_root: Path of the game's 'models' folder, the 'materials' folder is its sibling.
+            cdmaterials: The $cdmaterials entries written to the model's QC.
+            material_names: Names of the model's materials.
+            make_vmts: Whether to write a placeholder VMT for each material that doesn't have one yet.
+        """
+        for cd_entry_rel in cdmaterials:
+            mat_fullpath = get_materials_folder(models_root, cd_entry_rel)
+            if not mat_fullpath:
+                print("Could not determine parent directory of 'models' folder to create materials.")
+                return
+            files = self.get_folder_files(mat_fullpath)
+            if files is None:
+                continue # Skip VMT creation if dir fails
+
+            # Create placeholder VMTs if enabled
+            if make_vmts:
+                for mat_name in material_names:
+                    vmt_name = os.path.normcase(mat_name + '.vmt')
+                    if vmt_name in files:
+                        continue
+                    vmt_path = os.path.join(mat_fullpath, mat_name + '.vmt')
+                    try:
+                        with open(vmt_path, "x") as file:
+                            # Basetexture path assumes texture is in the same folder structure
+                            vmt_basetexture = os.path.join(cd_entry_rel, mat_name).replace("\\", "/")
+                            file.write(f'VertexLitGeneric\n{{\n\t$basetexture "{vmt_basetexture}"\n}}')
+                    except FileExistsError:
+                        pass # Created since the folder was listed
+                    except IOError as e:
+                        print(f"Error writing VMT file '{vmt_path}': {e}")
+                        continue
+                    files.add(vmt_name)
+
+
+def create_material_files(models_root: str, cdmaterials: List[str], material_names: List[str], make_vmts: bool):
+    """Creates the materials folders for a model's $cdmaterials and optional placeholder VMTs.
+
+    See MaterialIndex.create_material_files(), which lists each folder only once per compile.
+    """
+    MaterialIndex().create_material_files(models_root, cdmaterials, material_names, make_vmts)
@@ -0,0 +1,84 @@
+"""Connected parts of meshes, used for collision convex pieces."""
+
+import numpy as np
+from dataclasses import dataclass
+
+
+@dataclass
+class MeshIslands:
+    """Connected parts of a mesh, vertices linked by edges belong to the same island."""
+    count: int
+    vertex_counts: np.ndarray # Vertices in each island
+    face_counts: np.ndarray # Polygons in each island
+    vertex_labels: np.ndarray # Island index of each vertex, 0..count-1 in order of their lowest vertex index
+
+def label_connected_vertices(vertex_count: int, edges: np.ndarray) -> np.ndarray:
+    """Labels the connected components of a graph with a vectorized union-find.
+
+    Every round hooks the root of each edge's higher side onto the lower root, all edges at
+    once, then compresses the paths by pointer jumping until every vertex points at its root.
+    Hooking onto the lower index replaces union by rank: parents only ever decrease, so no
+    cycles can form, and every component touching another one merges in a round, so the
+    number of rounds grows with log(vertex count).
+
+    Args:
+        vertex_count: Number of vertices, loose ones become their own component.
+        edges: (n, 2) array of vertex index pairs.
+
+    Returns:
+        The root (lowest vertex index) of each vertex's component.
+    """
+    parent = np.arange(vertex_count, dtype=np.int64)
+    if len(edges) == 0:
+        return parent
+    side_a = edges[:, 0].astype(np.int64)
+    side_b = edges[:, 1].astype(np.int64)
+    while True:
+        root_a = parent[side_a]
+        root_b = parent[side_b]
+        crossing = root_a != root_b
+        if not crossing.any():
+            return parent
+        # Drop edges inside a finished component, later rounds only look at the rest
+        side_a, side_b = side_a[crossing], side_b[crossing]
+        root_a, root_b = root_a[crossing], root_b[crossing]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        # Path compression
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+def find_mesh_islands(mesh) -> MeshIslands:
+    """Finds the islands of a mesh from its edge array, read in bulk with foreach_get."""
+    vertex_count = len(mesh.vertices)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    roots = label_connected_vertices(vertex_count, edges.reshape(-1, 2))
+    _, vertex_labels = np.unique(roots, return_inverse=True)
+    vertex_labels = vertex_labels.reshape(-1) # Some NumPy versions keep the input's shape, others don't
+    count = int(vertex_labels.max()) + 1 if vertex_count else 0
+
+    # Every vertex of a polygon is in the same island, the first one is enough
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    face_labels = vertex_labels[loop_vertices[loop_starts]]
+
+    return MeshIslands(
+        count=count,
+        vertex_counts=np.bincount(vertex_labels, minlength=count),
+        face_counts=np.bincount(face_labels, minlength=count),
+        vertex_labels=vertex_labels,
+    )
+
+def find_object_islands(obj, depsgraph) -> MeshIslands:
+    """Finds the islands of an object's evaluated mesh, so modifiers are taken into account."""
+    object_eval = obj.evaluated_get(depsgraph)
+    mesh = object_eval.to_mesh()
+    try:
+        return find_mesh_islands(mesh)
+    finally:
+        object_eval.to_mesh_clear()
@@ -0,0 +1,41 @@
+"""Resolves where compiled models go, relative to the game's models folder.
+
+Kept free of bpy so the batch driver can use it outside Blender.
+"""
+
+import os
+
+MODELS_FOLDER_NAME = "models"
+
+
+def to_models_relative_path(file_path):
+    # See if we can find a models folder up the chain
+    index = file_path.rfind(MODELS_FOLDER_NAME)
+
+    if index != -1:
+        root = file_path[:index + len(MODELS_FOLDER_NAME)]
+    else:
+        return None
+
+    return os.path.splitext(os.path.relpath(file_path, root))[0].replace("\\", "/")
+
+def get_models_path(file_path):
+    # See if we can find a models folder up the chain
+    index = file_path.rfind(MODELS_FOLDER_NAME)
+
+    if index != -1:
+        root = file_path[:index + len(MODELS_FOLDER_NAME)]
+        return root
+    
+    return None
+
+def get_relative_dir_path(blend_path: str, models_root: str) -> str:
+    """Returns the folder of the .blend file relative to models_root, "" if it is models_root itself.
+
+    Raises:
+        ValueError: If the .blend file isn't inside models_root (e.g. on another drive).
+    """
+    relative_dir_path = os.path.relpath(os.path.dirname(blend_path), models_root).replace("\\", "/")
+    if relative_dir_path == '.': # Handle case where blend is directly in models root
+        relative_dir_path = ""
+    return relative_dir_path
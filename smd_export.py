@@ -0,0 +1,560 @@
+"""SMD export: vectorized triangle formatting, the streaming writer and the legacy exporters."""
+
+import bpy
+import mathutils
+import threading
+import queue
+from functools import lru_cache
+from dataclasses import dataclass
+from typing import Optional, Tuple
+import numpy as np # Bundled with Blender, used for bulk mesh array processing
+
+from .tracing import Tracer, NULL_TRACER
+
+
+SMD_HEADER = "version 1\nnodes\n0 \"root\" -1\nend\nskeleton\ntime 0\n0 0 0 0 0 0 0\nend\ntriangles\n"
+SMD_TRIANGLES_PER_CHUNK = 4096 # Triangles formatted per write, ~1 MB of text at 6 decimals
+SMD_MAX_PENDING_CHUNKS = 4 # Formatted chunks the background writer may hold before formatting blocks
+
+@lru_cache(maxsize=None)
+def smd_triangle_format(precision: int = 6, uv_precision: int = 6) -> str:
+    """Returns the % format string for one SMD triangle block.
+
+    A block is the material name followed by three "bone pos normal uv" corner lines.
+
+    Args:
+        precision: Decimal places for positions and normals.
+        uv_precision: Decimal places for UV coordinates.
+    """
+    p = f"%.{precision}f"
+    u = f"%.{uv_precision}f"
+    corner = f"0  {p} {p} {p}  {p} {p} {p}  {u} {u} 0\n"
+    return "%s\n" + corner * 3
+
+class SmdStreamWriter:
+    """Buffered SMD file writer that streams text chunks to disk.
+
+    In threaded mode the chunks are handed to a background thread through a bounded
+    queue, so formatting the next chunk overlaps with writing the previous one. At most
+    ``max_pending_chunks`` chunks are held in memory at once, which keeps peak memory
+    independent of the mesh size.
+    """
+
+    def __init__(self, path: str, threaded: bool = True, max_pending_chunks: int = SMD_MAX_PENDING_CHUNKS, buffer_size: int = 1 << 20,
+                 tracer: Tracer = NULL_TRACER):
+        self.path = path
+        self.file = open(path, "w", buffering=buffer_size)
+        self.tracer = tracer
+        self.bytes_written = 0 # SMD text is ASCII, one byte per character
+        self.error = None
+        self.thread = None
+        if threaded:
+            self.queue = queue.Queue(maxsize=max_pending_chunks)
+            self.thread = threading.Thread(target=self._drain, name="AutoMDL SMD writer", daemon=True)
+            self.thread.start()
+
+    def _drain(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            if self.error is None: # Keep draining after a failure so the producer never blocks
+                try:
+                    with self.tracer.span("write_smd", "io", bytes=len(chunk)):
+                        self.file.write(chunk)
+                except Exception as e:
+                    self.error = e
+
+    def write(self, text: str):
+        self.bytes_written += len(text)
+        if self.thread is None:
+            self.file.write(text)
+            return
+        if self.error is not None:
+            raise self.error
+        self.queue.put(text) # Blocks while the queue is full
+
+    def close(self):
+        try:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+        finally:
+            self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+        return False
+
+def build_material_name_table(material_slots, default_name: str = "DefaultMaterial") -> np.ndarray:
+    """Builds a lookup table mapping material indices to SMD material names.
+
+    Args:
+        material_slots: The material slots of a Blender object.
+        default_name: Name used for empty slots and out of range indices.
+
+    Returns:
+        An object array with one name per slot plus a trailing ``default_name``
+        entry, so out of range indices can be clamped onto it in bulk.
+    """
+    names = [slot.material.name if slot.material else default_name for slot in material_slots]
+    names.append(default_name)
+    return np.array(names, dtype=object)
+
+@dataclass
+class MeshArrays:
+    """The arrays of an evaluated mesh the exporters need, read in bulk with foreach_get."""
+    positions: np.ndarray # (verts, 3), transformed
+    vertex_normals: np.ndarray # (verts, 3), transformed and normalized
+    triangle_vertices: np.ndarray # (tris * 3,) vertex index of each triangle corner
+    material_indices: np.ndarray # (tris,)
+    flat_triangles: Optional[np.ndarray] = None # (tris,) bool, None if every triangle uses vertex normals
+    triangle_normals: Optional[np.ndarray] = None # (tris, 3), only read when some triangles are flat
+    triangle_loops: Optional[np.ndarray] = None # (tris * 3,) loop index of each corner, None without UVs
+    uvs: Optional[np.ndarray] = None # (loops, 2)
+
+def read_mesh_arrays(mesh, transform_matrix, has_uvs: bool, use_face_normals: bool) -> MeshArrays:
+    """Reads the per-vertex and per-triangle arrays of an evaluated mesh once, in bulk.
+
+    Args:
+        mesh: An evaluated mesh with its loop triangles calculated.
+        transform_matrix: Rotation/scale matrix applied to the positions. Normals are
+                          transformed by its inverse transpose and renormalized.
+        has_uvs: Whether to read UVs from the active UV layer.
+        use_face_normals: Whether flat shaded triangles use their face normal instead
+                          of the vertex normals (visual meshes do, collision meshes don't).
+    """
+    num_verts = len(mesh.vertices)
+    num_tris = len(mesh.loop_triangles)
+
+    positions = np.empty(num_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions)
+    vert_normals = np.empty(num_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("normal", vert_normals)
+
+    tri_verts = np.empty(num_tris * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", tri_verts)
+    material_indices = np.empty(num_tris, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", material_indices)
+
+    # Rotation and scale as a single matrix multiply, row vectors so p' = p @ M^T
+    matrix = np.array(transform_matrix.to_3x3(), dtype=np.float64)
+    try:
+        normal_matrix = np.linalg.inv(matrix) # (M^-T)^T, for row vectors n' = n @ M^-1
+    except np.linalg.LinAlgError:
+        normal_matrix = np.linalg.pinv(matrix) # Zero scale on an axis, best effort
+
+    arrays = MeshArrays(positions.reshape(-1, 3) @ matrix.T, normalize_rows(vert_normals.reshape(-1, 3) @ normal_matrix),
+                        tri_verts, material_indices)
+
+    if use_face_normals:
+        tri_smooth = np.empty(num_tris, dtype=bool)
+        mesh.loop_triangles.foreach_get("use_smooth", tri_smooth)
+        if not tri_smooth.all():
+            arrays.flat_triangles = ~tri_smooth
+            tri_normals = np.empty(num_tris * 3, dtype=np.float32)
+            mesh.loop_triangles.foreach_get("normal", tri_normals)
+            arrays.triangle_normals = normalize_rows(tri_normals.reshape(-1, 3) @ normal_matrix)
+
+    if has_uvs:
+        arrays.triangle_loops = np.empty(num_tris * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", arrays.triangle_loops)
+        uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        mesh.uv_layers.active.data.foreach_get("uv", uvs)
+        arrays.uvs = uvs.reshape(-1, 2)
+    return arrays
+
+def iter_triangle_chunks(mesh, transform_matrix, has_uvs: bool, use_face_normals: bool, chunk_size: int = SMD_TRIANGLES_PER_CHUNK):
+    """Reads the triangles of an evaluated mesh with foreach_get and yields them in chunks.
+
+    Per-vertex and per-triangle source arrays are read once in bulk. The per-corner
+    data is only assembled one chunk at a time, so it never exists for the whole mesh.
+
+    Args:
+        mesh, transform_matrix, has_uvs, use_face_normals: See read_mesh_arrays(). (0, 0)
+            is used for the UVs without has_uvs.
+        chunk_size: Number of triangles per yielded chunk.
+
+    Yields:
+        Tuples of:
+        - corners: Float array of shape (chunk_tris * 3, 8) holding position, normal
+                   and UV of every triangle corner.
+        - material_indices: Int array of shape (chunk_tris,) with each triangle's material index.
+    """
+    return iter_array_chunks(read_mesh_arrays(mesh, transform_matrix, has_uvs, use_face_normals), chunk_size)
+
+def iter_array_chunks(arrays: MeshArrays, chunk_size: int = SMD_TRIANGLES_PER_CHUNK):
+    """iter_triangle_chunks() on arrays that were already read."""
+    num_tris = len(arrays.material_indices)
+
+    for start in range(0, num_tris, chunk_size):
+        end = min(start + chunk_size, num_tris)
+        chunk_verts = arrays.triangle_vertices[start * 3:end * 3]
+
+        corners = np.zeros((len(chunk_verts), 8), dtype=np.float64)
+        corners[:, 0:3] = arrays.positions[chunk_verts]
+        corners[:, 3:6] = arrays.vertex_normals[chunk_verts]
+        if arrays.flat_triangles is not None:
+            chunk_flat = arrays.flat_triangles[start:end]
+            if chunk_flat.any():
+                flat_corners = np.repeat(chunk_flat, 3)
+                corners[flat_corners, 3:6] = np.repeat(arrays.triangle_normals[start:end][chunk_flat], 3, axis=0)
+        if arrays.triangle_loops is not None:
+            corners[:, 6:8] = arrays.uvs[arrays.triangle_loops[start * 3:end * 3]]
+
+        yield corners, arrays.material_indices[start:end]
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scales each row of an (n, 3) array to unit length, leaving zero rows untouched."""
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0.0)
+
+def unique_inverse(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Numbers the distinct values of a 1D array.
+
+    Like np.unique(return_index=True, return_inverse=True), but the returned index is
+    of any occurrence of each value rather than the first, which allows a quicksort.
+
+    Returns:
+        The index of one occurrence of each distinct value, and the number of every value.
+    """
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    is_new = np.empty(len(keys), dtype=bool)
+    is_new[0] = True
+    np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=is_new[1:])
+    inverse = np.empty(len(keys), dtype=np.int64)
+    inverse[order] = np.cumsum(is_new) - 1
+    return order[is_new], inverse
+
+
+# --- SMD Export ---
+
+def exportObjectToSmd(obj, path, is_collision_smd, use_legacy=False, precision=6, uv_precision=6, threaded_writer=True, tracer=NULL_TRACER,
+                      mesh_format="smd", lods=(), lod_triangles=None, collision_hulls=None, hull_pieces=None):
+    """Exports an object's evaluated mesh to an SMD file, or a binary DMX one with mesh_format "dmx".
+
+    lods is a sequence of (ratio, path) of decimated copies to write from the same evaluated
+    mesh, see lod.py. The triangle count of each is appended to lod_triangles if given.
+
+    With collision_hulls (a CollisionHullSettings), convex hulls of the mesh are written
+    instead of the mesh itself, see collision_hulls.py. Their number is appended to
+    hull_pieces if given.
+
+    Returns the number of triangles written (0 if the export failed).
+    """
+
+    # switch to object mode
+    context_mode_snapshot = "OBJECT" # Default to object mode
+    active_obj = bpy.context.active_object
+    if active_obj and bpy.context.mode != 'OBJECT':
+        context_mode_snapshot = active_obj.mode
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    # Check if object exists and is a mesh
+    if not obj or obj.name not in bpy.data.objects or obj.type != 'MESH':
+         print(f"Error: Object '{obj.name if obj else 'None'}' not found or not a mesh.")
+         # Switch mode back if changed
+         if active_obj and bpy.context.mode != context_mode_snapshot:
+             bpy.ops.object.mode_set(mode=context_mode_snapshot)
+         return 0 # Indicate failure
+
+    # Ensure UV layer exists
+    if not obj.data.uv_layers:
+         print(f"Warning: Object '{obj.name}' has no UV layers. Exporting with default UVs (0,0).")
+         # Optionally create a default UV layer if needed, or just proceed
+         # bpy.ops.mesh.uv_texture_add() # This would need object selection context
+
+    # get mesh, apply modifiers
+    with tracer.span("evaluate_mesh", "export", object=obj.name):
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        object_eval = obj.evaluated_get(depsgraph)
+        try:
+            mesh = object_eval.to_mesh()
+        except RuntimeError as e:
+            print(f"Error converting object '{obj.name}' to mesh: {e}")
+            # Switch mode back if changed
+            if active_obj and bpy.context.mode != context_mode_snapshot:
+                bpy.ops.object.mode_set(mode=context_mode_snapshot)
+            return 0
+        # Ensure mesh is valid
+        if not mesh:
+             print(f"Error: Could not get mesh data for '{obj.name}' after evaluation.")
+             # Switch mode back if changed
+             if active_obj and bpy.context.mode != context_mode_snapshot:
+                 bpy.ops.object.mode_set(mode=context_mode_snapshot)
+             return 0
+
+        mesh.calc_loop_triangles()
+    triangle_count = len(mesh.loop_triangles)
+
+    # Object transform (rotation and scale only)
+    loc, rot, scale = obj.matrix_world.decompose()
+    mat_rot = rot.to_matrix().to_4x4()
+    mat_sca = mathutils.Matrix.Diagonal(scale).to_4x4() # Simpler way to create scale matrix
+    transform_matrix = mat_rot @ mat_sca # Apply scale then rotation
+    # write!
+    try:
+        has_uvs = len(mesh.uv_layers) > 0
+        arrays = None
+        if not (use_legacy and mesh_format == "smd") or lods or collision_hulls:
+            # Read once in bulk, shared by the mesh and its LODs
+            arrays = read_mesh_arrays(mesh, transform_matrix, has_uvs, use_face_normals=not is_collision_smd)
+        if collision_hulls:
+            arrays, piece_count = buildCollisionHulls(obj.name, arrays, collision_hulls, tracer)
+            triangle_count = len(arrays.material_indices)
+            use_legacy = False # The hulls only exist as arrays
+            if hull_pieces is not None:
+                hull_pieces.append(piece_count)
+        name_table = get_export_name_table(obj, is_collision_smd)
+        if use_legacy and mesh_format == "smd":
+            # The legacy path reads transformed data back per vertex, the vectorized one applies the matrix itself
+            mesh.transform(transform_matrix)
+
+        if mesh_format == "dmx":
+            writeArraysToDmx(path, obj.name, arrays, name_table, tracer)
+        else:
+            format_span = tracer.span("format_smd", "export", object=obj.name, triangles=triangle_count, legacy=use_legacy)
+            # Triangles are streamed to disk in chunks, the legacy path writes straight into the file buffer
+            with format_span, SmdStreamWriter(path + ".smd", threaded=threaded_writer and not use_legacy, tracer=tracer) as sb:
+
+                # hardcoded but yea
+                sb.write(SMD_HEADER)
+
+                has_materials = len(obj.material_slots) > 0 and any(slot.material for slot in obj.material_slots)
+
+                if not use_legacy:
+                    exportMeshToSmd_Vectorized(sb, arrays, name_table, precision, uv_precision)
+                # okay so now, i sacrifice everything that goes into making good code
+                # just to squeeze out some performance of out this
+                # because we REALLY do need the extra boost
+                # no need to check for every triangle whether or not its a collision smd or presence of materials
+                # so we check here and call the appropriate variant of the function
+                elif is_collision_smd:
+                    exportMeshToSmd_Collision(sb, mesh, has_uvs) # Pass has_uvs flag
+                else:
+                    if has_materials:
+                        exportMeshToSmd_WithMaterials(sb, obj, mesh, has_uvs) # Pass has_uvs flag
+                    else:
+                        exportMeshToSmd_NoMaterials(sb, mesh, has_uvs) # Pass has_uvs flag
+
+                sb.write("end\n")
+                format_span.set(bytes=sb.bytes_written)
+
+        # --- LODs ---
+        for ratio, lod_path in lods:
+            lod_triangle_count = exportLod(obj.name, arrays, name_table, ratio, lod_path, mesh_format, precision, uv_precision, threaded_writer, tracer)
+            if lod_triangles is not None:
+                lod_triangles.append(lod_triangle_count)
+    except IOError as e:
+         print(f"Error writing {mesh_format.upper()} file {path}.{mesh_format}: {e}")
+         triangle_count = 0
+    finally:
+        # Clean up temporary mesh data
+        if 'mesh' in locals() and mesh:
+            object_eval.to_mesh_clear()
+
+        # switch mode back
+        if active_obj and bpy.context.mode != context_mode_snapshot:
+            bpy.ops.object.mode_set(mode=context_mode_snapshot)
+
+    return triangle_count
+
+
+def get_export_name_table(obj, is_collision_smd: bool) -> np.ndarray:
+    if is_collision_smd:
+        return np.array(["Phy"], dtype=object) # Collision meshes use a default material name
+    return build_material_name_table(obj.material_slots)
+
+def writeArraysToDmx(path, object_name, arrays, name_table, tracer):
+    """Writes mesh arrays to path + ".dmx" as binary DMX."""
+    from .dmx_export import exportMeshToDmx # Only loaded when a compile uses DMX
+
+    format_span = tracer.span("format_dmx", "export", object=object_name, triangles=len(arrays.material_indices))
+    with format_span:
+        format_span.set(bytes=exportMeshToDmx(path + ".dmx", object_name, arrays, name_table))
+
+def writeArraysToSmd(path, object_name, arrays, name_table, precision, uv_precision, threaded_writer, tracer):
+    """Writes mesh arrays to path + ".smd" with the vectorized formatter."""
+    format_span = tracer.span("format_smd", "export", object=object_name, triangles=len(arrays.material_indices), legacy=False)
+    with format_span, SmdStreamWriter(path + ".smd", threaded=threaded_writer, tracer=tracer) as sb:
+        sb.write(SMD_HEADER)
+        exportMeshToSmd_Vectorized(sb, arrays, name_table, precision, uv_precision)
+        sb.write("end\n")
+        format_span.set(bytes=sb.bytes_written)
+
+def buildCollisionHulls(object_name, arrays, hull_settings, tracer=NULL_TRACER):
+    """Returns the arrays of convex hulls of a mesh's arrays and the number of hulls."""
+    from .collision_hulls import build_collision_arrays
+
+    with tracer.span("collision_hulls", "collision", object=object_name, triangles=len(arrays.material_indices)) as span:
+        hull_arrays, piece_count = build_collision_arrays(arrays, hull_settings)
+        span.set(pieces=piece_count, hull_triangles=len(hull_arrays.material_indices))
+    return hull_arrays, piece_count
+
+def exportLod(object_name, arrays, name_table, ratio, path, mesh_format="smd", precision=6, uv_precision=6, threaded_writer=True, tracer=NULL_TRACER):
+    """Writes a decimated copy of a mesh's arrays. Returns its triangle count, 0 if nothing was left to write."""
+    from .lod import decimate_mesh_arrays
+
+    with tracer.span("decimate", "lod", object=object_name, ratio=ratio) as span:
+        lod_arrays = decimate_mesh_arrays(arrays, ratio)
+        span.set(triangles=len(lod_arrays.material_indices))
+    if len(lod_arrays.material_indices) == 0:
+        return 0
+    if mesh_format == "dmx":
+        writeArraysToDmx(path, object_name, lod_arrays, name_table, tracer)
+    else:
+        writeArraysToSmd(path, object_name, lod_arrays, name_table, precision, uv_precision, threaded_writer, tracer)
+    return len(lod_arrays.material_indices)
+
+
+def exportMeshToSmd_Vectorized(sb, arrays, name_table, precision=6, uv_precision=6):
+    # Writes the arrays read_mesh_arrays() pulled in bulk, instead of touching mesh elements per corner
+    max_index = len(name_table) - 1
+    triangle_format = smd_triangle_format(precision, uv_precision)
+
+    # Formats a whole chunk of triangles with a single % operation, then hands it to the writer
+    for corners, material_indices in iter_array_chunks(arrays):
+        count = len(material_indices)
+        block = np.empty((count, 25), dtype=object)
+        block[:, 0] = name_table[np.minimum(material_indices, max_index)]
+        block[:, 1:] = corners.reshape(count, 24)
+        sb.write((triangle_format * count) % tuple(block.ravel().tolist()))
+
+
+def exportMeshToSmd_Collision(sb, mesh, has_uvs):
+    active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
+    default_uv = mathutils.Vector((0.0, 0.0))
+
+    for tri in mesh.loop_triangles:
+        material_name = "Phy" # Collision meshes use a default material name
+
+        # tri vertices
+        vert_a = mesh.vertices[tri.vertices[0]]
+        vert_b = mesh.vertices[tri.vertices[1]]
+        vert_c = mesh.vertices[tri.vertices[2]]
+
+        # tri positions
+        pos_a = vert_a.co
+        pos_b = vert_b.co
+        pos_c = vert_c.co
+
+        # tri normals (use vertex normals for collision)
+        normal_a = vert_a.normal
+        normal_b = vert_b.normal
+        normal_c = vert_c.normal
+
+        # tri uv coords (use default if no UVs)
+        uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
+        uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
+        uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
+
+        # Use .format() for compatibility
+        sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
+            material_name,
+            pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
+            pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
+            pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
+        ))
+
+
+def exportMeshToSmd_WithMaterials(sb, obj, mesh, has_uvs):
+    active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
+    default_uv = mathutils.Vector((0.0, 0.0))
+
+    for tri in mesh.loop_triangles:
+        material_name = "DefaultMaterial" # Default if slot is empty or index is wrong
+        if tri.material_index < len(obj.material_slots) and obj.material_slots[tri.material_index].material:
+             material_name = obj.material_slots[tri.material_index].material.name
+        # Sanitize material name (replace spaces, etc.) if needed for SMD compatibility
+        # material_name = material_name.replace(" ", "_")
+
+        # tri vertices
+        vert_a = mesh.vertices[tri.vertices[0]]
+        vert_b = mesh.vertices[tri.vertices[1]]
+        vert_c = mesh.vertices[tri.vertices[2]]
+
+        # tri positions
+        pos_a = vert_a.co
+        pos_b = vert_b.co
+        pos_c = vert_c.co
+
+        # tri normals
+        normal_a = vert_a.normal
+        normal_b = vert_b.normal
+        normal_c = vert_c.normal
+
+        # Use face normal if flat shaded
+        if not tri.use_smooth:
+            normal = tri.normal # Use pre-calculated loop triangle normal
+            normal_a = normal
+            normal_b = normal
+            normal_c = normal
+
+        # tri uv coords
+        uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
+        uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
+        uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
+
+        # Use .format() for compatibility
+        sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
+            material_name,
+            pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
+            pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
+            pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
+        ))
+
+
+def exportMeshToSmd_NoMaterials(sb, mesh, has_uvs):
+    active_uv_layer = mesh.uv_layers.active.data if has_uvs else None
+    default_uv = mathutils.Vector((0.0, 0.0))
+
+    for tri in mesh.loop_triangles:
+        material_name = "DefaultMaterial" # Assign a default material name
+
+        # tri vertices
+        vert_a = mesh.vertices[tri.vertices[0]]
+        vert_b = mesh.vertices[tri.vertices[1]]
+        vert_c = mesh.vertices[tri.vertices[2]]
+
+        # tri positions
+        pos_a = vert_a.co
+        pos_b = vert_b.co
+        pos_c = vert_c.co
+
+        # tri normals
+        normal_a = vert_a.normal
+        normal_b = vert_b.normal
+        normal_c = vert_c.normal
+
+        # Use face normal if flat shaded
+        if not tri.use_smooth:
+            normal = tri.normal # Use pre-calculated loop triangle normal
+            normal_a = normal
+            normal_b = normal
+            normal_c = normal
+
+        # tri uv coords
+        uv_a = active_uv_layer[tri.loops[0]].uv if has_uvs else default_uv
+        uv_b = active_uv_layer[tri.loops[1]].uv if has_uvs else default_uv
+        uv_c = active_uv_layer[tri.loops[2]].uv if has_uvs else default_uv
+
+        # Use .format() for compatibility
+        sb.write("{}\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n0  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} {:.6f}  {:.6f} {:.6f} 0\n".format(
+            material_name,
+            pos_a.x, pos_a.y, pos_a.z, normal_a.x, normal_a.y, normal_a.z, uv_a.x, uv_a.y,
+            pos_b.x, pos_b.y, pos_b.z, normal_b.x, normal_b.y, normal_b.z, uv_b.x, uv_b.y,
+            pos_c.x, pos_c.y, pos_c.z, normal_c.x, normal_c.y, normal_c.z, uv_c.x, uv_c.y
+        ))
@@ -0,0 +1,183 @@
+"""Per-stage timing of a collection compile, written as a Chrome trace.
+
+Spans are recorded for every model and stage: mesh evaluation, SMD formatting and file
+writes, QC writing, studiomdl, material files. The trace opens in chrome://tracing or
+https://ui.perfetto.dev, and a table of the slowest stages is printed to the console.
+
+With tracing off, span() returns one shared do-nothing span, so instrumented code only
+pays for a method call. Kept free of bpy, spans are also recorded on the compile threads.
+"""
+
+import os
+import json
+import time
+import threading
+import tracemalloc
+from typing import List, Dict, Any
+
+TRACE_SUFFIX = ".automdl-trace.json"
+
+
+def get_trace_path(blend_path: str) -> str:
+    """Returns the path of the trace written next to a .blend file."""
+    return os.path.splitext(blend_path)[0] + TRACE_SUFFIX
+
+
+class Span:
+    """One timed stage. Extra values (triangles, bytes, ...) can be added with set() while it runs."""
+
+    __slots__ = ("tracer", "name", "category", "args", "start", "memory_start", "memory_peak")
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.memory_start = 0
+        self.memory_peak = 0
+
+    def set(self, **args):
+        self.args.update(args)
+
+    def __enter__(self):
+        self.tracer.enter_span(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.exit_span(self, end)
+        return False
+
+
+class NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """Records spans from any thread.
+
+    Memory peaks come from tracemalloc, which only sees Python allocations and is process
+    wide, so they're only recorded for spans of the thread that created the tracer (the
+    one exporting). Each span's peak is measured above the memory in use when it started.
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = False):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.thread_names: Dict[int, str] = {}
+        self.lock = threading.Lock()
+        self.memory_thread = threading.get_ident()
+        self.memory_stack: List[Span] = []
+        self.started_tracemalloc = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+
+    def stop(self):
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def span(self, name: str, category: str = "", **args):
+        """Returns a context manager timing the code it wraps."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, args)
+
+    def enter_span(self, span: Span):
+        if not self.trace_memory or threading.get_ident() != self.memory_thread or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self.memory_stack:
+            parent = self.memory_stack[-1]
+            parent.memory_peak = max(parent.memory_peak, peak)
+        tracemalloc.reset_peak()
+        span.memory_start = span.memory_peak = current
+        self.memory_stack.append(span)
+
+    def exit_span(self, span: Span, end: float):
+        if self.memory_stack and self.memory_stack[-1] is span:
+            span.memory_peak = max(span.memory_peak, tracemalloc.get_traced_memory()[1])
+            self.memory_stack.pop()
+            tracemalloc.reset_peak()
+            if self.memory_stack:
+                parent = self.memory_stack[-1]
+                parent.memory_peak = max(parent.memory_peak, span.memory_peak)
+            span.args["memory_peak_kb"] = round((span.memory_peak - span.memory_start) / 1024, 1)
+
+        thread_id = threading.get_ident()
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": round((span.start - self.origin) * 1e6, 1),
+            "dur": round((end - span.start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread_id,
+            "args": span.args,
+        }
+        with self.lock:
+            self.events.append(event)
+            if thread_id not in self.thread_names:
+                self.thread_names[thread_id] = threading.current_thread().name
+
+    def write_chrome_trace(self, path: str):
+        """Writes the spans in the Chrome trace_event format."""
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_id, "args": {"name": name}}
+                    for thread_id, name in thread_names.items()]
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, file)
+        os.replace(temp_path, path)
+
+    def get_stage_totals(self) -> List[Dict[str, Any]]:
+        """Sums the spans by stage name, slowest stage first."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        with self.lock:
+            events = list(self.events)
+        for event in events:
+            stage = stages.setdefault(event["name"], {"name": event["name"], "count": 0, "seconds": 0.0, "max_seconds": 0.0,
+                                                      "triangles": 0, "bytes": 0, "memory_peak_kb": 0.0})
+            seconds = event["dur"] / 1e6
+            stage["count"] += 1
+            stage["seconds"] += seconds
+            stage["max_seconds"] = max(stage["max_seconds"], seconds)
+            stage["triangles"] += event["args"].get("triangles", 0)
+            stage["bytes"] += event["args"].get("bytes", 0)
+            stage["memory_peak_kb"] = max(stage["memory_peak_kb"], event["args"].get("memory_peak_kb", 0.0))
+        return sorted(stages.values(), key=lambda stage: stage["seconds"], reverse=True)
+
+    def format_summary(self) -> str:
+        """Returns the stage totals as a text table. Stages nest and compiles run in parallel, so totals overlap."""
+        lines = [f"{'Stage':<24} {'Count':>6} {'Total s':>9} {'Max s':>8} {'Triangles':>11} {'MB':>9}" + (f" {'Peak MB':>8}" if self.trace_memory else "")]
+        for stage in self.get_stage_totals():
+            line = (f"{stage['name']:<24} {stage['count']:>6} {stage['seconds']:>9.3f} {stage['max_seconds']:>8.3f} "
+                    f"{stage['triangles']:>11} {stage['bytes'] / (1 << 20):>9.1f}")
+            if self.trace_memory:
+                line += f" {stage['memory_peak_kb'] / 1024:>8.1f}"
+            lines.append(line)
+        lines.append(f"Wall time: {time.perf_counter() - self.origin:.3f}s")
+        return "\n".join(lines)
+
+NULL_TRACER = Tracer(enabled=False)
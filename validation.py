@@ -0,0 +1,204 @@
+"""Collection contents and the pre-flight checks run before anything is exported."""
+
+import numpy as np
+from typing import List, Dict, Tuple, Set, Optional
+from dataclasses import dataclass
+
+from .mesh_islands import find_mesh_islands
+from .smd_export import build_material_name_table
+
+
+# --- Collection Contents ---
+
+def get_model_candidates(collection) -> list:
+    """Returns the visual mesh objects of a collection that are compiled into a model each."""
+    candidates = []
+    for obj in collection.objects:
+        # Filter for valid visual mesh objects AND check effective visibility
+        if (obj.type != 'MESH' or               # Skip non-mesh objects
+            obj.name.lower().startswith('col_') or # Skip collision meshes themselves
+            obj.hide_get()):                   # Skip if hidden (considers hierarchy, layers etc.)
+            continue # Skip this object and move to the next one
+        candidates.append(obj)
+    return candidates
+
+def get_collision_collection(collection):
+    """Returns the "collision" sub-collection (case-insensitive), or None."""
+    for child in collection.children:
+        if child.name.lower() == "collision":
+            return child
+    return None
+
+def find_collision_object(collision_collection, vis_mesh_obj):
+    """Returns the COL_<name> mesh matching a visual mesh (case-insensitive), or None."""
+    if collision_collection is None:
+        return None
+    expected_col_name = f"COL_{vis_mesh_obj.name}".lower()
+    for col_obj in collision_collection.objects:
+        if col_obj.type == 'MESH' and col_obj.name.lower() == expected_col_name:
+            return col_obj
+    return None
+
+def sanitize_model_name(name: str) -> str:
+    """Replaces the characters that can't be used in model file names. Can return an empty string."""
+    return "".join(c if c.isalnum() or c in ('_', '-') else '_' for c in name)
+
+
+# --- Pre-flight Validation ---
+
+# studiomdl limits (MAXSTUDIOVERTS, MAXSTUDIOSKINS)
+MAX_MODEL_VERTICES = 65536
+MAX_MODEL_MATERIALS = 32
+# More convex pieces than this compile, but make slow and unstable physics
+MAX_CONVEX_PIECES_WARNING = 40
+MIN_TRIANGLE_AREA = 1e-12
+
+@dataclass
+class ValidationIssue:
+    object_name: str
+    message: str
+    is_fatal: bool = False # Fatal issues skip the model, the others are reported as warnings
+
+def read_triangles(mesh) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the vertex positions (n, 3) and triangle vertex indices (m, 3) of a mesh, read in bulk."""
+    mesh.calc_loop_triangles()
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+    mesh.vertices.foreach_get("co", positions)
+    triangles = np.empty(len(mesh.loop_triangles) * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles)
+    return positions.reshape(-1, 3), triangles.reshape(-1, 3)
+
+def get_triangle_areas(positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    corners = positions[triangles]
+    return 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1)
+
+def check_mesh_geometry(issues: List[ValidationIssue], object_name: str, positions: np.ndarray, triangles: np.ndarray, label: str) -> bool:
+    """Checks for an empty mesh and non-finite positions. Returns False if the other checks can't run."""
+    if len(triangles) == 0:
+        issues.append(ValidationIssue(object_name, f"The {label} has no faces.", True))
+        return False
+    bad_vertices = np.count_nonzero(~np.isfinite(positions).all(axis=1))
+    if bad_vertices:
+        issues.append(ValidationIssue(object_name, f"The {label} has {bad_vertices} vertices with NaN or infinite positions.", True))
+        return False
+    return True
+
+def validate_visual_mesh(issues: List[ValidationIssue], obj, mesh):
+    positions, triangles = read_triangles(mesh)
+    if not check_mesh_geometry(issues, obj.name, positions, triangles, "mesh"):
+        return
+
+    degenerate = np.count_nonzero(get_triangle_areas(positions, triangles) <= MIN_TRIANGLE_AREA)
+    if degenerate:
+        issues.append(ValidationIssue(obj.name, f"{degenerate} degenerate (zero-area) triangle(s), studiomdl may drop them or fail to build normals."))
+
+    # The SMD holds one vertex per triangle corner, studiomdl welds the identical ones
+    if len(mesh.vertices) > MAX_MODEL_VERTICES:
+        issues.append(ValidationIssue(obj.name, f"{len(mesh.vertices)} vertices, more than the {MAX_MODEL_VERTICES} studiomdl can compile into one model.", True))
+    elif len(mesh.loops) > MAX_MODEL_VERTICES:
+        issues.append(ValidationIssue(obj.name, f"Up to {len(mesh.loops)} vertices after splitting UV seams and hard edges, studiomdl allows {MAX_MODEL_VERTICES}."))
+
+    material_indices = np.empty(len(mesh.loop_triangles), dtype=np.int32)
+    mesh.loop_triangles.foreach_get("material_index", material_indices)
+    material_names = build_material_name_table(obj.material_slots)
+    used_names = set(material_names[np.unique(np.clip(material_indices, 0, len(material_names) - 1))])
+    if len(used_names) > MAX_MODEL_MATERIALS:
+        issues.append(ValidationIssue(obj.name, f"{len(used_names)} materials, studiomdl allows {MAX_MODEL_MATERIALS} per model.", True))
+    for material_name in sorted(used_names):
+        if not material_name.isascii():
+            issues.append(ValidationIssue(obj.name, f"Material '{material_name}' has non-ASCII characters, studiomdl can't read it.", True))
+
+def validate_collision_mesh(issues: List[ValidationIssue], vis_mesh_obj, phy_mesh_obj, mesh):
+    positions, triangles = read_triangles(mesh)
+    if not check_mesh_geometry(issues, vis_mesh_obj.name, positions, triangles, f"collision mesh '{phy_mesh_obj.name}'"):
+        return
+
+    islands = find_mesh_islands(mesh)
+    triangle_islands = islands.vertex_labels[triangles[:, 0]]
+    island_areas = np.bincount(triangle_islands, weights=get_triangle_areas(positions, triangles), minlength=islands.count)
+    has_faces = islands.face_counts > 0
+    convex_pieces = np.count_nonzero(has_faces)
+
+    flat_pieces = np.count_nonzero(has_faces & (island_areas <= MIN_TRIANGLE_AREA))
+    if flat_pieces:
+        issues.append(ValidationIssue(vis_mesh_obj.name, f"Collision mesh '{phy_mesh_obj.name}' has {flat_pieces} zero-area piece(s), studiomdl can't build a convex hull from them.", True))
+    small_pieces = np.count_nonzero(has_faces & (islands.vertex_counts < 4))
+    if small_pieces:
+        issues.append(ValidationIssue(vis_mesh_obj.name, f"Collision mesh '{phy_mesh_obj.name}' has {small_pieces} piece(s) with fewer than 4 vertices, they have no volume."))
+    loose_parts = islands.count - convex_pieces
+    if loose_parts:
+        issues.append(ValidationIssue(vis_mesh_obj.name, f"Collision mesh '{phy_mesh_obj.name}' has {loose_parts} loose vertex/edge part(s), they still count towards $maxconvexpieces."))
+    if convex_pieces > MAX_CONVEX_PIECES_WARNING:
+        issues.append(ValidationIssue(vis_mesh_obj.name, f"Collision mesh '{phy_mesh_obj.name}' has {convex_pieces} convex pieces, more than {MAX_CONVEX_PIECES_WARNING} makes physics slow and unstable."))
+
+def validate_model(vis_mesh_obj, phy_mesh_obj, depsgraph) -> List[ValidationIssue]:
+    """Checks one model for problems that would make studiomdl fail or produce a broken model."""
+    issues = []
+    if not vis_mesh_obj.name.isascii():
+        issues.append(ValidationIssue(vis_mesh_obj.name, "The object name has non-ASCII characters, studiomdl can't write the model.", True))
+    elif not sanitize_model_name(vis_mesh_obj.name):
+        issues.append(ValidationIssue(vis_mesh_obj.name, "The object name has no letters or digits to name the model after.", True))
+    elif sanitize_model_name(vis_mesh_obj.name) != vis_mesh_obj.name:
+        issues.append(ValidationIssue(vis_mesh_obj.name, f"The name has characters that can't be used in file names, the model is compiled as '{sanitize_model_name(vis_mesh_obj.name)}.mdl'."))
+
+    object_eval = vis_mesh_obj.evaluated_get(depsgraph)
+    try:
+        validate_visual_mesh(issues, vis_mesh_obj, object_eval.to_mesh())
+    finally:
+        object_eval.to_mesh_clear()
+
+    if phy_mesh_obj is not None:
+        object_eval = phy_mesh_obj.evaluated_get(depsgraph)
+        try:
+            validate_collision_mesh(issues, vis_mesh_obj, phy_mesh_obj, object_eval.to_mesh())
+        finally:
+            object_eval.to_mesh_clear()
+    return issues
+
+def validate_collection(collection, depsgraph, object_names: Optional[Set[str]] = None,
+                        generates_collision: bool = False) -> Dict[str, List[ValidationIssue]]:
+    """Checks every model of a collection before anything is exported.
+
+    Args:
+        object_names: Only check the meshes of these models, None for all of them.
+        generates_collision: Models without a COL_ mesh get generated collision, see collision_hulls.py.
+
+    Returns:
+        {object name: issues} for the objects with issues, in collection order.
+    """
+    results: Dict[str, List[ValidationIssue]] = {}
+    collision_collection = get_collision_collection(collection)
+    used_model_names: Dict[str, str] = {}
+    matched_collision_names = set()
+    for vis_mesh_obj in get_model_candidates(collection):
+        phy_mesh_obj = find_collision_object(collision_collection, vis_mesh_obj)
+        if object_names is not None and vis_mesh_obj.name not in object_names:
+            issues = []
+        else:
+            try:
+                issues = validate_model(vis_mesh_obj, phy_mesh_obj, depsgraph)
+            except Exception as e:
+                issues = [ValidationIssue(vis_mesh_obj.name, f"Could not be validated: {e}")]
+
+        model_name = sanitize_model_name(vis_mesh_obj.name).lower()
+        if model_name and model_name in used_model_names:
+            issues.append(ValidationIssue(vis_mesh_obj.name, f"Compiles to the same model as '{used_model_names[model_name]}'. Rename one of them.", True))
+        used_model_names.setdefault(model_name, vis_mesh_obj.name)
+
+        if phy_mesh_obj is not None:
+            matched_collision_names.add(phy_mesh_obj.name)
+        elif collision_collection is not None and not generates_collision:
+            issues.append(ValidationIssue(vis_mesh_obj.name, f"No 'COL_{vis_mesh_obj.name}' in '{collision_collection.name}', the model will have no collision."))
+        if issues:
+            results[vis_mesh_obj.name] = issues
+
+    if collision_collection is not None:
+        for col_obj in collision_collection.objects:
+            if col_obj.type == 'MESH' and col_obj.name not in matched_collision_names:
+                results[col_obj.name] = [ValidationIssue(col_obj.name, "No visual mesh with a matching name, this collision mesh isn't used.")]
+    return results
+
+def count_validation_issues(results: Dict[str, List[ValidationIssue]]) -> Tuple[int, int]:
+    """Returns the number of fatal issues and warnings."""
+    fatal_count = sum(1 for issues in results.values() for issue in issues if issue.is_fatal)
+    return fatal_count, sum(len(issues) for issues in results.values()) - fatal_count
@@ -0,0 +1,188 @@
+"""Scratch workspaces: where a compile run writes its QCs and meshes until studiomdl has read them.
+
+Every run gets its own folder under a shared root, with one subfolder per compile job, so
+two Blender instances compiling the same asset never write to the same files. The run
+folder holds a small owner file (process id and host). A successful run removes its folder
+in one step; the folders of failed jobs can be kept for inspection. Folders of runs whose
+process is gone (Blender crashed or was killed mid-compile) are removed by the next run.
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+import tempfile
+from typing import Optional
+
+from .compiler import remove_job_dir
+
+
+WORKSPACE_PREFIX = "run_"
+WORKSPACE_INFO_FILE = "workspace.json"
+WORKSPACE_VERSION = 1
+KEPT_WORKSPACE_SECONDS = 3 * 24 * 3600 # Failed runs kept for inspection are removed after this
+RAM_SCRATCH_MIN_FREE = 512 * 1024 * 1024 # A RAM disk with less room than this isn't used
+RAM_SCRATCH_CANDIDATES = ("/dev/shm", os.environ.get("XDG_RUNTIME_DIR", ""))
+
+def get_default_scratch_root(blender_tempdir: str) -> str:
+    """Returns the scratch root next to Blender's per-session temp folder, which a crash would leave behind."""
+    base_dir = os.path.dirname(os.path.normpath(blender_tempdir)) if blender_tempdir else tempfile.gettempdir()
+    return os.path.join(base_dir, "automdl_scratch")
+
+def get_ram_scratch_root() -> Optional[str]:
+    """Returns a scratch root on a RAM-backed file system (tmpfs), None if there is none with enough room."""
+    for candidate in RAM_SCRATCH_CANDIDATES:
+        if not candidate or not os.path.isdir(candidate) or not os.access(candidate, os.W_OK):
+            continue
+        try:
+            if shutil.disk_usage(candidate).free < RAM_SCRATCH_MIN_FREE:
+                continue
+        except OSError:
+            continue
+        return os.path.join(candidate, "automdl_scratch")
+    return None
+
+def is_process_running(pid: int) -> bool:
+    """Returns whether a process with this id exists on this machine."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True # Someone else's process
+    except OSError:
+        return False
+    return True
+
+def read_workspace_info(run_dir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(run_dir, WORKSPACE_INFO_FILE), "r", encoding="utf-8") as file:
+            info = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return info if isinstance(info, dict) else None
+
+def remove_orphaned_workspaces(root: str, max_kept_seconds: float = KEPT_WORKSPACE_SECONDS) -> int:
+    """Removes the run folders under root whose process is gone, and kept ones past their age.
+
+    Folders of other machines (a scratch root on a network share) are left alone.
+
+    Returns:
+        The number of folders removed.
+    """
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return 0
+    host = socket.gethostname()
+    now = time.time()
+    removed_count = 0
+    for name in names:
+        run_dir = os.path.join(root, name)
+        if not name.startswith(WORKSPACE_PREFIX) or not os.path.isdir(run_dir):
+            continue
+        info = read_workspace_info(run_dir)
+        if info is None:
+            # Crashed between creating the folder and writing its owner file, or not ours
+            try:
+                is_orphan = now - os.path.getmtime(run_dir) > max_kept_seconds
+            except OSError:
+                continue
+        elif info.get("host") != host:
+            continue
+        elif info.get("kept"):
+            is_orphan = now - info.get("finished", now) > max_kept_seconds
+        else:
+            is_orphan = info.get("pid") != os.getpid() and not is_process_running(info.get("pid", 0))
+        if is_orphan and remove_job_dir(run_dir):
+            removed_count += 1
+    return removed_count
+
+
+class ScratchWorkspace:
+    """The scratch folder of one compile run, with a subfolder per compile job.
+
+    Job folders are removed as soon as studiomdl is done with them, unless the compile
+    failed and keep_failed is set. close() removes whatever is left in one step.
+    """
+
+    def __init__(self, root: str, keep_failed: bool = True):
+        self.root = root
+        self.keep_failed = keep_failed
+        self.run_dir = ""
+        self.shared_dir = ""
+        self.kept_dirs = [] # Job folders kept for inspection
+
+    def create(self):
+        """Creates the run folder. Raises OSError if it can't be."""
+        os.makedirs(self.root, exist_ok=True)
+        self.run_dir = tempfile.mkdtemp(prefix=f"{WORKSPACE_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}_", dir=self.root)
+        self.write_info(kept=False)
+
+    def write_info(self, kept: bool):
+        info = {"version": WORKSPACE_VERSION, "pid": os.getpid(), "host": socket.gethostname(), "kept": kept}
+        if kept:
+            info["finished"] = time.time()
+        with open(os.path.join(self.run_dir, WORKSPACE_INFO_FILE), "w", encoding="utf-8") as file:
+            json.dump(info, file)
+
+    def make_job_dir(self, name: str) -> str:
+        """Creates a folder for one compile job. Raises OSError if it can't be."""
+        return tempfile.mkdtemp(prefix=f"{name}_", dir=self.run_dir)
+
+    def make_shared_dir(self) -> str:
+        """Creates the folder of files used by several jobs. Raises OSError if it can't be."""
+        if not self.shared_dir:
+            self.shared_dir = os.path.join(self.run_dir, "shared")
+            os.makedirs(self.shared_dir, exist_ok=True)
+        return self.shared_dir
+
+    def release_job_dir(self, job_dir: str, failed: bool) -> bool:
+        """Removes a job's folder once it's no longer needed, or keeps it if the job failed and keep_failed is set.
+
+        Returns False if it should have been removed but couldn't be.
+        """
+        if failed and self.keep_failed:
+            self.keep_job_dir(job_dir)
+            return True
+        return remove_job_dir(job_dir)
+
+    def keep_job_dir(self, job_dir: str):
+        """Leaves a failed job's folder in place when the run is closed."""
+        self.kept_dirs.append(job_dir)
+
+    def close(self, keep_failed_jobs: bool = True) -> bool:
+        """Removes the run folder in one step, or everything but the kept job folders.
+
+        Returns False if something could not be removed.
+        """
+        if not self.run_dir:
+            return True
+        if not keep_failed_jobs:
+            self.kept_dirs.clear()
+        if not self.kept_dirs:
+            removed = remove_job_dir(self.run_dir)
+            self.run_dir = ""
+            return removed
+        removed = remove_job_dir(self.shared_dir) if self.shared_dir else True
+        try:
+            self.write_info(kept=True) # Left for the orphan cleanup to expire
+        except OSError:
+            pass
+        return removed